@@ -0,0 +1,200 @@
+# Output generators behind the stand-in FreeBSD tools in this directory.  Sizes are taken
+# from environment variables so the benchmarks can scale them:
+#
+#   FAKE_PKG_COUNT        installed packages (default 3000)
+#   FAKE_ZFS_DATASETS     datasets per pool (default 200)
+#   FAKE_ZFS_SNAPSHOTS    snapshots per pool (default 20000)
+#   FAKE_BE_COUNT         boot environments (default 30)
+#   FAKE_PCI_DEVICES      PCI devices (default 60)
+#   FAKE_DMESG_LINES      kernel messages (default 5000)
+import os
+import random
+import sys
+import time
+
+POOLS = ('zroot', 'backup')
+BASE_TIME = 1767225600
+
+def count(name, default):
+    return int(os.environ.get(name, default))
+
+def human(size):
+    for unit in ('B', 'K', 'M', 'G', 'T'):
+        if size < 1024 or unit == 'T':
+            return f"{size:.1f}{unit}" if unit != 'B' else f"{size}B"
+        size /= 1024
+
+def pkg(args):
+    rng = random.Random(1)
+    packages = [(f"pkg{index:05d}-{rng.choice(('py311-', 'p5-', 'rubygem-', ''))}lib{index}",
+                 f"{rng.randint(0, 20)}.{rng.randint(0, 30)}.{rng.randint(0, 9)}",
+                 f"Synthetic package number {index} used for benchmarking",
+                 rng.randint(10_000, 500_000_000))
+                for index in range(count('FAKE_PKG_COUNT', 3000))]
+    if args[:1] == ['info']:
+        for name, version, comment, size in packages:
+            print(f"{name + '-' + version:<32} {comment}")
+    elif args[:1] == ['query']:
+        query_format = args[-1]
+        for name, version, comment, size in packages:
+            line = query_format.replace('%n', name).replace('%v', version).replace('%c', comment)
+            print(line.replace('%sb', str(size)).replace('%sh', human(size)).replace('\\t', '\t'))
+    elif args[:1] == ['delete']:
+        names = [arg for arg in args[1:] if not arg.startswith('-')]
+        for index, name in enumerate(names, 1):
+            print(f"[{index}/{len(names)}] Deinstalling {name}...")
+            sys.stdout.flush()
+    else:
+        print(f"pkg: unsupported arguments {args}", file=sys.stderr)
+        return 1
+    return 0
+
+def zfs_datasets(pool):
+    datasets = [pool, f"{pool}/ROOT", f"{pool}/ROOT/default", f"{pool}/usr", f"{pool}/usr/home", f"{pool}/var", f"{pool}/var/log"]
+    for index in range(count('FAKE_ZFS_DATASETS', 200) - len(datasets)):
+        datasets.append(f"{pool}/usr/home/user{index:04d}")
+    return datasets
+
+def zfs_snapshots(pool):
+    datasets = zfs_datasets(pool)
+    rng = random.Random(pool)
+    for index in range(count('FAKE_ZFS_SNAPSHOTS', 20000)):
+        dataset = datasets[index % len(datasets)]
+        created = BASE_TIME + index * 900
+        name = time.strftime('auto-%Y%m%d-%H%M', time.gmtime(created))
+        yield f"{dataset}@{name}", created, rng.randint(0, 50_000_000), rng.randint(100_000, 5_000_000_000)
+
+def zfs(args):
+    if args[:1] == ['list']:
+        options = {'-o': 'name,used,avail,refer,mountpoint', '-t': 'filesystem'}
+        flags = set()
+        targets = []
+        rest = args[1:]
+        while rest:
+            arg = rest.pop(0)
+            if arg in ('-o', '-t', '-d', '-s', '-S'):
+                options[arg] = rest.pop(0)
+            elif arg.startswith('-'):
+                flags.update(arg[1:])
+            else:
+                targets.append(arg)
+        fields = options['-o'].split(',')
+        types = options['-t'].split(',')
+        depth = int(options['-d']) if '-d' in options else (None if 'r' in flags else 0)
+        rows = []
+        for pool in POOLS:
+            if 'filesystem' in types or 'all' in types:
+                for dataset in zfs_datasets(pool):
+                    rows.append({'name': dataset, 'type': 'filesystem', 'creation': BASE_TIME,
+                                 'used': 10_000_000_000, 'refer': 1_000_000_000, 'referenced': 1_000_000_000,
+                                 'avail': 500_000_000_000, 'mountpoint': '/' + dataset.partition('/')[2]})
+            if 'snapshot' in types or 'all' in types:
+                for name, created, used, referenced in zfs_snapshots(pool):
+                    rows.append({'name': name, 'type': 'snapshot', 'creation': created, 'used': used,
+                                 'refer': referenced, 'referenced': referenced, 'avail': '-', 'mountpoint': '-'})
+        if targets:
+            def selected(name):
+                for target in targets:
+                    base = name.split('@')[0]
+                    if name == target or base == target:
+                        return True
+                    if base.startswith(target + '/'):
+                        return depth is None or base[len(target):].count('/') <= depth - (1 if '@' in name else 0)
+                return False
+            rows = [row for row in rows if selected(row['name'])]
+        parsable = 'p' in flags
+        if 'H' not in flags:
+            print('  '.join(field.upper() for field in fields))
+        for row in rows:
+            values = []
+            for field in fields:
+                value = row.get(field, '-')
+                if field == 'creation':
+                    value = value if parsable else time.strftime('%a %b %d %H:%M %Y', time.localtime(value))
+                elif isinstance(value, int) and not parsable:
+                    value = human(value)
+                values.append(str(value))
+            print(('\t' if 'H' in flags else '  ').join(values))
+        return 0
+    if args[:1] == ['snapshot']:
+        return 0
+    if args[:1] == ['destroy']:
+        flags = ''.join(arg[1:] for arg in args[1:] if arg.startswith('-'))
+        total = 0
+        for target in (arg for arg in args[1:] if not arg.startswith('-')):
+            dataset, _, specs = target.partition('@')
+            existing = [snapshot.partition('@')[2] for snapshot, *_ in zfs_snapshots(dataset.split('/')[0])
+                        if snapshot.startswith(dataset + '@')]
+            names = []
+            for spec in specs.split(','):
+                first, _, last = spec.partition('%')
+                if last and first in existing and last in existing:
+                    names += existing[existing.index(first):existing.index(last) + 1]
+                else:
+                    names.append(spec)
+            for name in names:
+                total += 1_000_000
+                if 'v' in flags:
+                    print(f"{'would destroy' if 'n' in flags else 'will destroy'}\t{dataset}@{name}" if 'p' not in flags
+                          else f"destroy\t{dataset}@{name}")
+        if 'v' in flags:
+            print(f"reclaim\t{total}" if 'p' in flags else f"would reclaim {human(total)}")
+        return 0
+    print(f"zfs: unsupported arguments {args}", file=sys.stderr)
+    return 1
+
+def zpool(args):
+    if args[:1] == ['list']:
+        for pool in POOLS:
+            print(pool)
+        return 0
+    print(f"zpool: unsupported arguments {args}", file=sys.stderr)
+    return 1
+
+def beadm(args):
+    if args[:1] == ['list']:
+        environments = []
+        for index in range(count('FAKE_BE_COUNT', 30)):
+            name = 'default' if index == 0 else f"be-{index:03d}"
+            active = 'NR' if index == 0 else '-'
+            mountpoint = '/' if index == 0 else '-'
+            created = time.strftime('%Y-%m-%d %H:%M', time.localtime(BASE_TIME + index * 86400))
+            environments.append((name, active, mountpoint, human(1_000_000_000 + index * 10_000_000), created))
+        if '-H' in args:
+            for environment in environments:
+                print('\t'.join(environment))
+        else:
+            print(f"{'BE':<16}{'Active':<8}{'Mountpoint':<12}{'Space':<8}Created")
+            for name, active, mountpoint, space, created in environments:
+                print(f"{name:<16}{active:<8}{mountpoint:<12}{space:<8}{created}")
+        return 0
+    if args[:1] in (['create'], ['destroy'], ['activate'], ['rename']):
+        return 0
+    print(f"beadm: unsupported arguments {args}", file=sys.stderr)
+    return 1
+
+def pciconf(args):
+    for index in range(count('FAKE_PCI_DEVICES', 60)):
+        if index == 2:
+            print("vgapci0@pci0:0:2:0:\tclass=0x030000 rev=0x0c hdr=0x00 vendor=0x8086 device=0x9a49 subvendor=0x1028 subdevice=0x0a38")
+            print("    vendor     = 'Intel Corporation'")
+            print("    device     = 'TigerLake-LP GT2 [Iris Xe Graphics]'")
+            print("    class      = display")
+            print("    subclass   = VGA")
+        else:
+            print(f"none{index}@pci0:0:{index}:0:\tclass=0x088000 rev=0x01 hdr=0x00 vendor=0x8086 device=0x{index:04x}")
+            print("    vendor     = 'Intel Corporation'")
+            print(f"    device     = 'Synthetic device {index}'")
+            print("    class      = base peripheral")
+    return 0
+
+def dmesg(args):
+    for index in range(count('FAKE_DMESG_LINES', 5000)):
+        print(f"synthetic kernel message {index}: device{index % 97} attached at pci0")
+    return 0
+
+def run(tool):
+    try:
+        sys.exit(globals()[tool](sys.argv[1:]))
+    except BrokenPipeError:
+        sys.exit(0)
@@ -0,0 +1,202 @@
+# Stand-in for psutil that serves a synthetic process table and synthetic network interface
+# and disk counters, so the sampling paths can be benchmarked at any scale on any machine.
+# install() must run before system_core is imported.
+import contextlib
+import random
+import socket
+import sys
+import time
+from collections import namedtuple
+
+STATUSES = ('running', 'sleeping', 'sleeping', 'sleeping', 'idle', 'stopped', 'zombie')
+NAMES = ('sh', 'zsh', 'python3.11', 'cc', 'ld', 'make', 'nginx', 'postgres', 'sshd', 'cron',
+         'syslogd', 'devd', 'zfskern', 'php-fpm', 'node', 'java', 'rustc', 'clang', 'git', 'tmux')
+
+INTERFACE_KINDS = ('em', 'igb', 'ix', 'vtnet', 'lagg', 'wlan', 'vlan')
+INTERFACE_COUNT = 40
+DISK_COUNT = 16
+
+snicaddr = namedtuple('snicaddr', 'family address netmask broadcast ptp')
+snetio = namedtuple('snetio', 'bytes_sent bytes_recv packets_sent packets_recv errin errout dropin dropout')
+sdiskio = namedtuple('sdiskio', 'read_count write_count read_bytes write_bytes read_time write_time busy_time')
+sdiskpart = namedtuple('sdiskpart', 'device mountpoint fstype opts')
+
+class Error(Exception):
+    pass
+
+class NoSuchProcess(Error):
+    def __init__(self, pid=None, name=None, msg=None):
+        super().__init__(msg or f"process no longer exists (pid={pid})")
+        self.pid = pid
+
+class ZombieProcess(NoSuchProcess):
+    pass
+
+class AccessDenied(Error):
+    def __init__(self, pid=None, name=None, msg=None):
+        super().__init__(msg or f"access denied (pid={pid})")
+        self.pid = pid
+
+class TimeoutExpired(Error):
+    pass
+
+class ProcessTable:
+    def __init__(self, count=1000, seed=0, churn=0.01):
+        self.random = random.Random(seed)
+        self.churn = churn
+        self.next_pid = 1
+        self.processes = {}
+        for _ in range(count):
+            self.spawn()
+
+    def spawn(self):
+        pid = self.next_pid
+        self.next_pid += 1
+        parent = self.random.choice(list(self.processes)) if self.processes else 0
+        self.processes[pid] = {
+            'name': self.random.choice(NAMES),
+            'ppid': parent,
+            'status': self.random.choice(STATUSES),
+            'memory_percent': self.random.random() * 2,
+            'create_time': time.time() - self.random.random() * 86400,
+            'username': self.random.choice(('root', 'www', 'build', 'postgres')),
+        }
+        return pid
+
+    # Replace a fraction of the processes, as a busy host would between two samples.
+    def tick(self):
+        for pid in self.random.sample(list(self.processes), int(len(self.processes) * self.churn)):
+            if pid > 1:
+                del self.processes[pid]
+                self.spawn()
+
+table = ProcessTable()
+
+def configure(count, seed=0, churn=0.01):
+    global table
+    table = ProcessTable(count, seed, churn)
+
+def pids():
+    table.tick()
+    return list(table.processes)
+
+class Process:
+    def __init__(self, pid=None):
+        if pid not in table.processes:
+            raise NoSuchProcess(pid)
+        self.pid = pid
+        self._info = table.processes[pid]
+        self._create_time = self._info['create_time']
+
+    def _current(self):
+        info = table.processes.get(self.pid)
+        if info is None:
+            raise NoSuchProcess(self.pid)
+        return info
+
+    def is_running(self):
+        info = table.processes.get(self.pid)
+        return info is not None and info['create_time'] == self._create_time
+
+    @contextlib.contextmanager
+    def oneshot(self):
+        yield
+
+    def name(self):
+        return self._current()['name']
+
+    def ppid(self):
+        return self._current()['ppid']
+
+    def status(self):
+        return self._current()['status']
+
+    def username(self):
+        return self._current()['username']
+
+    def create_time(self):
+        return self._create_time
+
+    def cpu_percent(self, interval=None):
+        self._current()
+        return table.random.random() * 100 if table.random.random() < 0.1 else 0.0
+
+    def memory_percent(self):
+        return self._current()['memory_percent']
+
+    def cmdline(self):
+        info = self._current()
+        return [info['name'], '--synthetic', str(self.pid)]
+
+    def send_signal(self, signum):
+        self._current()
+
+    # Stopped processes ignore SIGTERM, so the benchmarks and tests see escalations.
+    def terminate(self):
+        if self._current()['status'] != 'stopped':
+            del table.processes[self.pid]
+
+    def kill(self):
+        self._current()
+        del table.processes[self.pid]
+
+def process_iter(attrs=None):
+    for pid in pids():
+        process = Process(pid)
+        if attrs is not None:
+            process.info = {attr: getattr(process, attr)() if attr != 'pid' else pid for attr in attrs}
+        yield process
+
+def wait_procs(procs, timeout=None, callback=None):
+    gone = [process for process in procs if not process.is_running()]
+    alive = [process for process in procs if process.is_running()]
+    if alive and timeout:
+        time.sleep(min(timeout, 0.01))
+    return gone, alive
+
+def boot_time():
+    return time.time() - 86400
+
+def cpu_count(logical=True):
+    return 16 if logical else 8
+
+def interface_names():
+    return ['lo0'] + [f"{INTERFACE_KINDS[index % len(INTERFACE_KINDS)]}{index // len(INTERFACE_KINDS)}"
+                      for index in range(INTERFACE_COUNT)]
+
+def net_if_addrs():
+    addresses = {'lo0': [snicaddr(socket.AF_INET, '127.0.0.1', '255.0.0.0', None, None),
+                         snicaddr(socket.AF_INET6, '::1', 'ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff', None, None)]}
+    for index, name in enumerate(interface_names()[1:]):
+        addresses[name] = [snicaddr(socket.AF_INET, f"10.{index // 256}.{index % 256}.1", '255.255.255.0',
+                                    f"10.{index // 256}.{index % 256}.255", None),
+                           snicaddr(socket.AF_INET6, f"fe80::{index:x}%{name}", 'ffff:ffff:ffff:ffff::', None, None)]
+    return addresses
+
+# Counters grow with the wall clock, so consecutive samples give steady rates.
+def net_io_counters(pernic=False):
+    now = int(time.monotonic() * 1000)
+    counters = {name: snetio(now * (index + 1) * 100, now * (index + 1) * 300, now * (index + 1),
+                             now * (index + 1) * 2, 0, 0, now // 1000 * index, 0)
+                for index, name in enumerate(interface_names())}
+    if pernic:
+        return counters
+    return snetio(*(sum(values) for values in zip(*counters.values())))
+
+def disk_io_counters(perdisk=False):
+    now = int(time.monotonic() * 1000)
+    counters = {f"ada{index}": sdiskio(now * (index + 1), now * (index + 1) // 2, now * (index + 1) * 4096,
+                                       now * (index + 1) * 2048, now // 2, now // 2, now // (index + 2))
+                for index in range(DISK_COUNT)}
+    if perdisk:
+        return counters
+    return sdiskio(*(sum(values) for values in zip(*counters.values())))
+
+def disk_partitions(all=False):
+    return [sdiskpart(f"/dev/ada{index}p2", f"/data{index}", 'ufs', 'rw,local') for index in range(DISK_COUNT)]
+
+def install(count=1000):
+    configure(count)
+    module = sys.modules[__name__]
+    sys.modules['psutil'] = module
+    return module
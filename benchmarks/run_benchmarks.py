@@ -0,0 +1,313 @@
+# Benchmarks for the hot paths of System View.  Runs on any machine: psutil is replaced by a
+# synthetic process table and I/O counters (fake_psutil.py) and pkg, zfs, zpool, beadm, pciconf
+# and dmesg by the stand-ins in fake_bin/.
+#
+#   python benchmarks/run_benchmarks.py
+#   python benchmarks/run_benchmarks.py --scenario processes --repeat 20
+#   python benchmarks/run_benchmarks.py --save-baseline
+#   python benchmarks/run_benchmarks.py --compare benchmarks/baselines/myhost.json
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import socket
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FAKE_BIN = os.path.join(BENCH_DIR, 'fake_bin')
+BASELINE_DIR = os.path.join(BENCH_DIR, 'baselines')
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import fake_psutil
+fake_psutil.install()
+
+import system_agent
+import system_core
+
+PROCESS_COUNTS = (1000, 10000, 50000)
+
+class Scenario:
+    def __init__(self, name, run, setup=None, teardown=None):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.teardown = teardown
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+# Times repeat runs of the scenario, then makes one more run under tracemalloc for the peak
+# memory, so the tracing overhead does not end up in the latencies.
+def measure(scenario, repeat):
+    state = scenario.setup() if scenario.setup else None
+    try:
+        latencies = []
+        items = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            items = scenario.run(state)
+            latencies.append(time.perf_counter() - started)
+
+        tracemalloc.start()
+        scenario.run(state)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    finally:
+        if scenario.teardown:
+            scenario.teardown(state)
+
+    latencies.sort()
+    p50 = percentile(latencies, 0.5)
+    return {
+        'items': items,
+        'repeat': repeat,
+        'mean_ms': sum(latencies) / len(latencies) * 1000,
+        'p50_ms': p50 * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': latencies[-1] * 1000,
+        'throughput_per_s': items / p50 if p50 else 0.0,
+        'peak_memory_kb': peak / 1024,
+    }
+
+def process_scenarios():
+    scenarios = []
+    for count in PROCESS_COUNTS:
+        def setup_sampler(count=count):
+            fake_psutil.configure(count)
+            sampler = system_core.ProcessSampler(prime_interval=0)
+            sampler.sample()
+            return sampler
+
+        def setup_model(count=count):
+            fake_psutil.configure(count)
+            snapshot = system_core.ProcessSampler(prime_interval=0).sample()
+            return system_core.ProcessTableModel(), snapshot
+
+        # One refresh of the Processes view: load the snapshot, sort by CPU and format the
+        # rows that fit on screen.
+        def refresh_model(state):
+            model, snapshot = state
+            model.update(snapshot)
+            model.sort_column, model.sort_reverse = 2, True
+            model.refresh_order()
+            for row in model.window(0, 40):
+                model.format_row(row)
+            return len(snapshot)
+
+        # What the metrics recorder asks for every tick.
+        def top_processes(state):
+            model, snapshot = state
+            system_core.top_processes(snapshot, 5)
+            return len(snapshot)
+
+        scenarios.append(Scenario(f'processes.sample.{count}', lambda sampler: len(sampler.sample()), setup_sampler))
+        scenarios.append(Scenario(f'processes.model.{count}', refresh_model, setup_model))
+        scenarios.append(Scenario(f'processes.top.{count}', top_processes, setup_model))
+    return scenarios
+
+def command_scenarios():
+    def setup_collector():
+        return system_core.SystemCollector(bin_dir=FAKE_BIN)
+
+    def close_collector(collector):
+        collector.close()
+
+    # The TTL cache would hide the work after the first run.
+    def packages(collector):
+        collector.executor.invalidate('pkg')
+        collector.package_inventory.invalidate()
+        return len(collector.package_inventory.load())
+
+    # A user typing "python" into the filter box, one search per keystroke.
+    def setup_package_index():
+        collector = setup_collector()
+        index = collector.package_inventory.load()
+        collector.close()
+        return index
+
+    def filter_packages(index):
+        index.last_query = ''
+        return sum(len(index.search('python'[:length])) for length in range(1, 7))
+
+    def zfs_snapshots(collector):
+        collector.executor.invalidate('zfs')
+        return len(collector.get_zfs_snapshots('zroot'))
+
+    # Re-sorting a listing in memory, as clicking the Created heading does.
+    def setup_snapshot_model():
+        collector = setup_collector()
+        snapshots = collector.get_zfs_snapshots('zroot')
+        collector.close()
+        model = system_core.ZfsSnapshotModel()
+        model.update(snapshots)
+        return model
+
+    def sort_snapshots(model):
+        model.set_sort(3)
+        for row in model.window(0, 40):
+            model.format_row(row)
+        return len(model)
+
+    def boot_environments(collector):
+        collector.executor.invalidate('beadm')
+        return len(collector.get_boot_environments())
+
+    # Only the probes that run a tool, the others read psutil or cpuinfo.
+    def hardware(collector):
+        collector.executor.invalidate('pciconf')
+        probes = [probe for probe in collector.hardware_probes.probes if probe[0] == 'gpu']
+        results = collector.hardware_probes.run_probes(probes)
+        return sum(len(rows or ()) for rows in results.values())
+
+    # One tick of the interface and disk rates panel.
+    def setup_io_rates():
+        sampler = system_core.IoRateSampler()
+        sampler.sample()
+        return sampler
+
+    def io_rates(sampler):
+        sample = sampler.sample()
+        return len(sample['interfaces']) + len(sample['disks'])
+
+    return [
+        Scenario('packages.inventory', packages, setup_collector, close_collector),
+        Scenario('packages.filter', filter_packages, setup_package_index),
+        Scenario('zfs.snapshots', zfs_snapshots, setup_collector, close_collector),
+        Scenario('zfs.sort', sort_snapshots, setup_snapshot_model),
+        Scenario('boot_environments.list', boot_environments, setup_collector, close_collector),
+        Scenario('system.tool_probes', hardware, setup_collector, close_collector),
+        Scenario('system.io_rates', io_rates, setup_io_rates),
+    ]
+
+def log_scenarios(line_count=500000):
+    def setup_log():
+        log = tempfile.NamedTemporaryFile(prefix='system_viewer_bench_', suffix='.log', delete=False)
+        with log:
+            for index in range(line_count):
+                level = 'error' if index % 5000 == 0 else 'info'
+                log.write(f"Oct 17 12:{index // 60 % 60:02d}:{index % 60:02d} host daemon[{index % 997}]: "
+                          f"{level} synthetic message number {index}\n".encode())
+        return log.name
+
+    def remove_log(path):
+        os.unlink(path)
+
+    def index_log(path):
+        log_file = system_core.LogFile(path)
+        return log_file.build_index()
+
+    def search_log(path):
+        log_file = system_core.LogFile(path)
+        log_file.build_index()
+        log_file.search('ERROR synthetic message number \\d+5000', use_regex=True)
+        return log_file.line_count()
+
+    return [
+        Scenario('logs.index', index_log, setup_log, remove_log),
+        Scenario('logs.search', search_log, setup_log, remove_log),
+    ]
+
+# What the collector agent does per processes tick on top of sampling: diff the table
+# against the last published version and build the delta.
+def agent_scenarios(count=10000):
+    def setup_section():
+        fake_psutil.configure(count)
+        sampler = system_core.ProcessSampler(prime_interval=0)
+        section = system_agent.PublishedSection('processes', *system_agent.SECTIONS['processes'])
+        section.publish(list(sampler.sample()))
+        return sampler, section, [list(sampler.sample()) for _ in range(4)]
+
+    def publish(state):
+        sampler, section, samples = state
+        for rows in samples:
+            section.publish(rows)
+        return sum(map(len, samples))
+
+    return [Scenario(f'agent.publish.{count}', publish, setup_section)]
+
+def all_scenarios():
+    return process_scenarios() + command_scenarios() + agent_scenarios() + log_scenarios()
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    print(f"\n{'scenario':<32} {'baseline p50':>14} {'current p50':>14} {'ratio':>8}")
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            continue
+        ratio = result['p50_ms'] / previous['p50_ms'] if previous['p50_ms'] else float('inf')
+        flag = ''
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<32} {previous['p50_ms']:>12.2f}ms {result['p50_ms']:>12.2f}ms {ratio:>8.2f}{flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the System View hot paths against synthetic data.")
+    parser.add_argument("--scenario", action="append",
+                        help="only run scenarios matching this name or glob, may be repeated (e.g. 'processes*')")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per scenario (default 5)")
+    parser.add_argument("--list", action="store_true", help="list the scenarios and exit")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--save-baseline", nargs='?', const='', metavar="NAME",
+                        help="store the results as benchmarks/baselines/NAME.json (default: the host name)")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a saved baseline, exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed p50 slowdown against the baseline before it counts as a regression (default 0.25)")
+    args = parser.parse_args(argv)
+
+    scenarios = all_scenarios()
+    if args.scenario:
+        patterns = [pattern if any(c in pattern for c in '*?[') else pattern + '*' for pattern in args.scenario]
+        scenarios = [s for s in scenarios if any(fnmatch.fnmatch(s.name, pattern) for pattern in patterns)]
+    if args.list:
+        for scenario in scenarios:
+            print(scenario.name)
+        return 0
+
+    results = {}
+    print(f"{'scenario':<32} {'items':>8} {'p50':>10} {'p95':>10} {'p99':>10} {'max':>10} {'items/s':>12} {'peak KiB':>10}")
+    for scenario in scenarios:
+        result = measure(scenario, args.repeat)
+        results[scenario.name] = result
+        print(f"{scenario.name:<32} {result['items']:>8} {result['p50_ms']:>8.2f}ms {result['p95_ms']:>8.2f}ms "
+              f"{result['p99_ms']:>8.2f}ms {result['max_ms']:>8.2f}ms {result['throughput_per_s']:>12.0f} "
+              f"{result['peak_memory_kb']:>10.0f}")
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'host': socket.gethostname(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'results': results,
+    }
+    paths = []
+    if args.output:
+        paths.append(args.output)
+    if args.save_baseline is not None:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        paths.append(os.path.join(BASELINE_DIR, f"{args.save_baseline or socket.gethostname()}.json"))
+    for path in paths:
+        with open(path, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {path}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
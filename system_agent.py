@@ -0,0 +1,699 @@
+# Collector agent for System View.  One privileged process samples the process table and the
+# package inventory and publishes them over a Unix domain socket, so any number of viewers
+# and scripts, running as ordinary users, share a single sampling cost.  The protocol is
+# newline-delimited JSON:
+#
+#   client -> agent  {"op": "subscribe", "sections": ["processes"], "since": {"processes": 41}}
+#                    {"op": "unsubscribe", "sections": ["processes"]}
+#                    {"op": "call", "id": 7, "method": "get_zfs_datasets", "args": ["zroot"]}
+#   agent -> client  {"type": "snapshot", "section": "processes", "version": 42, "rows": [...]}
+#                    {"type": "delta", "section": "processes", "base": 42, "version": 43,
+#                     "upsert": [...], "remove": [...]}
+#                    {"type": "output", "id": 7, "stream": "stdout", "text": "..."}
+#                    {"type": "reply", "id": 7, "result": ...} or {"type": "reply", "id": 7, "error": "..."}
+#
+# Reads are open to everyone who can connect.  Actions (matching and terminating processes,
+# removing packages, creating and destroying snapshots and boot environments) are only run
+# for root, the agent's own user and members of the agent's group, going by the peer
+# credentials of the connection.  Matching is an action because it takes a regular
+# expression, which a hostile pattern could keep the agent busy with.
+#
+#   sudo python system_agent.py --group wheel
+#   python system_agent.py --connect --section processes --json
+import argparse
+import grp
+import itertools
+import json
+import math
+import os
+import pwd
+import queue
+import socket
+import stat
+import struct
+import sys
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from system_core import CommandRun, PackageIndex, PackageRemovalQueue, ProcessSnapshot, StringTable, SystemCollector
+
+AGENT_SOCKET = "/var/run/system_viewer.sock"
+AGENT_GROUP = "wheel"
+CALL_TIMEOUT = 900
+
+# (sample interval in seconds, position of the key in a row) of each published section.
+SECTIONS = {
+    'processes': (2, 1),
+    'packages': (10, 0),
+}
+
+class AgentError(Exception):
+    pass
+
+# UID of the process at the other end of a Unix socket, None when the platform does not
+# tell.  Linux has SO_PEERCRED (struct ucred: pid, uid, gid), FreeBSD LOCAL_PEERCRED
+# (struct xucred: version, uid, ...).
+def peer_uid(sock):
+    try:
+        if hasattr(socket, 'SO_PEERCRED'):
+            credentials = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+            return struct.unpack('3i', credentials)[1]
+        credentials = sock.getsockopt(0, getattr(socket, 'LOCAL_PEERCRED', 1), struct.calcsize('2I'))
+        return struct.unpack_from('2I', credentials)[1]
+    except (OSError, struct.error) as e:
+        print(f"Error reading peer credentials: {e}", file=sys.stderr)
+        return None
+
+# The rows of one section as last published, keyed by their key column.  Every change gets
+# a new version, and the last few deltas are kept so a client that reconnects, or fell
+# behind, catches up without a full snapshot.
+class PublishedSection:
+    def __init__(self, name, interval, key, history=8):
+        self.name = name
+        self.interval = interval
+        self.key = key
+        self.lock = threading.Lock()
+        self.rows = {}
+        self.version = 0
+        self.deltas = deque(maxlen=history)
+        self.subscribers = set()
+        self.wake = threading.Event()
+
+    # Returns the delta message, or None when nothing changed.
+    def publish(self, rows):
+        rows = {row[self.key]: row for row in rows}
+        with self.lock:
+            upsert = [row for key, row in rows.items() if self.rows.get(key) != row]
+            remove = [key for key in self.rows if key not in rows]
+            if self.version and not upsert and not remove:
+                return None
+            delta = {'type': 'delta', 'section': self.name, 'base': self.version, 'version': self.version + 1,
+                     'upsert': upsert, 'remove': remove}
+            self.rows = rows
+            self.version += 1
+            self.deltas.append(delta)
+            for connection in self.subscribers:
+                connection.send(delta)
+            return delta
+
+    # A subscriber that already has version since only gets the deltas after it.
+    def subscribe(self, connection, since=None):
+        with self.lock:
+            self.subscribers.add(connection)
+            if self.version == 0:
+                self.wake.set()
+                return
+            if since == self.version:
+                return
+            if since is not None and self.deltas and self.deltas[0]['base'] <= since < self.version:
+                for delta in self.deltas:
+                    if delta['base'] >= since:
+                        connection.send(delta)
+                return
+            connection.send({'type': 'snapshot', 'section': self.name, 'version': self.version,
+                             'rows': list(self.rows.values())})
+
+    def unsubscribe(self, connection):
+        with self.lock:
+            self.subscribers.discard(connection)
+
+# One client of the agent.  Messages are queued and written by a thread of their own, so a
+# slow reader never holds up sampling or the other clients.
+class AgentConnection:
+    def __init__(self, agent, sock):
+        self.agent = agent
+        self.sock = sock
+        self.uid = peer_uid(sock)
+        self.outgoing = queue.Queue()
+        self.writer = threading.Thread(target=self.write_loop, name="agent-writer", daemon=True)
+        self.reader = threading.Thread(target=self.read_loop, name="agent-reader", daemon=True)
+
+    def start(self):
+        self.writer.start()
+        self.reader.start()
+
+    def send(self, message):
+        self.outgoing.put(message)
+
+    def close(self):
+        self.outgoing.put(None)
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def write_loop(self):
+        while True:
+            message = self.outgoing.get()
+            if message is None:
+                break
+            try:
+                data = json.dumps(message)
+            except (TypeError, ValueError) as e:
+                # A result JSON cannot carry still gets a reply, or its caller waits for ever.
+                print(f"Error encoding a message for a client: {e}", file=sys.stderr)
+                if message.get('type') != 'reply':
+                    continue
+                data = json.dumps({'type': 'reply', 'id': message.get('id'), 'error': f"unencodable result: {e}"})
+            try:
+                self.sock.sendall((data + "\n").encode('utf-8'))
+            except OSError:
+                break
+        self.sock.close()
+
+    def read_loop(self):
+        try:
+            with self.sock.makefile('rb') as stream:
+                for line in stream:
+                    try:
+                        request = json.loads(line)
+                    except ValueError:
+                        request = None
+                    if not isinstance(request, dict):
+                        self.send({'type': 'reply', 'id': None, 'error': "malformed request"})
+                        continue
+                    self.agent.handle(self, request)
+        except OSError:
+            pass
+        finally:
+            self.agent.disconnect(self)
+
+# Serves a SystemCollector over a Unix domain socket.  Published sections are only sampled
+# while somebody is subscribed to them; calls run on a small pool so a long zfs destroy does
+# not hold up other requests.
+class CollectorAgent:
+    def __init__(self, collector, path=AGENT_SOCKET, group=AGENT_GROUP, mode=0o666):
+        self.collector = collector
+        self.path = path
+        self.group = group
+        self.mode = mode
+        self.sections = {name: PublishedSection(name, interval, key) for name, (interval, key) in SECTIONS.items()}
+        self.connections = set()
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="agent-call")
+        self.removal_lock = threading.Lock()
+        self.sock = None
+        self.calls = {
+            'get_zfs_pools': collector.get_zfs_pools,
+            'get_zfs_datasets': collector.get_zfs_datasets,
+            'get_zfs_snapshots': collector.get_zfs_snapshots,
+            'get_zfs_snapshot_rows': collector.get_zfs_snapshot_rows,
+            'get_boot_environments': collector.get_boot_environments,
+            'hardware_rows': self.hardware_rows,
+            'invalidate': self.invalidate,
+        }
+        self.actions = {
+            'create_zfs_snapshots': collector.create_zfs_snapshots,
+            'destroy_zfs_snapshots': collector.destroy_zfs_snapshots,
+            'create_boot_environment': collector.create_boot_environment,
+            'activate_boot_environment': collector.activate_boot_environment,
+            'rename_boot_environment': collector.rename_boot_environment,
+            'destroy_boot_environment': collector.destroy_boot_environment,
+            'match_processes': collector.match_processes,
+            'terminate_processes': collector.terminate_processes,
+            'remove_packages': self.remove_packages,
+        }
+        # Argument checks beyond the option check every call gets, by method.
+        self.validators = {
+            'terminate_processes': self.valid_termination,
+        }
+
+    def start(self):
+        # Only a socket left behind by an earlier agent is replaced.
+        try:
+            if stat.S_ISSOCK(os.lstat(self.path).st_mode):
+                os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(self.path)
+        os.chmod(self.path, self.mode)
+        self.sock.listen(16)
+        threading.Thread(target=self.accept_loop, name="agent-accept", daemon=True).start()
+        for section in self.sections.values():
+            threading.Thread(target=self.sample_loop, args=(section,), name=f"agent-{section.name}", daemon=True).start()
+
+    def serve_forever(self):
+        self.start()
+        try:
+            self.stopping.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        self.stopping.set()
+        for section in self.sections.values():
+            section.wake.set()
+        if self.sock is not None:
+            self.sock.close()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+        with self.lock:
+            connections = list(self.connections)
+        for connection in connections:
+            connection.close()
+        self.pool.shutdown(wait=False)
+
+    def accept_loop(self):
+        while not self.stopping.is_set():
+            try:
+                sock, address = self.sock.accept()
+            except OSError:
+                break
+            connection = AgentConnection(self, sock)
+            with self.lock:
+                self.connections.add(connection)
+            connection.start()
+
+    def disconnect(self, connection):
+        with self.lock:
+            self.connections.discard(connection)
+        for section in self.sections.values():
+            section.unsubscribe(connection)
+        connection.close()
+
+    def sample_loop(self, section):
+        while not self.stopping.is_set():
+            if section.subscribers:
+                try:
+                    section.publish(self.collect(section.name))
+                except Exception as e:
+                    print(f"Error sampling {section.name}: {e}", file=sys.stderr)
+            section.wake.wait(section.interval)
+            section.wake.clear()
+
+    def collect(self, name):
+        if name == 'processes':
+            return list(self.collector.process_sampler.sample())
+        return self.collector.package_inventory.load().packages
+
+    def authorized(self, uid):
+        if uid is None:
+            return False
+        if uid in (0, os.geteuid()):
+            return True
+        if not self.group:
+            return False
+        try:
+            group = grp.getgrnam(self.group)
+            user = pwd.getpwuid(uid)
+        except KeyError:
+            return False
+        return user.pw_gid == group.gr_gid or user.pw_name in group.gr_mem
+
+    # Requests come from anyone who can connect, so their shape is checked before use and a
+    # bad one gets an error reply instead of ending the connection.
+    def handle(self, connection, request):
+        op, request_id = request.get('op'), request.get('id')
+        if op in ('subscribe', 'unsubscribe'):
+            names, since = request.get('sections', []), request.get('since')
+            if not isinstance(names, list) or not isinstance(since, (dict, type(None))):
+                connection.send({'type': 'reply', 'id': request_id, 'error': "malformed request"})
+                return
+            since = since or {}
+            for name in names:
+                if not isinstance(name, str) or name not in self.sections:
+                    continue
+                if op == 'unsubscribe':
+                    self.sections[name].unsubscribe(connection)
+                    continue
+                version = since.get(name)
+                self.sections[name].subscribe(connection, version if isinstance(version, int) else None)
+        elif op == 'call':
+            if not isinstance(request.get('method'), str):
+                connection.send({'type': 'reply', 'id': request_id, 'error': "malformed request"})
+                return
+            self.pool.submit(self.call, connection, request)
+        else:
+            connection.send({'type': 'reply', 'id': request_id, 'error': f"unknown request {op!r}"})
+
+    def call(self, connection, request):
+        call_id, method, args = request.get('id'), request.get('method'), request.get('args') or []
+        reply = {'type': 'reply', 'id': call_id}
+        function = self.calls.get(method) or self.actions.get(method)
+        if function is None:
+            reply['error'] = f"unknown method {method!r}"
+        elif method in self.actions and not self.authorized(connection.uid):
+            reply['error'] = f"not authorized to {method.replace('_', ' ')}"
+        elif (not isinstance(args, list) or any(self.is_option(arg) for arg in args)
+              or not self.validators.get(method, lambda args: True)(args)):
+            reply['error'] = "invalid arguments"
+        else:
+            if method == 'remove_packages':
+                args = args + [lambda stream, text: connection.send(
+                    {'type': 'output', 'id': call_id, 'stream': stream, 'text': text})]
+            try:
+                reply['result'] = function(*args)
+            except Exception as e:
+                reply['error'] = str(e)
+            else:
+                if method in self.actions:
+                    self.changed(method)
+        connection.send(reply)
+
+    # terminate_processes(pids, grace=5, force=False) signals as root, so its arguments are
+    # checked before anything is sent: a string of PIDs would otherwise be taken digit by digit.
+    def valid_termination(self, args):
+        if not 1 <= len(args) <= 3:
+            return False
+        pids, grace, force = args + [5, False][len(args) - 1:]
+        return (isinstance(pids, list) and all(type(pid) is int for pid in pids)
+                and type(grace) in (int, float) and 0 <= grace < math.inf and type(force) is bool)
+
+    # Arguments end up on the command lines of zfs, beadm and pkg, where they must not be
+    # taken for options.
+    def is_option(self, arg):
+        if isinstance(arg, list):
+            return any(self.is_option(item) for item in arg)
+        return isinstance(arg, str) and arg.startswith('-')
+
+    # Subscribers see the effect of an action right away instead of at the next tick.
+    def changed(self, method):
+        if method == 'terminate_processes':
+            self.sections['processes'].wake.set()
+        elif method == 'remove_packages':
+            self.sections['packages'].wake.set()
+
+    def hardware_rows(self, refresh=False):
+        probes = self.collector.hardware_probes
+        return probes.refresh_dynamic() if refresh else probes.collect()
+
+    # Only the tools whose listings a viewer can ask to re-read.
+    def invalidate(self, *tools):
+        self.collector.executor.invalidate(*[tool for tool in tools if tool in ('zfs', 'zpool', 'beadm', 'pkg')])
+
+    # One pkg delete at a time, whoever asks; the output goes to the caller as it arrives.
+    def remove_packages(self, names, on_output):
+        with self.removal_lock:
+            outcome = {}
+            run = CommandRun(self.collector.executor.resolve(['pkg', 'delete', '-y'] + names), on_output=on_output,
+                             on_exit=lambda status, returncode: outcome.update(status=status, returncode=returncode))
+            run.execute()
+            self.collector.executor.invalidate('pkg')
+            return outcome
+
+# Connection to a running agent.  A reader thread applies the snapshots and deltas of the
+# subscribed sections to local copies and completes the pending calls.
+class AgentClient:
+    def __init__(self, path=AGENT_SOCKET, on_update=None):
+        self.path = path
+        self.on_update = on_update
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.send_lock = threading.Lock()
+        self.condition = threading.Condition()
+        self.sections = {}
+        self.pending = {}
+        self.ids = itertools.count(1)
+        self.closed = False
+        self.reader = threading.Thread(target=self.read_loop, name="agent-client", daemon=True)
+        self.reader.start()
+
+    def send(self, message):
+        data = (json.dumps(message) + "\n").encode('utf-8')
+        with self.send_lock:
+            self.sock.sendall(data)
+
+    def subscribe(self, *names):
+        with self.condition:
+            since = {name: self.sections[name][0] for name in names if name in self.sections}
+            for name in names:
+                self.sections.setdefault(name, [0, {}])
+        self.send({'op': 'subscribe', 'sections': list(names), 'since': since})
+
+    # Version and rows of a section, subscribing to it on first use and waiting for the
+    # first snapshot.
+    def section(self, name, timeout=30):
+        with self.condition:
+            subscribed = name in self.sections
+        if not subscribed:
+            self.subscribe(name)
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.closed or self.sections[name][0] > 0, timeout):
+                raise AgentError(f"no {name} from the agent within {timeout} s")
+            if self.closed:
+                raise AgentError("connection to the agent closed")
+            version, rows = self.sections[name]
+            return version, list(rows.values())
+
+    def call(self, method, *args, on_output=None, timeout=CALL_TIMEOUT):
+        call_id = next(self.ids)
+        future = Future()
+        with self.condition:
+            if self.closed:
+                raise AgentError("connection to the agent closed")
+            self.pending[call_id] = (future, on_output)
+        self.send({'op': 'call', 'id': call_id, 'method': method, 'args': list(args)})
+        return future.result(timeout=timeout)
+
+    def invalidate(self, *tools):
+        self.call('invalidate', *tools)
+
+    def read_loop(self):
+        try:
+            with self.sock.makefile('rb') as stream:
+                for line in stream:
+                    self.dispatch(json.loads(line))
+        except (OSError, ValueError) as e:
+            print(f"Error reading from the agent: {e}", file=sys.stderr)
+        finally:
+            with self.condition:
+                self.closed = True
+                pending, self.pending = self.pending, {}
+                self.condition.notify_all()
+            for future, on_output in pending.values():
+                future.set_exception(AgentError("connection to the agent closed"))
+
+    def dispatch(self, message):
+        kind = message.get('type')
+        if kind in ('snapshot', 'delta'):
+            self.apply(message)
+        elif kind == 'output':
+            with self.condition:
+                future, on_output = self.pending.get(message.get('id'), (None, None))
+            if on_output is not None:
+                on_output(message['stream'], message['text'])
+        elif kind == 'reply':
+            with self.condition:
+                future, on_output = self.pending.pop(message.get('id'), (None, None))
+            if future is None:
+                print(f"Error from the agent: {message.get('error')}", file=sys.stderr)
+            elif 'error' in message:
+                future.set_exception(AgentError(message['error']))
+            else:
+                future.set_result(message.get('result'))
+
+    # A delta that does not follow on the local version means something was missed, and
+    # the section is requested again from that version.
+    def apply(self, message):
+        name = message['section']
+        key = SECTIONS[name][1]
+        with self.condition:
+            state = self.sections.get(name)
+            if state is None:
+                return
+            version, rows = state
+            if message['type'] == 'snapshot':
+                state[0], state[1] = message['version'], {row[key]: tuple(row) for row in message['rows']}
+            elif message['version'] <= version:
+                return
+            elif message['base'] != version:
+                self.send({'op': 'subscribe', 'sections': [name], 'since': {name: version}})
+                return
+            else:
+                for row_key in message['remove']:
+                    rows.pop(row_key, None)
+                for row in message['upsert']:
+                    rows[row[key]] = tuple(row)
+                state[0] = message['version']
+            self.condition.notify_all()
+        if self.on_update is not None:
+            self.on_update(message)
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+# Process table as published by the agent, in place of a local ProcessSampler.
+class AgentProcessSampler:
+    def __init__(self, client):
+        self.client = client
+        self.strings = StringTable()
+
+    def sample(self):
+        version, rows = self.client.section('processes')
+        snapshot = ProcessSnapshot(self.strings)
+        for row in sorted(rows, key=lambda row: row[1]):
+            snapshot.append(*row)
+        return snapshot
+
+# Package list as published by the agent, in place of a local PackageInventory.  The index
+# is only rebuilt when the agent published a new version.
+class AgentPackageInventory:
+    def __init__(self, client):
+        self.client = client
+        self.lock = threading.Lock()
+        self.version = None
+        self.index = None
+
+    def load(self):
+        version, rows = self.client.section('packages')
+        with self.lock:
+            if self.index is None or version != self.version:
+                self.version = version
+                self.index = PackageIndex(rows)
+            return self.index
+
+    def invalidate(self):
+        with self.lock:
+            self.version = None
+            self.index = None
+
+    def remove(self, packages):
+        with self.lock:
+            return self.index.remove(packages) if self.index is not None else []
+
+class AgentHardwareProbes:
+    def __init__(self, client):
+        self.client = client
+
+    def collect(self):
+        return [tuple(row) for row in self.client.call('hardware_rows')]
+
+    def refresh_dynamic(self):
+        return [tuple(row) for row in self.client.call('hardware_rows', True)]
+
+# Package removals run by the agent.  Batching works as in PackageRemovalQueue, only each
+# batch is one remove_packages call whose output is relayed as it arrives.
+class AgentPackageRemovalQueue(PackageRemovalQueue):
+    def __init__(self, client, on_output, on_progress, on_finished):
+        super().__init__(client, on_output, on_progress, on_finished)
+        self.client = client
+
+    # Called with the lock held.
+    def start_batch(self):
+        names, self.pending = self.pending, []
+        if not names:
+            self.running = None
+            return
+        batch = {'names': names, 'removed': [], 'partial': ''}
+        self.running = batch
+        threading.Thread(target=self.run_batch, args=(batch,), name="AgentRemoval", daemon=True).start()
+
+    def run_batch(self, batch):
+        try:
+            outcome = self.client.call('remove_packages', batch['names'],
+                                       on_output=lambda stream, text: self.output(batch, stream, text))
+            status, returncode = outcome['status'], outcome['returncode']
+        except Exception as e:
+            self.on_output('stderr', f"Error: {e}\n")
+            status, returncode = 'failed', None
+        self.finish(batch, status, returncode)
+
+# Stands in for SystemCollector in a viewer that is not root: published sections come from
+# the subscriptions, everything else is a call to the agent.
+class AgentCollector:
+    def __init__(self, path=AGENT_SOCKET):
+        self.client = AgentClient(path)
+        self.process_sampler = AgentProcessSampler(self.client)
+        self.package_inventory = AgentPackageInventory(self.client)
+        self.hardware_probes = AgentHardwareProbes(self.client)
+
+    def package_removal_queue(self, on_output, on_progress, on_finished):
+        return AgentPackageRemovalQueue(self.client, on_output, on_progress, on_finished)
+
+    def invalidate(self, *tools):
+        self.client.invalidate(*tools)
+
+    def get_zfs_pools(self):
+        return self.client.call('get_zfs_pools')
+
+    def get_zfs_datasets(self, zfs_pool):
+        return [tuple(row) for row in self.client.call('get_zfs_datasets', zfs_pool)]
+
+    def get_zfs_snapshots(self, zfs_pool, depth=None):
+        return [tuple(row) for row in self.client.call('get_zfs_snapshots', zfs_pool, depth)]
+
+    def get_zfs_snapshot_rows(self, names):
+        return [tuple(row) for row in self.client.call('get_zfs_snapshot_rows', names)]
+
+    def create_zfs_snapshots(self, datasets, snapshot_name, recursive=False):
+        self.client.call('create_zfs_snapshots', datasets, snapshot_name, recursive)
+
+    def destroy_zfs_snapshots(self, dataset, specs, dry_run=False):
+        destroyed, reclaim = self.client.call('destroy_zfs_snapshots', dataset, specs, dry_run)
+        return destroyed, reclaim
+
+    def get_boot_environments(self):
+        return [tuple(row) for row in self.client.call('get_boot_environments')]
+
+    def create_boot_environment(self, name):
+        self.client.call('create_boot_environment', name)
+
+    def activate_boot_environment(self, name):
+        self.client.call('activate_boot_environment', name)
+
+    def rename_boot_environment(self, name, new_name):
+        self.client.call('rename_boot_environment', name, new_name)
+
+    def destroy_boot_environment(self, name):
+        self.client.call('destroy_boot_environment', name)
+
+    def match_processes(self, field, value):
+        return [tuple(match) for match in self.client.call('match_processes', field, value)]
+
+    def terminate_processes(self, pids, grace=5, force=False):
+        return [tuple(result) for result in self.client.call('terminate_processes', pids, grace, force)]
+
+    def close(self):
+        self.client.close()
+
+def print_update(message, as_json):
+    if as_json:
+        sys.stdout.write(json.dumps(message) + "\n")
+    elif message['type'] == 'snapshot':
+        sys.stdout.write(f"[{message['section']}] version {message['version']}: {len(message['rows'])} rows\n")
+    else:
+        sys.stdout.write(f"[{message['section']}] version {message['version']}: {len(message['upsert'])} changed, "
+                         f"{len(message['remove'])} removed\n")
+    sys.stdout.flush()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve System View data to unprivileged viewers, or follow it.")
+    parser.add_argument("--socket", default=AGENT_SOCKET, help=f"path of the agent's socket (default {AGENT_SOCKET})")
+    parser.add_argument("--group", default=AGENT_GROUP,
+                        help=f"group whose members may run privileged actions, besides root (default {AGENT_GROUP})")
+    parser.add_argument("--bin-dir", help="directory of stand-in binaries to run instead of the system tools")
+    parser.add_argument("--connect", action="store_true", help="connect to a running agent and print its updates")
+    parser.add_argument("--section", action="append", choices=sorted(SECTIONS),
+                        help="with --connect, section to follow, may be repeated (default: all)")
+    parser.add_argument("--json", action="store_true", help="with --connect, print the messages as JSON lines")
+    args = parser.parse_args(argv)
+
+    if args.connect:
+        client = AgentClient(args.socket, on_update=lambda message: print_update(message, args.json))
+        client.subscribe(*(args.section or sorted(SECTIONS)))
+        try:
+            client.reader.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            client.close()
+        return
+
+    collector = SystemCollector(bin_dir=args.bin_dir)
+    try:
+        CollectorAgent(collector, args.socket, args.group).serve_forever()
+    finally:
+        collector.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2055 @@
+# Data collection for System View, free of any GUI code.  system_view.py builds the Tk
+# interface on top of these classes, and this module can also be run on its own to print
+# the same information, for scripts, cron jobs and benchmarks:
+#
+#   python system_core.py --once --json
+#   python system_core.py --watch 5 --json --section processes
+import platform
+import subprocess
+import psutil
+import json
+import os
+import re
+import sys
+import threading
+import time
+import argparse
+import mmap
+import codecs
+import signal
+import socket
+import bisect
+import ctypes
+import ctypes.util
+import ipaddress
+import csv
+import gzip
+import heapq
+import operator
+import shutil
+import sqlite3
+from array import array
+from collections import deque
+from contextlib import contextmanager
+from itertools import compress, repeat
+from datetime import datetime, timedelta
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'system_viewer')
+SYSLOG_FILE = "/var/log/messages"
+PKG_DATABASE = "/var/db/pkg/local.sqlite"
+ZFS_FIELDS = 'name,used,referenced,creation'
+LOG_FOLLOW_LINES = 5000
+ARCSTATS_FILE = "/proc/spl/kstat/zfs/arcstats"
+METRICS_DIR = os.path.join(os.path.expanduser('~'), '.local', 'share', 'system_viewer', 'metrics')
+
+# Interns the process names and statuses, which repeat across processes and across ticks,
+# so a snapshot stores a small integer per row instead of a string.
+class StringTable:
+    def __init__(self):
+        self.strings = []
+        self.ids = {}
+
+    def intern(self, string):
+        string_id = self.ids.get(string)
+        if string_id is None:
+            string_id = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def __getitem__(self, string_id):
+        return self.strings[string_id]
+
+# One sampling pass over the process table, stored by column: numbers in arrays and names
+# and statuses as ids into a StringTable.  Rows are in ascending PID order.  A row tuple
+# (name, pid, cpu %, memory %, status, ppid) is only built for the rows that are asked for,
+# so a tick over tens of thousands of processes allocates a handful of arrays instead of a
+# tuple per process.
+class ProcessSnapshot:
+    def __init__(self, strings):
+        self.strings = strings
+        self.name_ids = array('I')
+        self.pids = array('q')
+        self.cpu = array('d')
+        self.memory = array('d')
+        self.status_ids = array('I')
+        self.ppids = array('q')
+        self.index = None
+
+    def append(self, name, pid, cpu_percent, memory_percent, status, ppid):
+        self.name_ids.append(self.strings.intern(name))
+        self.pids.append(pid)
+        self.cpu.append(cpu_percent)
+        self.memory.append(memory_percent)
+        self.status_ids.append(self.strings.intern(status))
+        self.ppids.append(ppid)
+
+    def __len__(self):
+        return len(self.pids)
+
+    def __iter__(self):
+        return map(self.row, range(len(self.pids)))
+
+    def row(self, index):
+        strings = self.strings.strings
+        return (strings[self.name_ids[index]], self.pids[index], self.cpu[index], self.memory[index],
+                strings[self.status_ids[index]], self.ppids[index])
+
+    # Position of a PID in the snapshot, or None.
+    def index_of(self, pid):
+        if self.index is None:
+            self.index = {pid: index for index, pid in enumerate(self.pids)}
+        return self.index.get(pid)
+
+    # Column arrays in ProcessTableModel.COLUMNS order, plus the parent PIDs.
+    def columns(self):
+        return (self.name_ids, self.pids, self.cpu, self.memory, self.status_ids, self.ppids)
+
+    # Positions of the count rows with the highest values in a numeric column.
+    def top(self, count, column=2):
+        values = self.columns()[column]
+        return heapq.nlargest(count, range(len(values)), key=values.__getitem__)
+
+# Collects the process table.  The GUI runs sample() on the scheduler's worker thread so the
+# Tk main loop never waits on psutil.  psutil.Process objects are kept between ticks, so
+# cpu_percent() reports the usage since the previous sample instead of 0.00 for every
+# process it sees for the first time.
+class ProcessSampler:
+    def __init__(self, prime_interval=0.5):
+        self.prime_interval = prime_interval
+        self.processes = {}
+        self.strings = StringTable()
+
+    def sample(self):
+        if not self.processes:
+            # The first pass only primes the cpu_percent counters, so follow it up quickly.
+            self.sample_once()
+            time.sleep(self.prime_interval)
+        return self.sample_once()
+
+    def sample_once(self):
+        snapshot = ProcessSnapshot(self.strings)
+        alive = {}
+        for pid in sorted(psutil.pids()):
+            process = self.processes.get(pid)
+            try:
+                # is_running() also catches a PID that was reused by a new process.
+                if process is None or not process.is_running():
+                    process = psutil.Process(pid)
+                    process.cpu_percent(None)
+                with process.oneshot():
+                    snapshot.append(process.name(), pid, process.cpu_percent(None),
+                                    process.memory_percent(), process.status(), process.ppid())
+            except (psutil.NoSuchProcess, psutil.ZombieProcess, psutil.AccessDenied):
+                continue
+            alive[pid] = process
+        self.processes = alive
+        return snapshot
+
+# In-memory model behind the Processes view, over a ProcessSnapshot.  The view order is a
+# list of row positions sorted with the column array's own __getitem__ as the key, so
+# sorting by any column runs without a Python-level call per row, and rows are only turned
+# into tuples and strings for what is on screen.  The same snapshot also answers the
+# parent/child questions of the tree view.
+class ProcessTableModel:
+    COLUMNS = ('Name', 'PID', 'CPU %', 'Memory %', 'Status')
+    TEXT_COLUMNS = (0, 4)
+    FILTER_PATTERN = re.compile(r'^(<=|>=|<|>|=)?\s*(\d+(?:\.\d+)?)$')
+    COMPARISONS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge, '=': operator.eq}
+
+    def __init__(self):
+        self.snapshot = ProcessSnapshot(StringTable())
+        self.order = []
+        self.children = None
+        self.sort_column = 1
+        self.sort_reverse = False
+        self.filter_column = 0
+        self.filter_text = ''
+
+    def update(self, snapshot):
+        self.snapshot = snapshot
+        self.refresh_order()
+
+    def set_sort(self, column):
+        if column == self.sort_column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            # Busiest processes first is what you want when sorting by usage.
+            self.sort_reverse = column in (2, 3)
+        self.refresh_order()
+
+    def set_filter(self, column, text):
+        self.filter_column = column
+        self.filter_text = text.strip().lower()
+        self.refresh_order()
+
+    # The rows are in PID order and sorted() is stable, so equal values stay ordered by PID.
+    def refresh_order(self):
+        positions = range(len(self.snapshot))
+        if self.filter_text:
+            positions = self.filtered_positions()
+        self.order = sorted(positions, key=self.sort_key().__getitem__, reverse=self.sort_reverse)
+        self.children = None
+
+    # A sequence with one sortable value per row.  Text columns are sorted by the rank of
+    # each distinct string, computed once per string instead of once per row.
+    def sort_key(self):
+        column = self.snapshot.columns()[self.sort_column]
+        if self.sort_column not in self.TEXT_COLUMNS:
+            return column
+        strings = self.snapshot.strings
+        ranks = {string_id: rank for rank, string_id in
+                 enumerate(sorted(set(column), key=lambda string_id: strings[string_id].lower()))}
+        return list(map(ranks.__getitem__, column))
+
+    # Text columns match on a substring.  Numeric columns take a comparison like ">5" or
+    # "<=0.5", and a bare number means "=".  Values are compared as they are displayed, CPU and
+    # memory rounded to two decimals, so "0" and "=0" both find the rows showing 0.00.  Any
+    # other text matches as a substring of the displayed value.
+    def filtered_positions(self):
+        snapshot = self.snapshot
+        column = self.filter_column
+        values = snapshot.columns()[column]
+        text = self.filter_text
+        positions = range(len(snapshot))
+        if column in self.TEXT_COLUMNS:
+            strings = snapshot.strings
+            matching = {string_id for string_id in set(values) if text in strings[string_id].lower()}
+            return list(compress(positions, map(matching.__contains__, values)))
+        match = self.FILTER_PATTERN.match(text)
+        if match:
+            comparison, value = self.COMPARISONS[match.group(1) or '='], float(match.group(2))
+            if column == 1:
+                if comparison is operator.eq:
+                    position = snapshot.index_of(int(value)) if value.is_integer() else None
+                    return [] if position is None else [position]
+                return list(compress(positions, map(comparison, values, repeat(value))))
+            shown = map(round, values, repeat(2))
+            return list(compress(positions, map(comparison, shown, repeat(round(value, 2)))))
+        if column == 1:
+            return [position for position, pid in enumerate(values) if text in str(pid)]
+        return [position for position, value in enumerate(values) if text in f"{value:.2f}"]
+
+    def row_key(self, row):
+        return row[1]
+
+    def get_row(self, pid):
+        position = self.snapshot.index_of(pid)
+        return None if position is None else self.snapshot.row(position)
+
+    # Rows of the children of pid, or of the roots for None, in the current sort order.  A
+    # process whose parent is not in the snapshot is a root.  With a filter set, processes
+    # that do not match stay in the tree when one of their descendants does.
+    def tree_children(self, pid):
+        if self.children is None:
+            self.build_tree()
+        return [self.snapshot.row(position) for position in self.children.get(pid, ())]
+
+    def has_children(self, pid):
+        if self.children is None:
+            self.build_tree()
+        return pid in self.children
+
+    def build_tree(self):
+        snapshot = self.snapshot
+        pids, ppids = snapshot.pids, snapshot.ppids
+        positions = range(len(snapshot))
+        if self.filter_text:
+            visible = set()
+            for position in self.order:
+                while position is not None and position not in visible:
+                    visible.add(position)
+                    parent = snapshot.index_of(ppids[position])
+                    position = parent if parent != position else None
+            positions = sorted(visible)
+        else:
+            visible = None
+        self.children = {}
+        for position in sorted(positions, key=self.sort_key().__getitem__, reverse=self.sort_reverse):
+            parent_position = snapshot.index_of(ppids[position])
+            if (parent_position is None or parent_position == position or
+                    (visible is not None and parent_position not in visible)):
+                parent = None
+            else:
+                parent = pids[parent_position]
+            self.children.setdefault(parent, []).append(position)
+
+    def __len__(self):
+        return len(self.order)
+
+    def window(self, start, count):
+        return [self.snapshot.row(position) for position in self.order[start:start + count]]
+
+    def format_row(self, row):
+        name, pid, cpu_percent, memory_percent, status = row[:5]
+        return (name, str(pid), f"{cpu_percent:.2f}", f"{memory_percent:.2f}", status)
+
+# The expensive facts about one process for the details panel: command line, threads,
+# memory, I/O counters, open files and connections.  They are read in a single oneshot()
+# pass on a worker thread and kept for ttl seconds, so clicking back and forth through the
+# process tree does not repeat the syscalls.  A fact the platform or the permissions do
+# not allow is None.
+class ProcessDetails:
+    def __init__(self, ttl=5.0):
+        self.ttl = ttl
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def get(self, pid):
+        now = time.monotonic()
+        with self.lock:
+            cached = self.cache.get(pid)
+            if cached is not None and cached[0] > now:
+                return cached[1]
+        details = self.read(pid)
+        with self.lock:
+            self.cache = {key: entry for key, entry in self.cache.items() if entry[0] > now}
+            self.cache[pid] = (now + self.ttl, details)
+        return details
+
+    # Raises psutil.NoSuchProcess when the process is gone.
+    def read(self, pid):
+        process = psutil.Process(pid)
+        connections = getattr(process, 'net_connections', None) or getattr(process, 'connections', None)
+        readers = (
+            ('command_line', lambda: ' '.join(process.cmdline())),
+            ('username', lambda: process.username()),
+            ('threads', lambda: process.num_threads()),
+            ('memory', lambda: process.memory_info()[:2]),
+            ('io', lambda: process.io_counters()),
+            ('open_files', lambda: [file.path for file in process.open_files()]),
+            ('connections', lambda: [self.format_connection(connection) for connection in connections(kind='inet')]),
+        )
+        details = {'pid': pid}
+        with process.oneshot():
+            for name, read in readers:
+                try:
+                    details[name] = read()
+                except (psutil.AccessDenied, psutil.ZombieProcess, AttributeError, NotImplementedError, TypeError):
+                    details[name] = None
+        return details
+
+    def format_connection(self, connection):
+        local = f"{connection.laddr[0]}:{connection.laddr[1]}" if connection.laddr else ''
+        remote = f" -> {connection.raddr[0]}:{connection.raddr[1]}" if connection.raddr else ''
+        kind = 'tcp' if connection.type == socket.SOCK_STREAM else 'udp'
+        return f"{kind} {local}{remote} {connection.status}".strip()
+
+def format_size(size):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+# One line of `zfs list -H -p -o name,used,referenced,creation`: exact byte counts and
+# seconds since the epoch, tab separated.  "-" (no value) reads as 0.
+def parse_zfs_row(line):
+    name, used, referenced, creation = line.split('\t')
+    return (name, int(used) if used.isdigit() else 0, int(referenced) if referenced.isdigit() else 0,
+            int(creation) if creation.isdigit() else 0)
+
+# Rows of a whole zfs listing.  A line that does not parse is reported and skipped rather
+# than failing the listing.
+def parse_zfs_rows(lines):
+    rows = []
+    for line in lines:
+        try:
+            rows.append(parse_zfs_row(line))
+        except ValueError:
+            print(f"Skipping malformed zfs list line: {line!r}", file=sys.stderr)
+    return rows
+
+# Collapses the selected snapshots of one dataset into zfs destroy specs: runs of snapshots
+# that are adjacent in names (the dataset's snapshots oldest first) become "first%last".
+# Returns (spec, full names the spec covers) pairs.
+def snapshot_ranges(names, selected):
+    ranges = []
+    run = []
+    for name in names + [None]:
+        if name is not None and name in selected:
+            run.append(name)
+            continue
+        if run:
+            first, last = run[0].partition('@')[2], run[-1].partition('@')[2]
+            ranges.append((first if len(run) == 1 else f"{first}%{last}", run))
+            run = []
+    return ranges
+
+# Snapshots of one dataset for a virtualized table, keyed by the full snapshot name.  Sorting
+# and filtering work on the rows in memory, zfs is not asked again.
+class ZfsSnapshotModel:
+    COLUMNS = ('Snapshot', 'Used', 'Referenced', 'Created')
+
+    def __init__(self):
+        self.rows = {}
+        self.order = []
+        self.sort_column = 3
+        self.sort_reverse = True
+        self.filter_text = ''
+
+    def update(self, rows):
+        self.rows = {row[0]: row for row in rows}
+        self.refresh_order()
+
+    # The rows are kept in the order zfs lists them, oldest first, so sorting by creation is
+    # close to linear.
+    def add_rows(self, rows):
+        self.rows.update((row[0], row) for row in rows)
+        self.refresh_order()
+
+    def remove_rows(self, names):
+        names = set(names)
+        for name in names:
+            self.rows.pop(name, None)
+        self.order = [name for name in self.order if name not in names]
+
+    def row_key(self, row):
+        return row[0]
+
+    def get_row(self, name):
+        return self.rows.get(name)
+
+    def set_sort(self, column):
+        if column == self.sort_column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            # Newest and biggest first.
+            self.sort_reverse = column != 0
+        self.refresh_order()
+
+    def set_filter(self, column, text):
+        self.filter_text = text.strip().lower()
+        self.refresh_order()
+
+    def refresh_order(self):
+        rows = self.rows.values()
+        if self.filter_text:
+            rows = [row for row in rows if self.filter_text in row[0].lower()]
+        column = self.sort_column
+        self.order = [row[0] for row in sorted(rows, key=lambda row: (row[column], row[0]), reverse=self.sort_reverse)]
+
+    def __len__(self):
+        return len(self.order)
+
+    def window(self, start, count):
+        return [self.rows[name] for name in self.order[start:start + count]]
+
+    def format_row(self, row):
+        name, used, referenced, creation = row
+        return (name.partition('@')[2], format_size(used), format_size(referenced),
+                time.strftime('%Y-%m-%d %H:%M', time.localtime(creation)))
+
+# Latency histogram with fixed millisecond buckets.
+class LatencyHistogram:
+    BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        milliseconds = seconds * 1000
+        self.counts[bisect.bisect_left(self.BUCKETS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+
+    # Upper bound of the bucket holding the given fraction of the samples, capped at the maximum seen.
+    def percentile(self, fraction):
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(self.BUCKETS[index], self.max) if index < len(self.BUCKETS) else self.max
+        return 0.0
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count if self.count else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': self.max,
+            'buckets': {f"<={bound}": count for bound, count in zip(self.BUCKETS, self.counts)},
+        }
+
+# Rolling timings of named code paths.  Each name keeps only its last window durations, so
+# the percentiles follow what the code does now rather than everything since startup.
+# Safe to record into from any thread.
+class SpanTimings:
+    def __init__(self, window=500):
+        self.window = window
+        self.lock = threading.Lock()
+        self.durations = {}
+        self.counts = {}
+
+    def record(self, name, seconds):
+        with self.lock:
+            durations = self.durations.get(name)
+            if durations is None:
+                durations = self.durations[name] = deque(maxlen=self.window)
+                self.counts[name] = 0
+            durations.append(seconds)
+            self.counts[name] += 1
+
+    @contextmanager
+    def span(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    # Same keys as LatencyHistogram.summary(), over the current window.
+    def summary(self):
+        with self.lock:
+            windows = [(name, sorted(durations), self.counts[name]) for name, durations in sorted(self.durations.items())]
+        summary = {}
+        for name, durations, count in windows:
+            summary[name] = {
+                'count': count,
+                'mean_ms': sum(durations) / len(durations) * 1000,
+                'p50_ms': durations[min(len(durations) - 1, int(0.5 * len(durations)))] * 1000,
+                'p95_ms': durations[min(len(durations) - 1, int(0.95 * len(durations)))] * 1000,
+                'max_ms': durations[-1] * 1000,
+            }
+        return summary
+
+# Runs the external tools every tab depends on (pkg, zfs, zpool, beadm, pciconf, dmesg) on
+# a bounded worker pool, each with a timeout.  Identical invocations that overlap share one
+# process, read-only results can be kept for a TTL, and a mutating command drops
+# the cached results of the tools it names in invalidates.  bin_dir, or the
+# SYSTEM_VIEWER_BIN_DIR environment variable, points at a directory of stand-in binaries
+# that take precedence over the real ones.
+class CommandExecutor:
+    DEFAULT_TIMEOUT = 60
+    COMMAND_TIMEOUTS = {'dmesg': 10, 'pciconf': 10, 'zpool': 30, 'zfs': 120, 'beadm': 120, 'pkg': 600}
+
+    def __init__(self, max_workers=4, bin_dir=None):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="command")
+        self.bin_dir = bin_dir or os.environ.get('SYSTEM_VIEWER_BIN_DIR')
+        self.env = None
+        if self.bin_dir:
+            self.env = dict(os.environ, PATH=self.bin_dir + os.pathsep + os.environ.get('PATH', ''))
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.cache = {}
+        self.generations = {}
+        self.histograms = {}
+
+    # Blocking call, meant for worker threads.  Returns a subprocess.CompletedProcess and
+    # raises CalledProcessError on a non-zero exit status when check is set.
+    def run(self, args, timeout=None, ttl=None, invalidates=(), check=True, input=None):
+        return self.submit(args, timeout, ttl, invalidates, check, input).result()
+
+    def submit(self, args, timeout=None, ttl=None, invalidates=(), check=True, input=None):
+        args = [str(arg) for arg in args]
+        key = (tuple(args), input, check)
+        tool = args[0]
+        with self.lock:
+            if not invalidates:
+                cached = self.cache.get(key)
+                if cached is not None and cached[0] > time.monotonic():
+                    future = Future()
+                    future.set_result(cached[2])
+                    return future
+                future = self.in_flight.get(key)
+                if future is not None:
+                    return future
+            generation = self.generations.get(tool, 0)
+            future = self.pool.submit(self.execute, args, key, generation, timeout, ttl, invalidates, check, input)
+            if not invalidates:
+                self.in_flight[key] = future
+        return future
+
+    def execute(self, args, key, generation, timeout, ttl, invalidates, check, input):
+        tool = args[0]
+        if timeout is None:
+            timeout = self.COMMAND_TIMEOUTS.get(tool, self.DEFAULT_TIMEOUT)
+        started = time.perf_counter()
+        try:
+            result = subprocess.run(self.resolve(args), input=input, capture_output=True, text=True,
+                                    timeout=timeout, env=self.env)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.histograms.setdefault(self.command_name(args), LatencyHistogram()).record(elapsed)
+                self.in_flight.pop(key, None)
+            if invalidates:
+                self.invalidate(*invalidates)
+
+        if check and result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, args, result.stdout, result.stderr)
+        if ttl:
+            with self.lock:
+                # Skip caching if a mutating command finished while this one was running.
+                if self.generations.get(tool, 0) == generation:
+                    self.cache[key] = (time.monotonic() + ttl, tool, result)
+        return result
+
+    def invalidate(self, *tools):
+        with self.lock:
+            for tool in tools:
+                self.generations[tool] = self.generations.get(tool, 0) + 1
+            self.cache = {key: entry for key, entry in self.cache.items() if entry[1] not in tools}
+
+    def resolve(self, args):
+        if self.bin_dir:
+            candidate = os.path.join(self.bin_dir, args[0])
+            if os.access(candidate, os.X_OK):
+                return [candidate] + args[1:]
+        return args
+
+    # "zfs list", "pkg delete", "dmesg": the tool plus its subcommand, if it has one.
+    def command_name(self, args):
+        if len(args) > 1 and not args[1].startswith('-'):
+            return f"{args[0]} {args[1]}"
+        return args[0]
+
+    # Yields the output of a command line by line while it runs, for listings too big to
+    # hold in memory twice.  Not cached or coalesced, and it runs on the caller's thread.
+    def stream(self, args, timeout=None):
+        args = [str(arg) for arg in args]
+        if timeout is None:
+            timeout = self.COMMAND_TIMEOUTS.get(args[0], self.DEFAULT_TIMEOUT)
+        started = time.perf_counter()
+        process = subprocess.Popen(self.resolve(args), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, env=self.env)
+        timer = threading.Timer(timeout, process.kill)
+        timer.daemon = True
+        timer.start()
+        try:
+            for line in process.stdout:
+                yield line.rstrip('\n')
+            stderr = process.stderr.read()
+            returncode = process.wait()
+        finally:
+            timer.cancel()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            process.stderr.close()
+            with self.lock:
+                self.histograms.setdefault(self.command_name(args), LatencyHistogram()).record(time.perf_counter() - started)
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, args, None, stderr)
+
+    def stats(self):
+        with self.lock:
+            return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+# Gathers the facts shown on the System tab.  The probes run concurrently on a worker pool,
+# each with its own timeout.  Facts that cannot change until the next reboot are cached on
+# disk keyed by the kernel boot time, so after the first start only the cheap dynamic probes
+# run, and a reboot invalidates the cache automatically.
+class HardwareProbes:
+    CACHE_FILE = os.path.join(CACHE_DIR, 'hardware.json')
+
+    def __init__(self, executor):
+        self.executor = executor
+        # (name, label used when the probe fails, function, static, timeout in seconds), in display order.
+        self.probes = [
+            ('os', 'Operating System', self.probe_os, True, 2),
+            ('cpu', 'CPU Name', self.probe_cpu, True, 5),
+            ('cpu_speed', 'CPU Speed', self.probe_cpu_speed, False, 2),
+            ('gpu', 'GPU Information', self.probe_gpu, True, 5),
+            ('memory', 'Available RAM', self.probe_memory, False, 2),
+            ('storage', 'Hard Drive Name', self.probe_storage, False, 2),
+            ('addresses', 'Network Addresses', self.probe_addresses, False, 3),
+        ]
+        self.pool = ThreadPoolExecutor(max_workers=len(self.probes), thread_name_prefix="probe")
+        self.boot_time = psutil.boot_time()
+        self.static_facts = self.load_cache()
+        self.dynamic_facts = {}
+
+    def collect(self):
+        probes = [probe for probe in self.probes if not probe[3] or probe[0] not in self.static_facts]
+        results = self.run_probes(probes)
+        cache_changed = False
+        for name, label, probe, static, timeout in probes:
+            if static:
+                if results[name] is not None:
+                    self.static_facts[name] = results[name]
+                    cache_changed = True
+            else:
+                self.dynamic_facts[name] = results[name]
+        if cache_changed:
+            self.save_cache()
+        return self.rows()
+
+    def refresh_dynamic(self):
+        probes = [probe for probe in self.probes if not probe[3]]
+        self.dynamic_facts.update(self.run_probes(probes))
+        return self.rows()
+
+    def rows(self):
+        rows = []
+        for name, label, probe, static, timeout in self.probes:
+            facts = self.static_facts if static else self.dynamic_facts
+            rows.extend(facts.get(name) or [(label, 'Not available')])
+        return rows
+
+    # All probes start together, so each one waits at most its own timeout from the start.
+    def run_probes(self, probes):
+        started = time.monotonic()
+        futures = [(name, self.pool.submit(probe, timeout), timeout) for name, label, probe, static, timeout in probes]
+        results = {}
+        for name, future, timeout in futures:
+            try:
+                results[name] = future.result(timeout=max(0, timeout - (time.monotonic() - started)))
+            except FutureTimeoutError:
+                print(f"Hardware probe '{name}' timed out after {timeout} s", file=sys.stderr)
+                results[name] = None
+            except Exception as e:
+                print(f"Error running hardware probe '{name}': {e}", file=sys.stderr)
+                results[name] = None
+        return results
+
+    def load_cache(self):
+        try:
+            with open(self.CACHE_FILE, 'r') as file:
+                cache = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        # A truncated or hand-edited file is as good as stale.
+        if not isinstance(cache, dict) or not isinstance(cache.get('facts', {}), dict):
+            return {}
+        try:
+            # boot_time() is derived from the uptime and can drift by a fraction of a second.
+            if abs(cache.get('boot_time', 0) - self.boot_time) > 1:
+                return {}
+            return {name: [tuple(row) for row in rows] for name, rows in cache.get('facts', {}).items()}
+        except TypeError:
+            return {}
+
+    def save_cache(self):
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(self.CACHE_FILE, 'w') as file:
+                json.dump({'boot_time': self.boot_time, 'facts': self.static_facts}, file, indent=2)
+        except OSError as e:
+            print(f"Error saving hardware cache: {e}", file=sys.stderr)
+
+    def probe_os(self, timeout):
+        return [('Operating System', platform.system()), ('OS Version', platform.version())]
+
+    def probe_cpu(self, timeout):
+        import cpuinfo
+
+        return [('CPU Name', cpuinfo.get_cpu_info()['brand_raw']),
+                ('CPU Core Count', psutil.cpu_count(logical=False))]
+
+    def probe_cpu_speed(self, timeout):
+        return [('CPU Speed', f"{psutil.cpu_freq().current} MHz")]
+
+    # Returns None when pciconf failed, so the failure is not cached until the next reboot.
+    def probe_gpu(self, timeout):
+        gpu_info = self.get_freebsd_gpu_info(timeout)
+        if gpu_info is None:
+            return None
+        gpu_name, gpu_driver, vram = gpu_info
+        if gpu_name is not None:
+            return [('GPU Name', gpu_name), ('GPU Driver', gpu_driver), ('VRAM', vram)]
+        return [('GPU Information', 'Not available')]
+
+    def probe_memory(self, timeout):
+        mem = psutil.virtual_memory()
+        return [('Available RAM', f"{mem.available / (1024 ** 3):.2f} GB")]
+
+    def probe_storage(self, timeout):
+        root_partition = psutil.disk_usage('/')
+        return [('Hard Drive Name', '/'), ('Total Space', f"{root_partition.total / (1024 ** 3):.2f} GB"),
+                ('Used Space', f"{root_partition.used / (1024 ** 3):.2f} GB"),
+                ('Free Space', f"{(root_partition.total - root_partition.used) / (1024 ** 3):.2f} GB")]
+
+    # Every address of every interface, whatever its driver, except the loopback ones.
+    def probe_addresses(self, timeout):
+        addresses = []
+        for iface, entries in sorted(psutil.net_if_addrs().items()):
+            for entry in entries:
+                if entry.family not in (socket.AF_INET, socket.AF_INET6):
+                    continue
+                address = entry.address.split('%')[0]
+                if not ipaddress.ip_address(address).is_loopback:
+                    addresses.append((iface, address))
+        return addresses
+
+    def get_freebsd_gpu_info(self, timeout=None):
+        try:
+            # Run pciconf to get PCI device information
+            result = self.executor.run(['pciconf', '-lv'], timeout=timeout)
+
+            # Search for the GPU information in the output
+            gpu_name, gpu_driver, vram = None, None, None
+            for line in result.stdout.split('\n'):
+                if 'vgapci' in line.lower():
+                    # Extract GPU information (you might need to adjust this based on your output format)
+                    match = re.search(r'Device: (.+?),', line)
+                    gpu_name = match.group(1).strip() if match else None
+
+                    match = re.search(r'driver: (.+)', line)
+                    gpu_driver = match.group(1).strip() if match else None
+
+                    match = re.search(r'Memory: (.+)', line)
+                    vram = match.group(1).strip() if match else None
+
+                    break
+
+            return gpu_name, gpu_driver, vram
+
+        except subprocess.CalledProcessError as e:
+            print(f"Error running pciconf command: {e}", file=sys.stderr)
+            return None
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return None
+
+# A log file viewed a page at a time.  The file is memory-mapped instead of read, an index
+# of line start offsets is built in the background, and searches run over the mapping in
+# line-aligned chunks, so neither the memory use nor the UI depends on the size of the log.
+class LogFile:
+    INDEX_BATCH = 65536
+    SEARCH_CHUNK_LINES = 20000
+
+    def __init__(self, path=None, data=None):
+        self.path = path
+        if data is None:
+            with open(path, 'rb') as file:
+                size = os.fstat(file.fileno()).st_size
+                # An empty file cannot be mapped.
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.data = data
+        self.size = len(data)
+        self.offsets = array('Q', [0])
+        self.indexed = threading.Event()
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+        self.users = 0
+        self.closed = False
+
+    @classmethod
+    def from_bytes(cls, data, name):
+        return cls(path=name, data=data)
+
+    # Extend the index from where it stopped, until it covers max_lines lines or the end of the file.
+    def build_index(self, max_lines=None):
+        if not self.acquire():
+            return self.line_count()
+        try:
+            data = self.data
+            offsets = self.offsets
+            pos = offsets[-1]
+            while not self.cancelled.is_set():
+                batch = self.INDEX_BATCH if max_lines is None else min(self.INDEX_BATCH, max_lines + 1 - len(offsets))
+                if batch <= 0:
+                    break
+                for _ in range(batch):
+                    newline = data.find(b'\n', pos)
+                    if newline == -1:
+                        if pos < self.size:
+                            offsets.append(self.size)
+                        self.indexed.set()
+                        return self.line_count()
+                    pos = newline + 1
+                    offsets.append(pos)
+            return self.line_count()
+        finally:
+            self.release()
+
+    def line_count(self):
+        return len(self.offsets) - 1
+
+    def read_lines(self, start, count):
+        end = min(start + count, self.line_count())
+        if start >= end:
+            return ""
+        return self.data[self.offsets[start]:self.offsets[end]].decode('utf-8', 'replace')
+
+    # Returns the numbers of the lines that match, or None when the search was cancelled.
+    def search(self, pattern, use_regex=False, ignore_case=True, cancelled=None, max_matches=10000):
+        if not use_regex:
+            pattern = re.escape(pattern)
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        compiled = re.compile(pattern.encode('utf-8'), flags)
+        if not self.acquire():
+            return None
+        try:
+            return self.search_lines(compiled, cancelled or self.cancelled, max_matches)
+        finally:
+            self.release()
+
+    def search_lines(self, compiled, cancelled, max_matches):
+        while not self.indexed.wait(0.1):
+            if cancelled.is_set() or self.cancelled.is_set():
+                return None
+
+        offsets = self.offsets
+        matches = []
+        line_count = self.line_count()
+        for start_line in range(0, line_count, self.SEARCH_CHUNK_LINES):
+            if cancelled.is_set():
+                return None
+            end_line = min(start_line + self.SEARCH_CHUNK_LINES, line_count)
+            for match in compiled.finditer(self.data, offsets[start_line], offsets[end_line]):
+                line = bisect.bisect_right(offsets, match.start()) - 1
+                if not matches or matches[-1] != line:
+                    matches.append(line)
+                    if len(matches) >= max_matches:
+                        return matches
+        return matches
+
+    # Index and search threads hold on to the mapping while they run; once the log is closed
+    # the last of them to finish unmaps it.
+    def acquire(self):
+        with self.lock:
+            if self.closed:
+                return False
+            self.users += 1
+            return True
+
+    def release(self):
+        with self.lock:
+            self.users -= 1
+            if self.closed and self.users == 0:
+                self.unmap()
+
+    def close(self):
+        self.cancelled.set()
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            if self.users == 0:
+                self.unmap()
+
+    # The file itself was closed right after mapping it; the mapping holds the only reference.
+    def unmap(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+# Follows a growing log file from the offset it last read up to, so each poll only reads the
+# bytes appended since.  Rotation (a new inode at the path) and truncation are detected, and
+# only the last max_lines lines are kept.
+class LogFollower:
+    SEED_BYTES = 256 * 1024
+    READ_LIMIT = 4 * 1024 * 1024
+
+    def __init__(self, path, max_lines=5000):
+        self.path = path
+        self.lines = deque(maxlen=max_lines)
+        self.file = None
+        self.partial = b''
+
+    def poll(self):
+        if self.file is None:
+            new_lines = self.seed()
+        else:
+            new_lines = self.read_new()
+        # Lines that would drop straight out of the ring are not worth returning either.
+        new_lines = new_lines[-self.lines.maxlen:]
+        self.lines.extend(new_lines)
+        return new_lines
+
+    # Start with the tail of the file rather than all of it.
+    def seed(self):
+        self.file = open(self.path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        start = max(0, size - self.SEED_BYTES)
+        self.file.seek(start)
+        data = self.file.read(size - start)
+        if start:
+            # Drop the line the seek landed in the middle of.
+            data = data.split(b'\n', 1)[1] if b'\n' in data else b''
+        return self.split(data)
+
+    def read_new(self):
+        new_lines = []
+        try:
+            path_stat = os.stat(self.path)
+        except FileNotFoundError:
+            path_stat = None
+        file_stat = os.fstat(self.file.fileno())
+
+        if path_stat is None or (path_stat.st_ino, path_stat.st_dev) != (file_stat.st_ino, file_stat.st_dev):
+            # Rotated: finish what was written to the old file before switching to the new one.
+            data = self.file.read(self.READ_LIMIT)
+            new_lines.extend(self.split(data))
+            # A big remainder is read over several polls; the new file comes after it.
+            if path_stat is None or len(data) == self.READ_LIMIT:
+                return new_lines
+            if self.partial:
+                new_lines.append(self.partial.decode('utf-8', 'replace'))
+                self.partial = b''
+            self.file.close()
+            self.file = open(self.path, 'rb')
+            new_lines.append(f"--- {self.path} rotated ---")
+        elif path_stat.st_size < self.file.tell():
+            self.file.seek(0)
+            self.partial = b''
+            new_lines.append(f"--- {self.path} truncated ---")
+
+        new_lines.extend(self.split(self.file.read(self.READ_LIMIT)))
+        return new_lines
+
+    def split(self, data):
+        parts = (self.partial + data).split(b'\n')
+        self.partial = parts.pop()
+        return [part.decode('utf-8', 'replace') for part in parts]
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+# Follows the kernel message buffer.  dmesg always prints the whole buffer, so the last few
+# lines seen are remembered and only the lines after them are reported on the next poll.
+class DmesgFollower:
+    ANCHOR_LINES = 3
+
+    def __init__(self, executor, max_lines=5000):
+        self.executor = executor
+        self.path = 'dmesg'
+        self.lines = deque(maxlen=max_lines)
+        self.anchor = ()
+
+    def poll(self):
+        output = self.executor.run(['dmesg']).stdout.splitlines()
+        new_lines = output[self.find_new_lines(output):][-self.lines.maxlen:]
+        if output:
+            self.anchor = tuple(output[-self.ANCHOR_LINES:])
+        self.lines.extend(new_lines)
+        return new_lines
+
+    # Index of the first line after the newest occurrence of the anchor.  When the anchor has
+    # been overwritten in the ring buffer, everything is new.
+    def find_new_lines(self, output):
+        size = len(self.anchor)
+        if not size:
+            return 0
+        for end in range(len(output), size - 1, -1):
+            if tuple(output[end - size:end]) == self.anchor:
+                return end
+        return 0
+
+    def close(self):
+        pass
+
+# Runs one shell command without blocking the caller.  stdout and stderr are read on their own
+# threads and passed to on_output(stream, text) as they arrive, and on_exit(status, returncode)
+# is called once the command has finished, was cancelled or ran out of time.
+class CommandRun:
+    KILL_GRACE = 3
+
+    def __init__(self, command, on_output, on_exit, timeout=None, on_start=None):
+        self.command = command
+        self.on_output = on_output
+        self.on_exit = on_exit
+        self.on_start = on_start
+        self.timeout = timeout
+        self.process = None
+        self.status = 'queued'
+        self.cancelled = threading.Event()
+        self.timed_out = False
+        # Seconds from starting the process to its exit, None until then or if it never started.
+        self.started = None
+        self.elapsed = None
+
+    def execute(self):
+        if self.cancelled.is_set():
+            self.finish('cancelled', None)
+            return
+        try:
+            # A session of its own lets cancel() signal everything the shell started.  An
+            # argument list is run directly, without a shell.
+            self.process = subprocess.Popen(self.command, shell=isinstance(self.command, str), stdin=subprocess.DEVNULL,
+                                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True)
+        except OSError as e:
+            self.on_output('stderr', f"Error: {e}\n")
+            self.finish('failed', None)
+            return
+        self.started = time.perf_counter()
+        self.status = 'running'
+        if self.on_start is not None:
+            self.on_start()
+        if self.cancelled.is_set():
+            self.terminate()
+
+        readers = [threading.Thread(target=self.read_stream, args=(name, stream), daemon=True)
+                   for name, stream in (('stdout', self.process.stdout), ('stderr', self.process.stderr))]
+        for reader in readers:
+            reader.start()
+        try:
+            returncode = self.process.wait(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            self.timed_out = True
+            self.terminate()
+            returncode = self.process.wait()
+        # A daemon started by the command can keep the pipes open, so do not wait on it forever.
+        for reader in readers:
+            reader.join(timeout=2)
+
+        if self.timed_out:
+            self.finish('timed out', returncode)
+        elif self.cancelled.is_set():
+            self.finish('cancelled', returncode)
+        else:
+            self.finish('ok' if returncode == 0 else 'failed', returncode)
+
+    def finish(self, status, returncode):
+        self.status = status
+        if self.started is not None:
+            self.elapsed = time.perf_counter() - self.started
+        self.on_exit(status, returncode)
+
+    def read_stream(self, name, stream):
+        decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        while True:
+            chunk = stream.read1(4096)
+            if not chunk:
+                break
+            self.on_output(name, decoder.decode(chunk))
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            self.on_output(name, tail)
+        stream.close()
+
+    def cancel(self):
+        self.cancelled.set()
+        if self.process is not None and self.process.poll() is None:
+            self.terminate()
+
+    # SIGTERM the process group, and SIGKILL it if it is still around after the grace period.
+    def terminate(self):
+        try:
+            os.killpg(self.process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        timer = threading.Timer(self.KILL_GRACE, self.kill)
+        timer.daemon = True
+        timer.start()
+
+    def kill(self):
+        if self.process.poll() is None:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+# Executes CommandRuns on background threads, at most limit of them at a time.  The limit can
+# be changed while runs are waiting for a slot.
+class CommandRunner:
+    def __init__(self, limit=2):
+        self.limit = limit
+        self.active = 0
+        self.condition = threading.Condition()
+
+    def set_limit(self, limit):
+        with self.condition:
+            self.limit = max(1, limit)
+            self.condition.notify_all()
+
+    def submit(self, run):
+        threading.Thread(target=self.execute, args=(run,), name="CommandRun", daemon=True).start()
+
+    def execute(self, run):
+        with self.condition:
+            # A run cancelled while it waits still passes through execute() to report it.
+            while self.active >= self.limit and not run.cancelled.is_set():
+                self.condition.wait()
+            self.active += 1
+        try:
+            run.execute()
+        finally:
+            with self.condition:
+                self.active -= 1
+                self.condition.notify_all()
+
+# Fixed-capacity ring of floats backed by an array, so a day of samples costs 8 bytes per
+# value and no Python objects.  total counts every value ever appended, which lets readers
+# ask for just the values added since they last looked.
+class RingBuffer:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.values = array('d', bytes(8 * capacity))
+        self.end = 0
+        self.total = 0
+
+    def append(self, value):
+        self.values[self.end] = value
+        self.end = (self.end + 1) % self.capacity
+        self.total += 1
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    # The newest count values, oldest first.
+    def last(self, count):
+        count = min(count, len(self))
+        if count <= 0:
+            return []
+        start = (self.end - count) % self.capacity
+        if start < self.end:
+            return self.values[start:self.end].tolist()
+        return self.values[start:].tolist() + self.values[:self.end].tolist()
+
+    def since(self, total):
+        return self.last(self.total - total)
+
+# History of system metrics, one RingBuffer per series plus one for the timestamps.  The
+# memory used is fixed up front: with the default of 24 hours at one sample per second it is
+# 86400 * 8 bytes (675 KiB) per series.
+class MetricsHistory:
+    def __init__(self, names, capacity):
+        self.names = list(names)
+        self.capacity = capacity
+        self.timestamps = RingBuffer(capacity)
+        self.series = {name: RingBuffer(capacity) for name in self.names}
+
+    @classmethod
+    def for_duration(cls, names, seconds=24 * 3600, interval=1.0):
+        return cls(names, int(seconds / interval))
+
+    def append(self, timestamp, values):
+        for name, ring in self.series.items():
+            ring.append(values.get(name, 0.0))
+        self.timestamps.append(timestamp)
+
+    @property
+    def total(self):
+        return self.timestamps.total
+
+    def memory_bytes(self):
+        return (len(self.series) + 1) * self.capacity * 8
+
+# Takes one sample of CPU per core, memory, swap, root disk usage and the disk and network
+# throughput.  CPU usage and the rates are computed from the counter deltas since the
+# previous sample, so this does not disturb psutil's own cpu_percent() state.
+class MetricsSampler:
+    def __init__(self):
+        self.core_count = psutil.cpu_count(logical=True) or 1
+        self.names = (['cpu'] + [f'cpu{core}' for core in range(self.core_count)] +
+                      ['memory', 'swap', 'disk_used', 'disk_read', 'disk_write', 'net_recv', 'net_sent'])
+        self.previous = None
+
+    def sample(self):
+        now = time.time()
+        cpu_times = psutil.cpu_times(percpu=True)
+        disk = psutil.disk_io_counters()
+        net = psutil.net_io_counters()
+
+        values = {
+            'memory': psutil.virtual_memory().percent,
+            'swap': psutil.swap_memory().percent,
+            'disk_used': psutil.disk_usage('/').percent,
+        }
+        if self.previous is not None:
+            previous_time, previous_cpu_times, previous_disk, previous_net = self.previous
+            elapsed = max(now - previous_time, 1e-6)
+            per_core = [self.busy_percent(before, after) for before, after in zip(previous_cpu_times, cpu_times)]
+            for core, percent in enumerate(per_core):
+                values[f'cpu{core}'] = percent
+            values['cpu'] = sum(per_core) / len(per_core) if per_core else 0.0
+            if disk is not None and previous_disk is not None:
+                values['disk_read'] = max(0, disk.read_bytes - previous_disk.read_bytes) / elapsed
+                values['disk_write'] = max(0, disk.write_bytes - previous_disk.write_bytes) / elapsed
+            if net is not None and previous_net is not None:
+                values['net_recv'] = max(0, net.bytes_recv - previous_net.bytes_recv) / elapsed
+                values['net_sent'] = max(0, net.bytes_sent - previous_net.bytes_sent) / elapsed
+        self.previous = (now, cpu_times, disk, net)
+        return now, values
+
+    def busy_percent(self, before, after):
+        total = sum(after) - sum(before)
+        if total <= 0:
+            return 0.0
+        idle = after.idle - before.idle
+        return max(0.0, min(100.0, 100.0 * (total - idle) / total))
+
+# Reads the ZFS ARC hit and miss counters, from the kstat file of OpenZFS on Linux or the
+# kstat.zfs.misc.arcstats sysctls on FreeBSD.  read() returns None where neither is there,
+# e.g. when the zfs module is not loaded.
+class ArcStats:
+    SYSCTLS = ('kstat.zfs.misc.arcstats.hits', 'kstat.zfs.misc.arcstats.misses')
+
+    def __init__(self, path=ARCSTATS_FILE):
+        self.path = path
+        self.sysctlbyname = None
+        if sys.platform.startswith('freebsd'):
+            try:
+                self.sysctlbyname = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True).sysctlbyname
+            except (OSError, AttributeError) as e:
+                print(f"Error loading sysctlbyname: {e}", file=sys.stderr)
+
+    def read(self):
+        if self.sysctlbyname is not None:
+            try:
+                return tuple(self.read_sysctl(name) for name in self.SYSCTLS)
+            except OSError:
+                return None
+        counters = {}
+        try:
+            with open(self.path) as file:
+                for line in file:
+                    fields = line.split()
+                    if len(fields) == 3 and fields[0] in ('hits', 'misses'):
+                        counters[fields[0]] = int(fields[2])
+        except (OSError, ValueError):
+            return None
+        if len(counters) != 2:
+            return None
+        return counters['hits'], counters['misses']
+
+    def read_sysctl(self, name):
+        value = ctypes.c_uint64()
+        size = ctypes.c_size_t(ctypes.sizeof(value))
+        if self.sysctlbyname(name.encode(), ctypes.byref(value), ctypes.byref(size), None, 0) != 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), name)
+        return value.value
+
+# Per-interface and per-disk rates for the System tab.  Every tick reads the psutil counters
+# once, in one batch, and each rate is the difference to the previous tick over the time in
+# between, so the first sample has no rates (None) yet.
+#   interfaces: (name, addresses, bytes in/s, bytes out/s, packets in/s, packets out/s, errors and drops/s)
+#   disks:      (name, mount points, reads/s, writes/s, bytes read/s, bytes written/s, busy %)
+#   arc:        (hit %, hits/s, misses/s), or None without an ARC
+class IoRateSampler:
+    def __init__(self, arc_stats=None):
+        self.arc_stats = arc_stats or ArcStats()
+        self.previous = None
+
+    def sample(self):
+        now = time.monotonic()
+        addresses = psutil.net_if_addrs()
+        nics = psutil.net_io_counters(pernic=True) or {}
+        disks = psutil.disk_io_counters(perdisk=True) or {}
+        partitions = psutil.disk_partitions()
+        arc = self.arc_stats.read()
+
+        if self.previous is None:
+            elapsed, previous_nics, previous_disks, previous_arc = None, {}, {}, None
+        else:
+            previous_time, previous_nics, previous_disks, previous_arc = self.previous
+            elapsed = max(now - previous_time, 1e-6)
+        self.previous = (now, nics, disks, arc)
+
+        def rate(after, before):
+            return max(0, after - before) / elapsed
+
+        interfaces = []
+        for name in sorted(set(addresses) | set(nics)):
+            inet = [entry.address for entry in addresses.get(name, ()) if entry.family == socket.AF_INET]
+            counters, before = nics.get(name), previous_nics.get(name)
+            if counters is None or before is None:
+                interfaces.append((name, ', '.join(inet), None, None, None, None, None))
+                continue
+            errors = counters.errin + counters.errout + counters.dropin + counters.dropout
+            previous_errors = before.errin + before.errout + before.dropin + before.dropout
+            interfaces.append((name, ', '.join(inet),
+                               rate(counters.bytes_recv, before.bytes_recv), rate(counters.bytes_sent, before.bytes_sent),
+                               rate(counters.packets_recv, before.packets_recv),
+                               rate(counters.packets_sent, before.packets_sent), rate(errors, previous_errors)))
+
+        mounts = self.disk_mount_points(disks, partitions)
+        disk_rows = []
+        for name in sorted(disks):
+            counters, before = disks[name], previous_disks.get(name)
+            mount_points = ', '.join(mounts.get(name, ()))
+            if before is None:
+                disk_rows.append((name, mount_points, None, None, None, None, None))
+                continue
+            busy = None
+            if hasattr(counters, 'busy_time'):
+                busy = min(100.0, rate(counters.busy_time, before.busy_time) / 10)
+            disk_rows.append((name, mount_points,
+                              rate(counters.read_count, before.read_count), rate(counters.write_count, before.write_count),
+                              rate(counters.read_bytes, before.read_bytes), rate(counters.write_bytes, before.write_bytes),
+                              busy))
+
+        arc_row = None
+        if arc is not None and previous_arc is not None:
+            hits, misses = rate(arc[0], previous_arc[0]), rate(arc[1], previous_arc[1])
+            arc_row = (100.0 * hits / (hits + misses) if hits + misses else None, hits, misses)
+        return {'interfaces': interfaces, 'disks': disk_rows, 'arc': arc_row}
+
+    # Maps the disks to the mount points of their partitions: the disk name followed by an
+    # optional p or s and a number, so /dev/ada0p2 and /dev/da0s1a belong to ada0 and da0,
+    # and on Linux /dev/sda1 and /dev/nvme0n1p1 to sda and nvme0n1.  ZFS datasets are mounted
+    # from pools, not devices, and stay unmapped.
+    def disk_mount_points(self, disks, partitions):
+        names = sorted(disks, key=len, reverse=True)
+        mounts = {}
+        for partition in partitions:
+            device = os.path.basename(partition.device)
+            for name in names:
+                if device == name or (device.startswith(name) and re.match(r'[ps]?\d', device[len(name):])):
+                    mounts.setdefault(name, []).append(partition.mountpoint)
+                    break
+        return mounts
+
+# Name of the metrics file for the day of the given date, DDMMYYYY.csv.
+def metrics_file_name(date):
+    return date.strftime('%d%m%Y') + ".csv"
+
+# The count processes using the most CPU from a ProcessSnapshot, as row tuples.
+def top_processes(snapshot, count):
+    return [snapshot.row(position) for position in snapshot.top(count)]
+
+# Appends the system metrics and the busiest processes to one CSV file per day in
+# METRICS_DIR.  record() only queues the row; a background thread writes the queue out in
+# batches, gzips the files of finished days and removes the days past the retention limit,
+# so the caller never waits on the disk.
+class MetricsRecorder:
+    def __init__(self, names, directory=METRICS_DIR, top_count=5, batch_size=30, flush_interval=60,
+                 retention_days=30):
+        self.names = list(names)
+        self.directory = directory
+        self.top_count = top_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.fieldnames = ['timestamp'] + self.names
+        for rank in range(1, top_count + 1):
+            self.fieldnames += [f'top{rank}_name', f'top{rank}_pid', f'top{rank}_cpu', f'top{rank}_memory']
+        self.pending = []
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = False
+        self.thread = None
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.thread = threading.Thread(target=self.run, name='metrics-recorder', daemon=True)
+        self.thread.start()
+
+    def record(self, timestamp, values, processes=()):
+        row = [datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')]
+        row += [f"{values.get(name, 0.0):.2f}" for name in self.names]
+        for rank in range(self.top_count):
+            if rank < len(processes):
+                name, pid, cpu, memory = processes[rank][:4]
+                row += [name, pid, f"{cpu:.1f}", f"{memory:.1f}"]
+            else:
+                row += ['', '', '', '']
+        with self.lock:
+            self.pending.append((timestamp, row))
+            full = len(self.pending) >= self.batch_size
+        if full:
+            self.wakeup.set()
+
+    def run(self):
+        while not self.stopped:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+            self.compress_finished_days()
+            self.remove_expired_days()
+
+    def flush(self):
+        with self.lock:
+            rows, self.pending = self.pending, []
+        by_file = {}
+        for timestamp, row in rows:
+            by_file.setdefault(metrics_file_name(datetime.fromtimestamp(timestamp)), []).append(row)
+        for file_name, day_rows in by_file.items():
+            path = os.path.join(self.directory, file_name)
+            try:
+                new_file = not os.path.exists(path)
+                with open(path, 'a', newline='') as file:
+                    writer = csv.writer(file)
+                    if new_file:
+                        writer.writerow(self.fieldnames)
+                    writer.writerows(day_rows)
+            except OSError as e:
+                print(f"Error writing metrics to {path}: {e}", file=sys.stderr)
+
+    # Every plain CSV file that is not today's is finished.
+    def compress_finished_days(self):
+        today = metrics_file_name(datetime.now())
+        for file_name, date in recorded_days(self.directory):
+            if not file_name.endswith('.csv') or file_name == today:
+                continue
+            path = os.path.join(self.directory, file_name)
+            archive = path + '.gz'
+            temporary = archive + '.tmp'
+            try:
+                with open(path, 'rb') as source, open(temporary, 'wb') as target:
+                    # A day that was recorded into again after it had been archived goes in as
+                    # a further gzip member; its repeated header row is skipped on loading.
+                    if os.path.exists(archive):
+                        with open(archive, 'rb') as existing:
+                            shutil.copyfileobj(existing, target)
+                    with gzip.GzipFile(fileobj=target, mode='wb') as compressed:
+                        shutil.copyfileobj(source, compressed)
+                os.replace(temporary, archive)
+                os.unlink(path)
+            except OSError as e:
+                print(f"Error compressing {path}: {e}", file=sys.stderr)
+                if os.path.exists(temporary):
+                    os.unlink(temporary)
+
+    def remove_expired_days(self):
+        oldest = datetime.now() - timedelta(days=self.retention_days)
+        for file_name, date in recorded_days(self.directory):
+            if date.date() < oldest.date():
+                try:
+                    os.unlink(os.path.join(self.directory, file_name))
+                except OSError as e:
+                    print(f"Error removing {file_name}: {e}", file=sys.stderr)
+
+    # Writes out whatever is still queued.
+    def close(self):
+        self.stopped = True
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+        self.flush()
+
+# The metrics files in the directory as (file name, date), oldest first.
+def recorded_days(directory=METRICS_DIR):
+    days = []
+    try:
+        file_names = os.listdir(directory)
+    except OSError:
+        return days
+    for file_name in file_names:
+        match = re.fullmatch(r'(\d{8})\.csv(\.gz)?', file_name)
+        if not match:
+            continue
+        try:
+            days.append((file_name, datetime.strptime(match.group(1), '%d%m%Y')))
+        except ValueError:
+            continue
+    days.sort(key=lambda day: (day[1], day[0]))
+    return days
+
+# Reads a recorded day back into a MetricsHistory holding exactly that day's samples.
+# Series that were not recorded (a machine with fewer cores) are left out.
+def load_metrics_day(date, directory=METRICS_DIR):
+    path = os.path.join(directory, metrics_file_name(date))
+    # Until compression has removed it, the plain file holds the rows recorded after those
+    # in the archive, so both are read.  The header row of the second one is skipped below.
+    rows = []
+    for file_name in [name for name in (path + '.gz', path) if os.path.exists(name)] or [path]:
+        opener = gzip.open if file_name.endswith('.gz') else open
+        with opener(file_name, 'rt', newline='') as file:
+            rows.extend(csv.reader(file))
+    header = rows.pop(0) if rows else None
+    if not header or header[0] != 'timestamp':
+        raise ValueError(f"{path} is not a metrics file")
+    names = [name for name in header[1:] if not re.match(r'top\d+_', name)]
+    history = MetricsHistory(names, max(1, len(rows)))
+    for row in rows:
+        try:
+            timestamp = datetime.strptime(row[0], '%Y-%m-%d %H:%M:%S').timestamp()
+            values = {name: float(value) for name, value in zip(names, row[1:len(names) + 1])}
+        except (ValueError, IndexError):
+            continue
+        history.append(timestamp, values)
+    return history
+
+# The installed packages as (name, version, flat size in bytes, comment), sorted by name.
+# They are read straight from pkg's SQLite database when it is readable and from
+# `pkg query` otherwise, and kept until the database file changes, so checking for changes
+# costs two stat() calls.  The index is only rebuilt when the packages really differ.
+class PackageInventory:
+    QUERY_FORMAT = '%n\\t%v\\t%sb\\t%c'
+
+    def __init__(self, executor, database=PKG_DATABASE):
+        self.executor = executor
+        self.database = database
+        self.lock = threading.Lock()
+        self.signature = None
+        self.packages = None
+        self.index = None
+
+    # The PackageIndex of the current inventory, a new object only when the packages changed.
+    def load(self):
+        with self.lock:
+            signature = self.database_signature()
+            if self.index is not None and signature is not None and signature == self.signature:
+                return self.index
+            try:
+                packages = self.query_database()
+            except (sqlite3.Error, OSError):
+                packages = self.query_pkg()
+            self.signature = signature
+            if self.index is None or packages != self.packages:
+                self.packages = packages
+                self.index = PackageIndex(packages)
+            return self.index
+
+    def invalidate(self):
+        with self.lock:
+            self.signature = None
+            self.index = None
+
+    # Drops packages that were just deleted without re-reading the rest, and takes the
+    # database as it is now as the new baseline.  Returns their positions in the index.
+    def remove(self, packages):
+        with self.lock:
+            if self.index is None:
+                return []
+            positions = self.index.remove(packages)
+            removed = {self.index.packages[position] for position in positions}
+            self.packages = [package for package in self.packages if package not in removed]
+            self.signature = self.database_signature()
+            return positions
+
+    # pkg may keep recent writes in the write-ahead log, so it counts as well.
+    def database_signature(self):
+        signature = []
+        for path in (self.database, self.database + '-wal'):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+            except OSError:
+                return None
+        return tuple(signature) if signature[0] is not None else None
+
+    def query_database(self):
+        connection = sqlite3.connect(f"file:{self.database}?mode=ro", uri=True, timeout=2)
+        try:
+            rows = connection.execute("SELECT name, version, flatsize, comment FROM packages").fetchall()
+        finally:
+            connection.close()
+        return [(name, version, flatsize or 0, comment or '') for name, version, flatsize, comment in rows]
+
+    def query_pkg(self):
+        try:
+            result = self.executor.run(['pkg', 'query', '-a', self.QUERY_FORMAT], ttl=60)
+        except Exception as e:
+            print(f"Error getting installed applications: {e}", file=sys.stderr)
+            return []
+        packages = []
+        for line in result.stdout.splitlines():
+            parts = line.split('\t', 3)
+            if len(parts) != 4:
+                continue
+            name, version, size, comment = parts
+            packages.append((name, version, int(size) if size.isdigit() else 0, comment))
+        return packages
+
+# Filter index over the package list.  Names are kept sorted so a prefix is a bisect away,
+# and every trigram of "name description" maps to the packages containing it, so a
+# substring only has to be checked against the packages of its rarest trigram.  A query
+# that extends the previous one only narrows the previous matches.
+class PackageIndex:
+    def __init__(self, packages):
+        self.packages = sorted(packages, key=lambda package: package[0].lower())
+        self.names = [package[0].lower() for package in self.packages]
+        self.texts = [f"{package[0]}\t{package[3]}".lower() for package in self.packages]
+        self.trigrams = {}
+        for position, text in enumerate(self.texts):
+            for trigram in {text[start:start + 3] for start in range(len(text) - 2)}:
+                self.trigrams.setdefault(trigram, []).append(position)
+        self.positions = {}
+        for position, (name, version, size, description) in enumerate(self.packages):
+            self.positions[name] = self.positions[f"{name}-{version}"] = position
+        self.removed = set()
+        self.last_query = ''
+        self.last_matches = range(len(self.packages))
+
+    def __len__(self):
+        return len(self.packages) - len(self.removed)
+
+    # Position of a package given as "name" or "name-version", None when it is not installed.
+    def position(self, package):
+        position = self.positions.get(package)
+        return None if position in self.removed else position
+
+    # Packages are only marked as removed, so the positions of the others stay valid.
+    def remove(self, packages):
+        positions = [position for position in map(self.position, packages) if position is not None]
+        self.removed.update(positions)
+        return positions
+
+    # Positions of the packages matching query, those whose name starts with it first.
+    def search(self, query):
+        query = query.strip().lower()
+        if not query:
+            return [position for position in range(len(self.packages)) if position not in self.removed]
+
+        if self.last_query and query.startswith(self.last_query):
+            candidates = self.last_matches
+        elif len(query) >= 3:
+            postings = [self.trigrams.get(query[start:start + 3], ()) for start in range(len(query) - 2)]
+            candidates = min(postings, key=len)
+        else:
+            candidates = range(len(self.packages))
+        matches = [position for position in candidates if query in self.texts[position]]
+        self.last_query, self.last_matches = query, matches
+
+        start = bisect.bisect_left(self.names, query)
+        end = bisect.bisect_left(self.names, query + '\U0010ffff')
+        positions = list(range(start, end)) + [position for position in matches if not start <= position < end]
+        if self.removed:
+            positions = [position for position in positions if position not in self.removed]
+        return positions
+
+# Removes packages with `pkg delete -y`.  Names queued while a removal runs are collected
+# and go into the next invocation together, so removing twenty packages is one or two runs
+# of pkg instead of twenty.  The output, the progress pkg prints ("[2/5] Deinstalling
+# foo-1.0...") and the outcome of each batch are reported through callbacks, from the
+# worker thread.  pkg is never interrupted once it started, only queued names can be dropped.
+class PackageRemovalQueue:
+    PROGRESS = re.compile(r'\[(\d+)/(\d+)\] Deinstalling (\S+?)\.\.\.')
+
+    def __init__(self, executor, on_output, on_progress, on_finished):
+        self.executor = executor
+        self.on_output = on_output
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.runner = CommandRunner(limit=1)
+        self.lock = threading.Lock()
+        self.pending = []
+        self.running = None
+
+    def enqueue(self, names):
+        with self.lock:
+            for name in names:
+                if name not in self.pending:
+                    self.pending.append(name)
+            if self.running is None:
+                self.start_batch()
+
+    def drop_pending(self):
+        with self.lock:
+            dropped, self.pending = self.pending, []
+        return dropped
+
+    def queued(self):
+        with self.lock:
+            running = list(self.running['names']) if self.running else []
+            return running + self.pending
+
+    # Called with the lock held.
+    def start_batch(self):
+        names, self.pending = self.pending, []
+        if not names:
+            self.running = None
+            return
+        batch = {'names': names, 'removed': [], 'partial': ''}
+        run = CommandRun(self.executor.resolve(['pkg', 'delete', '-y'] + names),
+                         on_output=lambda stream, text: self.output(batch, stream, text),
+                         on_exit=lambda status, returncode: self.finish(batch, status, returncode))
+        self.running = batch
+        self.runner.submit(run)
+
+    def output(self, batch, stream, text):
+        self.on_output(stream, text)
+        if stream == 'stdout':
+            lines = (batch['partial'] + text).split('\n')
+            batch['partial'] = lines.pop()
+            self.parse_progress(batch, lines)
+
+    def parse_progress(self, batch, lines):
+        for line in lines:
+            match = self.PROGRESS.search(line)
+            if match:
+                batch['removed'].append(match.group(3))
+                self.on_progress(int(match.group(1)), int(match.group(2)), match.group(3))
+
+    # pkg also removes the packages that depend on the ones named, so the removed packages
+    # are taken from its progress lines when there are any.
+    def finish(self, batch, status, returncode):
+        self.parse_progress(batch, [batch['partial']])
+        self.executor.invalidate('pkg')
+        removed = batch['removed'] or (batch['names'] if status == 'ok' else [])
+        self.on_finished(batch['names'], removed, status, returncode)
+        with self.lock:
+            self.start_batch()
+
+# Terminates processes in bulk: SIGTERM goes to all of them first, a single wait_procs()
+# then waits for the lot, and whatever is still alive after grace seconds gets SIGKILL.
+# With force SIGKILL is sent straight away.  Returns (pid, name, outcome) per PID, outcome
+# being 'terminated', 'killed', 'gone' (already exited), 'denied', 'invalid', 'refused'
+# (init and the calling process itself are never signalled) or 'survived' (still running
+# after SIGKILL).
+def terminate_processes(pids, grace=5, force=False, kill_wait=2):
+    # PIDs may come as strings (from an entry box or the agent); results are keyed by the
+    # int, and an entry that is not a positive number is reported back as given.
+    requested = []
+    names = {}
+    outcomes = {}
+    for entry in pids:
+        try:
+            pid = int(entry)
+        except (TypeError, ValueError):
+            pid = None
+        if pid is None or pid <= 0:
+            pid = entry if isinstance(entry, (int, str)) else str(entry)
+            outcomes[pid] = 'invalid'
+        elif pid in (1, os.getpid()):
+            outcomes[pid] = 'refused'
+        requested.append(pid)
+    requested = list(dict.fromkeys(requested))
+
+    signalled = []
+    for pid in requested:
+        if pid in outcomes:
+            continue
+        try:
+            process = psutil.Process(pid)
+            names[pid] = process.name()
+            if force:
+                process.kill()
+            else:
+                process.terminate()
+            signalled.append(process)
+        except psutil.NoSuchProcess:
+            outcomes[pid] = 'gone'
+        except psutil.AccessDenied:
+            outcomes[pid] = 'denied'
+
+    gone, alive = psutil.wait_procs(signalled, timeout=kill_wait if force else grace)
+    for process in gone:
+        outcomes[process.pid] = 'killed' if force else 'terminated'
+    killed = []
+    for process in alive:
+        if force:
+            outcomes[process.pid] = 'survived'
+            continue
+        try:
+            process.kill()
+            killed.append(process)
+        except psutil.NoSuchProcess:
+            outcomes[process.pid] = 'terminated'
+        except psutil.AccessDenied:
+            outcomes[process.pid] = 'denied'
+    if killed:
+        gone, alive = psutil.wait_procs(killed, timeout=kill_wait)
+        for process in gone:
+            outcomes[process.pid] = 'killed'
+        for process in alive:
+            outcomes[process.pid] = 'survived'
+    return [(pid, names.get(pid, ''), outcomes[pid]) for pid in requested]
+
+# Gathers every section the viewer shows: system information, processes, packages, ZFS
+# snapshots, boot environments and logs.  The GUI calls the individual methods, the
+# command line collects whole sections as JSON-friendly data.
+class SystemCollector:
+    SECTIONS = ('system', 'processes', 'packages', 'zfs_snapshots', 'boot_environments', 'logs')
+    PROCESS_FIELDS = ('name', 'pid', 'cpu_percent', 'memory_percent', 'status', 'ppid')
+    BOOT_ENVIRONMENT_FIELDS = ('name', 'active', 'mountpoint', 'space', 'created')
+    # The list only changes through beadm and zfs, which invalidate it when run from here; the
+    # limit covers changes made outside the viewer.
+    BOOT_ENVIRONMENT_TTL = 600
+
+    def __init__(self, executor=None, bin_dir=None, log_lines=LOG_FOLLOW_LINES):
+        self.executor = executor or CommandExecutor(bin_dir=bin_dir)
+        self.hardware_probes = HardwareProbes(self.executor)
+        self.process_sampler = ProcessSampler()
+        self.package_inventory = PackageInventory(self.executor)
+        self.syslog_follower = LogFollower(SYSLOG_FILE, log_lines)
+        self.dmesg_follower = DmesgFollower(self.executor, log_lines)
+
+    def collect_record(self, section):
+        record = {'section': section, 'timestamp': time.time()}
+        try:
+            record['data'] = getattr(self, f'collect_{section}')()
+        except Exception as e:
+            record['error'] = str(e)
+        return record
+
+    def collect_system(self):
+        return [{'property': name, 'value': value} for name, value in self.hardware_probes.collect()]
+
+    def collect_processes(self):
+        return [dict(zip(self.PROCESS_FIELDS, row)) for row in self.process_sampler.sample()]
+
+    def collect_packages(self):
+        return [{'name': name, 'version': version, 'size': size, 'description': description}
+                for name, version, size, description in self.package_inventory.load().packages]
+
+    def collect_zfs_snapshots(self):
+        snapshots = []
+        for zfs_pool in self.get_zfs_pools():
+            for name, used, referenced, creation in self.get_zfs_snapshots(zfs_pool):
+                snapshots.append({'pool': zfs_pool, 'name': name, 'used': used, 'referenced': referenced,
+                                  'creation': creation})
+        return snapshots
+
+    def collect_boot_environments(self):
+        return [dict(zip(self.BOOT_ENVIRONMENT_FIELDS, environment)) for environment in self.get_boot_environments()]
+
+    # The first call returns the tail of each log, later calls only the lines logged since.
+    def collect_logs(self):
+        logs = {}
+        for name, follower in (('syslog', self.syslog_follower), ('dmesg', self.dmesg_follower)):
+            try:
+                logs[name] = follower.poll()
+            except Exception as e:
+                logs[name] = []
+                print(f"Error reading {name}: {e}", file=sys.stderr)
+        return logs
+
+    def get_zfs_pools(self):
+        try:
+            result = self.executor.run(['zpool', 'list', '-H', '-o', 'name'], ttl=60)
+            return result.stdout.splitlines()
+        except subprocess.CalledProcessError as e:
+            print(f"Error getting ZFS pools: {e}", file=sys.stderr)
+            return []
+
+    # Filesystems and volumes of the pool as (name, used, referenced, creation), parents
+    # before their children.
+    def get_zfs_datasets(self, zfs_pool):
+        result = self.executor.run(['zfs', 'list', '-H', '-p', '-t', 'filesystem,volume', '-o', ZFS_FIELDS, '-r', zfs_pool],
+                                   ttl=10)
+        return parse_zfs_rows(result.stdout.splitlines())
+
+    # All snapshots below zfs_pool, or with depth=1 only those of the dataset itself.  The
+    # output is parsed line by line as zfs writes it, so a listing of 100k snapshots never
+    # exists as one string.
+    def get_zfs_snapshots(self, zfs_pool, depth=None):
+        args = ['zfs', 'list', '-H', '-p', '-t', 'snapshot', '-o', ZFS_FIELDS]
+        args += ['-d', depth] if depth is not None else ['-r']
+        return parse_zfs_rows(self.executor.stream(args + [zfs_pool]))
+
+    # The rows of just the named snapshots, to add new ones without listing the pool again.
+    def get_zfs_snapshot_rows(self, names, chunk_size=500):
+        rows = []
+        for start in range(0, len(names), chunk_size):
+            args = ['zfs', 'list', '-H', '-p', '-t', 'snapshot', '-o', ZFS_FIELDS] + names[start:start + chunk_size]
+            rows += parse_zfs_rows(self.executor.stream(args))
+        return rows
+
+    # One `zfs snapshot` for all datasets, with -r also for everything below them.
+    def create_zfs_snapshots(self, datasets, snapshot_name, recursive=False):
+        args = ['zfs', 'snapshot'] + (['-r'] if recursive else []) + [f"{dataset}@{snapshot_name}" for dataset in datasets]
+        self.executor.run(args, invalidates=('zfs', 'beadm'))
+
+    # Destroys (or with dry_run only estimates) snapshots of one dataset given as specs like
+    # "a", "a%b" (a to b inclusive).  Returns the names zfs reports and the bytes reclaimed.
+    def destroy_zfs_snapshots(self, dataset, specs, dry_run=False):
+        args = ['zfs', 'destroy', '-nvp' if dry_run else '-vp', f"{dataset}@{','.join(specs)}"]
+        result = self.executor.run(args, invalidates=() if dry_run else ('zfs', 'beadm'))
+        destroyed, reclaim = [], 0
+        for line in result.stdout.splitlines():
+            kind, _, value = line.partition('\t')
+            if kind == 'destroy':
+                destroyed.append(value)
+            elif kind == 'reclaim' and value.isdigit():
+                reclaim = int(value)
+        return destroyed, reclaim
+
+    # `beadm list -H` prints the name, active flags (N now, R on reboot), mountpoint, space and
+    # creation time of each boot environment, tab separated.
+    def get_boot_environments(self):
+        result = self.executor.run(['beadm', 'list', '-H'], ttl=self.BOOT_ENVIRONMENT_TTL)
+        environments = []
+        for line in result.stdout.splitlines():
+            fields = line.split('\t')
+            if len(fields) == len(self.BOOT_ENVIRONMENT_FIELDS):
+                environments.append(tuple(fields))
+        return environments
+
+    def create_boot_environment(self, name):
+        self.executor.run(['beadm', 'create', name], invalidates=('beadm', 'zfs'))
+
+    def activate_boot_environment(self, name):
+        self.executor.run(['beadm', 'activate', name], invalidates=('beadm',))
+
+    def rename_boot_environment(self, name, new_name):
+        self.executor.run(['beadm', 'rename', name, new_name], invalidates=('beadm', 'zfs'))
+
+    # beadm asks for confirmation before destroying.
+    def destroy_boot_environment(self, name):
+        self.executor.run(['beadm', 'destroy', name], input='y\n', invalidates=('beadm', 'zfs'))
+
+    def package_removal_queue(self, on_output, on_progress, on_finished):
+        return PackageRemovalQueue(self.executor, on_output, on_progress, on_finished)
+
+    def invalidate(self, *tools):
+        self.executor.invalidate(*tools)
+
+    # PIDs of the processes whose name is value ('name'), whose name or command line the
+    # regular expression value matches ('pattern'), or that belong to user value ('user'),
+    # as (pid, name, user).  PID 1 and this process are never included.
+    def match_processes(self, field, value):
+        if field == 'pattern':
+            pattern = re.compile(value)
+        elif field not in ('name', 'user'):
+            raise ValueError(f"unsupported match field {field!r}")
+        matches = []
+        for process in psutil.process_iter(['pid', 'name', 'username', 'cmdline']):
+            info = process.info
+            if info['pid'] in (1, os.getpid()):
+                continue
+            if field == 'name':
+                matched = info['name'] == value
+            elif field == 'user':
+                matched = info['username'] == value
+            else:
+                matched = bool(pattern.search(info['name'] or '') or pattern.search(' '.join(info['cmdline'] or ())))
+            if matched:
+                matches.append((info['pid'], info['name'], info['username']))
+        return matches
+
+    def terminate_processes(self, pids, grace=5, force=False):
+        return terminate_processes(pids, grace, force)
+
+    def close(self):
+        self.syslog_follower.close()
+        self.dmesg_follower.close()
+        self.executor.shutdown()
+
+def write_record(record, as_json, stream=sys.stdout):
+    if as_json:
+        stream.write(json.dumps(record) + "\n")
+    else:
+        stream.write(f"[{record['section']}] {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record['timestamp']))}\n")
+        if 'error' in record:
+            stream.write(f"  error: {record['error']}\n")
+        elif isinstance(record['data'], dict):
+            for name, lines in record['data'].items():
+                for line in lines:
+                    stream.write(f"  {name}: {line}\n")
+        else:
+            for item in record['data']:
+                values = item.values() if isinstance(item, dict) else (item,)
+                stream.write("  " + "\t".join(str(value) for value in values) + "\n")
+    stream.flush()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Collect System View data without the GUI.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--once", action="store_true", help="collect each section once and exit (the default)")
+    mode.add_argument("--watch", type=float, metavar="INTERVAL", help="collect every INTERVAL seconds until interrupted")
+    parser.add_argument("--json", action="store_true", help="write one JSON object per line")
+    parser.add_argument("--section", action="append", choices=SystemCollector.SECTIONS,
+                        help="section to collect, may be repeated (default: all)")
+    parser.add_argument("--bin-dir", help="directory of stand-in binaries to run instead of the system tools")
+    args = parser.parse_args(argv)
+
+    collector = SystemCollector(bin_dir=args.bin_dir)
+    sections = args.section or SystemCollector.SECTIONS
+    try:
+        next_run = time.monotonic()
+        while True:
+            for section in sections:
+                write_record(collector.collect_record(section), args.json)
+            if args.watch is None:
+                break
+            next_run += args.watch
+            time.sleep(max(0, next_run - time.monotonic()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        collector.close()
+
+if __name__ == "__main__":
+    main()
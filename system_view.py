@@ -1,50 +1,754 @@
+import time
+STARTUP_STARTED = time.perf_counter()
+
+import cProfile
+import pstats
+
 import tkinter as tk
 from tkinter import ttk, simpledialog, scrolledtext, messagebox
-import platform
-import subprocess
 import psutil
-from PIL import Image, ImageTk
-import cpuinfo
 import json
-import csv
 from datetime import datetime
 import os
-import re
+import threading
+import queue
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from system_agent import AGENT_SOCKET, AgentCollector
+from system_core import (CACHE_DIR, SYSLOG_FILE, LOG_FOLLOW_LINES, CommandExecutor, CommandRun, CommandRunner,
+                         DmesgFollower, IoRateSampler, LogFile, LogFollower, MetricsHistory, MetricsRecorder, MetricsSampler,
+                         ProcessDetails, ProcessTableModel, SpanTimings, SystemCollector, ZfsSnapshotModel,
+                         format_size, load_metrics_day, metrics_file_name, recorded_days, snapshot_ranges,
+                         top_processes)
+
+SYSTEM_IMAGE = "./resources/system_image.jpg"
+SYSTEM_IMAGE_SIZE = (150, 150)
+SETTINGS_FILE = "./resources/settings.json"
+# Where edited settings used to be saved (without ever being read back).
+LEGACY_SETTINGS_FILE = "./settings.json"
+SETTINGS_SAVE_DELAY = 1000
+LOG_PAGE_SIZE = 500
+METRICS_INTERVAL = 1000
+METRICS_HISTORY_SECONDS = 24 * 3600
+RECORD_INTERVAL = 10000
+IO_RATES_INTERVAL = 2000
+LAG_PROBE_INTERVAL = 100
+TERMINATION_GRACE = 5
+DIAGNOSTICS_INTERVAL = 1000
+
+def format_percent(value):
+    return f"{value:.1f} %"
+
+def format_rate(value):
+    return f"{value / (1024 ** 2):.2f} MiB/s"
+
+def format_count_rate(value):
+    return f"{value:.0f}/s"
+
+# Formats the rates of an I/O panel row, which are None until the second sample.
+def format_io_row(row, formatters):
+    return row[:2] + tuple('' if value is None else formatter(value) for value, formatter in zip(row[2:], formatters))
+
+# Spinbox commands only fire on the arrows, so typed values are picked up from the variable.
+# Out-of-range numbers are clamped back into the box; text that is not a number yet (an
+# empty box while typing) is left alone until it is.
+def trace_spinbox(variable, low, high, on_change=None):
+    def changed(*args):
+        try:
+            value = int(variable.get())
+        except (ValueError, tk.TclError):
+            return
+        clamped = min(max(value, low), high)
+        if clamped != value:
+            # Tcl does not run the trace again for a write made from inside it.
+            variable.set(str(clamped))
+        if on_change is not None:
+            on_change(clamped)
+    variable.trace_add('write', changed)
+
+# (title, series, fixed maximum, formatter) of the charts on the System tab.
+TREND_CHARTS = [
+    ('CPU', 'cpu', 100, format_percent),
+    ('Memory', 'memory', 100, format_percent),
+    ('Swap', 'swap', 100, format_percent),
+    ('Disk Used (/)', 'disk_used', 100, format_percent),
+    ('Disk Read', 'disk_read', None, format_rate),
+    ('Disk Write', 'disk_write', None, format_rate),
+    ('Network In', 'net_recv', None, format_rate),
+    ('Network Out', 'net_sent', None, format_rate),
+]
+
+class RefreshJob:
+    def __init__(self, name, refresh, interval, widget=None, collect=None, max_interval=None):
+        self.name = name
+        self.refresh = refresh
+        self.collect = collect
+        self.interval = interval
+        self.current_interval = interval
+        self.max_interval = max_interval or interval * 8
+        self.widget = widget
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name) if collect else None
+        self.timer_id = None
+        self.running = False
+        self.paused = False
+        self.started = 0.0
+        self.last_cost = 0.0
+        self.average_cost = 0.0
+        self.runs = 0
+        self.skipped = 0
+
+# Owns every periodic refresh in the GUI.  Each job has exactly one pending after() timer,
+# pauses while its tab is not mapped and skips a tick while the previous refresh is still
+# running.  Jobs with a collect function gather their data on a dedicated worker thread and
+# the results are handed back through a queue that is polled from the Tk thread.  The
+# measured cost of each refresh stretches the interval when a job starts eating into it.
+# Every collect and every callback on the Tk thread is timed into timings, as "<job>.collect"
+# and "<job>.refresh"; background runs are timed the same way under the name they are
+# started with, and posts go by the name of the posted function.
+class RefreshScheduler:
+    # Fraction of the interval a refresh may take before the interval is stretched.
+    COST_BUDGET = 0.25
+
+    def __init__(self, root, poll_interval=50, timings=None):
+        self.root = root
+        self.poll_interval = poll_interval
+        self.timings = timings or SpanTimings()
+        self.jobs = {}
+        # Widgets that already have the <Map> binding which resumes their jobs.
+        self.mapped_widgets = set()
+        self.results = queue.Queue()
+        self.pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="background")
+        self.pump_id = self.root.after(self.poll_interval, self.pump)
+
+    def add_job(self, name, refresh, interval, widget=None, collect=None, max_interval=None):
+        self.remove_job(name)
+        job = RefreshJob(name, refresh, interval, widget, collect, max_interval)
+        self.jobs[name] = job
+        # One binding per widget, looking the jobs up when it fires, so jobs that are added and
+        # removed again (log following) leave no handlers behind.
+        if widget is not None and str(widget) not in self.mapped_widgets:
+            self.mapped_widgets.add(str(widget))
+            widget.bind('<Map>', lambda event, widget=widget: self.resume_widget(widget), add='+')
+        self.schedule(job, 0)
+        return job
+
+    def remove_job(self, name):
+        job = self.jobs.pop(name, None)
+        if job is None:
+            return
+        if job.timer_id is not None:
+            self.root.after_cancel(job.timer_id)
+            job.timer_id = None
+        if job.worker is not None:
+            job.worker.shutdown(wait=False)
+
+    def schedule(self, job, delay):
+        if job.timer_id is not None:
+            self.root.after_cancel(job.timer_id)
+        job.timer_id = self.root.after(delay, lambda: self.tick(job))
+
+    def resume_widget(self, widget):
+        for job in list(self.jobs.values()):
+            if job.widget is not None and str(job.widget) == str(widget):
+                self.resume(job)
+
+    def resume(self, job):
+        if job.paused:
+            job.paused = False
+            self.schedule(job, 0)
+
+    def tick(self, job):
+        job.timer_id = None
+        if job.widget is not None and not job.widget.winfo_ismapped():
+            # No timer is left behind, the <Map> binding restarts the job.
+            job.paused = True
+            return
+        self.schedule(job, job.current_interval)
+        if job.running:
+            job.skipped += 1
+            return
+        job.running = True
+        job.started = time.perf_counter()
+        if job.collect is None:
+            try:
+                with self.timings.span(f"{job.name}.refresh"):
+                    job.refresh()
+            except Exception as e:
+                print(f"Error refreshing {job.name}: {e}")
+            self.finish(job)
+        else:
+            job.worker.submit(self.collect, job)
+
+    def collect(self, job):
+        self.run_collect(job.collect, lambda data, error: self.deliver(job, data, error), job.name)
+
+    def run_collect(self, collect, callback, name):
+        started = time.perf_counter()
+        try:
+            result = (callback, collect(), None, f"{name}.refresh")
+        except Exception as e:
+            result = (callback, None, e, f"{name}.refresh")
+        self.timings.record(f"{name}.collect", time.perf_counter() - started)
+        self.results.put(result)
+
+    # Run collect once on the shared pool and pass its result, or the exception it raised,
+    # to callback(data, error) on the Tk thread.
+    def run_in_background(self, name, collect, callback):
+        self.pool.submit(self.run_collect, collect, callback, name)
+
+    # Thread-safe way to have callback(*args) called on the Tk thread.
+    def post(self, callback, *args):
+        self.results.put((lambda data, error: callback(*args), None, None, callback.__name__))
+
+    def pump(self):
+        try:
+            while True:
+                callback, data, error, name = self.results.get_nowait()
+                with self.timings.span(name):
+                    callback(data, error)
+        except queue.Empty:
+            pass
+        self.pump_id = self.root.after(self.poll_interval, self.pump)
+
+    def deliver(self, job, data, error):
+        # The job may have been removed while its data was being collected.
+        if self.jobs.get(job.name) is not job:
+            return
+        if error is not None:
+            print(f"Error collecting {job.name}: {error}")
+        else:
+            try:
+                job.refresh(data)
+            except Exception as e:
+                print(f"Error refreshing {job.name}: {e}")
+        self.finish(job)
+
+    def finish(self, job):
+        job.running = False
+        job.runs += 1
+        job.last_cost = time.perf_counter() - job.started
+        if job.runs == 1:
+            job.average_cost = job.last_cost
+        else:
+            job.average_cost = 0.8 * job.average_cost + 0.2 * job.last_cost
+        wanted = int(job.average_cost * 1000 / self.COST_BUDGET)
+        job.current_interval = min(job.max_interval, max(job.interval, wanted))
+
+    def stats(self, name):
+        job = self.jobs[name]
+        return {
+            'interval': job.current_interval,
+            'last_cost': job.last_cost,
+            'average_cost': job.average_cost,
+            'runs': job.runs,
+            'skipped': job.skipped,
+            'paused': job.paused,
+        }
+
+    def stop(self):
+        self.root.after_cancel(self.pump_id)
+        for job in self.jobs.values():
+            if job.timer_id is not None:
+                self.root.after_cancel(job.timer_id)
+                job.timer_id = None
+            if job.worker is not None:
+                job.worker.shutdown(wait=False)
+        self.pool.shutdown(wait=False)
+
+# Treeview that only ever holds the rows that fit on screen.  Scrolling moves a window
+# over the model, and refreshes update the cells that changed in place, keyed by the
+# model's row_key() (the PID for processes, the name for snapshots).  Sorting, filtering and
+# rendering are timed as "<name>.sort", "<name>.filter" and "<name>.render".  Moving the
+# selection with the keyboard generates <<SelectionMoved>>.
+class VirtualTableView:
+    def __init__(self, parent, model, name='table', timings=None):
+        self.model = model
+        self.name = name
+        self.timings = timings or SpanTimings()
+        self.offset = 0
+        self.visible_count = 20
+        self.rendered = {}
+        self.rendered_keys = {}
+        self.selected_keys = set()
+        self.cursor_key = None
+
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=model.COLUMNS, show='headings', selectmode='extended')
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", expand=True, fill='both')
+        for index, col in enumerate(model.COLUMNS):
+            self.tree.heading(col, text=col, command=lambda index=index: self.sort_by(index))
+
+        self.tree.bind('<Configure>', self.on_resize)
+        self.tree.bind('<ButtonRelease-1>', self.on_click, add='+')
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll(-1 if event.delta > 0 else 1, 'units'))
+        self.tree.bind('<Button-4>', lambda event: self.scroll(-1, 'units'))
+        self.tree.bind('<Button-5>', lambda event: self.scroll(1, 'units'))
+        self.tree.bind('<Up>', lambda event: self.move_selection(-1, 'units'))
+        self.tree.bind('<Down>', lambda event: self.move_selection(1, 'units'))
+        self.tree.bind('<Prior>', lambda event: self.move_selection(-1, 'pages'))
+        self.tree.bind('<Next>', lambda event: self.move_selection(1, 'pages'))
+        self.update_headings()
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def bind(self, sequence, func):
+        self.tree.bind(sequence, func, add='+')
+
+    def on_resize(self, event):
+        style = ttk.Style()
+        row_height = int(style.lookup('Treeview', 'rowheight') or 20)
+        # Leave room for the heading row.
+        count = max(1, (event.height - row_height - 4) // row_height)
+        if count != self.visible_count:
+            self.visible_count = count
+            self.render()
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.offset = int(float(amount) * len(self.model))
+            self.render()
+        else:
+            self.scroll(int(amount), unit)
+
+    def scroll(self, amount, unit):
+        step = self.visible_count if unit == 'pages' else 1
+        self.offset += amount * step
+        self.render()
+        return "break"
+
+    def sort_by(self, column):
+        with self.timings.span(f"{self.name}.sort"):
+            self.model.set_sort(column)
+            self.update_headings()
+            self.render()
+
+    def set_filter(self, column, text):
+        with self.timings.span(f"{self.name}.filter"):
+            self.model.set_filter(column, text)
+            self.offset = 0
+            self.render()
+
+    def update_headings(self):
+        for index, col in enumerate(self.model.COLUMNS):
+            text = col
+            if index == self.model.sort_column:
+                text += ' \u25bc' if self.model.sort_reverse else ' \u25b2'
+            self.tree.heading(col, text=text)
+
+    # Clicks replace the selection, Shift/Ctrl clicks keep selected rows that are scrolled out of view.
+    def on_click(self, event):
+        visible = {self.rendered_keys[iid] for iid in self.tree.selection() if iid in self.rendered_keys}
+        if event.state & 0x0005:
+            hidden = {key for key in self.selected_keys if str(key) not in self.rendered}
+            self.selected_keys = visible | hidden
+        else:
+            self.selected_keys = visible
+        self.cursor_key = self.rendered_keys.get(self.tree.focus())
+
+    # The Treeview on its own would stop at the edge of the rendered rows, so the keys move
+    # the selection over the whole model and scroll the window along with it.  Without a
+    # visible selected row they start from the top of the window.
+    def move_selection(self, amount, unit):
+        total = len(self.model)
+        if not total:
+            return "break"
+        step = self.visible_count if unit == 'pages' else 1
+        keys = list(self.rendered_keys.values())
+        if self.cursor_key in keys:
+            index = min(max(self.offset + keys.index(self.cursor_key) + amount * step, 0), total - 1)
+        else:
+            index = min(self.offset, total - 1)
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.visible_count:
+            self.offset = index - self.visible_count + 1
+        self.cursor_key = self.model.row_key(self.model.window(index, 1)[0])
+        self.selected_keys = {self.cursor_key}
+        self.render()
+        self.tree.focus(str(self.cursor_key))
+        self.tree.event_generate('<<SelectionMoved>>')
+        return "break"
+
+    def selected_rows(self):
+        rows = [self.model.get_row(key) for key in self.selected_keys]
+        return [row for row in rows if row is not None]
+
+    def render(self):
+        with self.timings.span(f"{self.name}.render"):
+            self.render_window()
+
+    def render_window(self):
+        total = len(self.model)
+        self.offset = max(0, min(self.offset, total - self.visible_count))
+        rows = self.model.window(self.offset, self.visible_count)
+
+        keys = [self.model.row_key(row) for row in rows]
+        wanted = [str(key) for key in keys]
+        wanted_set = set(wanted)
+        stale = [iid for iid in self.rendered if iid not in wanted_set]
+        if stale:
+            self.tree.delete(*stale)
+        rendered = {}
+        for index, row in enumerate(rows):
+            iid = wanted[index]
+            values = self.model.format_row(row)
+            if iid not in self.rendered:
+                self.tree.insert("", index, iid=iid, values=values)
+            elif self.rendered[iid] != values:
+                self.tree.item(iid, values=values)
+            rendered[iid] = values
+        self.rendered = rendered
+        self.rendered_keys = dict(zip(wanted, keys))
+
+        if list(self.tree.get_children()) != wanted:
+            for index, iid in enumerate(wanted):
+                self.tree.move(iid, "", index)
+        selection = [iid for iid, key in zip(wanted, keys) if key in self.selected_keys]
+        if list(self.tree.selection()) != selection:
+            self.tree.selection_set(selection)
+
+        if total:
+            self.scrollbar.set(self.offset / total, (self.offset + len(rows)) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+# Parent/child view over the same ProcessTableModel.  Only the children of expanded nodes
+# are in the Treeview: a collapsed node with children holds a placeholder so that it shows
+# an expander, and its children are inserted when it is opened.  A refresh walks just the
+# expanded part of the tree and updates it in place.  Timed like VirtualTableView, with
+# opening a node as "<name>.open".
+class ProcessTreeView:
+    def __init__(self, parent, model, name='tree', timings=None):
+        self.model = model
+        self.name = name
+        self.timings = timings or SpanTimings()
+        self.rendered = {}
+        self.columns = model.COLUMNS[1:]
+
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=self.columns, selectmode='extended')
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", expand=True, fill='both')
+        self.tree.heading('#0', command=lambda: self.sort_by(0))
+        for index, col in enumerate(self.columns, 1):
+            self.tree.heading(col, command=lambda index=index: self.sort_by(index))
+            self.tree.column(col, width=90, anchor='e' if index in (1, 2, 3) else 'w')
+        self.tree.bind('<<TreeviewOpen>>', lambda event: self.open_node(self.tree.focus()), add='+')
+        self.update_headings()
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def pack_forget(self):
+        self.frame.pack_forget()
+
+    def bind(self, sequence, func):
+        self.tree.bind(sequence, func, add='+')
+
+    def sort_by(self, column):
+        with self.timings.span(f"{self.name}.sort"):
+            self.model.set_sort(column)
+            self.update_headings()
+            self.render()
+
+    def set_filter(self, column, text):
+        with self.timings.span(f"{self.name}.filter"):
+            self.model.set_filter(column, text)
+            self.render()
+
+    def update_headings(self):
+        for index, col in enumerate(('#0',) + self.columns):
+            text = self.model.COLUMNS[index]
+            if index == self.model.sort_column:
+                text += ' \u25bc' if self.model.sort_reverse else ' \u25b2'
+            self.tree.heading(col, text=text)
+
+    def selected_rows(self):
+        rows = [self.model.get_row(int(iid)) for iid in self.tree.selection() if iid.isdigit()]
+        return [row for row in rows if row is not None]
+
+    def render(self):
+        with self.timings.span(f"{self.name}.render"):
+            self.sync_children('')
+
+    # The tree can be opened from the keyboard with nothing focused, which is not a node.
+    def open_node(self, iid):
+        if not iid:
+            return
+        with self.timings.span(f"{self.name}.open"):
+            self.sync_children(iid)
+
+    def sync_children(self, iid):
+        tree = self.tree
+        rows = self.model.tree_children(int(iid) if iid else None)
+        wanted = [str(row[1]) for row in rows]
+        wanted_set = set(wanted)
+        stale = [child for child in tree.get_children(iid) if child not in wanted_set]
+        if stale:
+            tree.delete(*stale)
+        for index, row in enumerate(rows):
+            child = wanted[index]
+            values = self.model.format_row(row)
+            if not tree.exists(child):
+                tree.insert(iid, index, iid=child, text=values[0], values=values[1:])
+            else:
+                # A process can show up under another parent when its parent exited.
+                if tree.parent(child) != iid:
+                    tree.move(child, iid, index)
+                if self.rendered.get(child) != values:
+                    tree.item(child, text=values[0], values=values[1:])
+            self.rendered[child] = values
+            if tree.item(child, 'open'):
+                self.sync_children(child)
+            else:
+                self.sync_placeholder(child, row[1])
+        if list(tree.get_children(iid)) != wanted:
+            tree.set_children(iid, *wanted)
+        if not iid:
+            self.rendered = {child: values for child, values in self.rendered.items() if tree.exists(child)}
+
+    def sync_placeholder(self, iid, pid):
+        children = self.tree.get_children(iid)
+        if self.model.has_children(pid):
+            if not children:
+                self.tree.insert(iid, 'end', iid=f"placeholder-{pid}", text="...")
+        elif children:
+            self.tree.delete(*children)
+
+# Canvas line chart that grows by one segment per sample.  Once the line reaches the right
+# edge the segments are shifted left and those that scrolled off are deleted, and a value
+# above the current scale rescales the existing segments in place, so adding a sample
+# never redraws the whole chart.
+class Sparkline:
+    def __init__(self, parent, width=240, height=40, step=2, maximum=None, color='steel blue'):
+        self.width = width
+        self.height = height
+        self.step = step
+        self.fixed_maximum = maximum
+        self.maximum = maximum or 1.0
+        self.color = color
+        self.segments = deque()
+        self.last_point = None
+        self.last_value = 0.0
+        self.seen_total = 0
+        self.canvas = tk.Canvas(parent, width=width, height=height, background='white', highlightthickness=0)
+
+    def grid(self, **kwargs):
+        self.canvas.grid(**kwargs)
+
+    # Draw whatever the ring gained since the last call.  After a long pause (the tab was
+    # hidden) only the points that still fit are drawn, from a clean canvas.
+    def update_from(self, ring):
+        new_values = ring.since(self.seen_total)
+        self.seen_total = ring.total
+        visible = self.width // self.step + 1
+        if len(new_values) > visible:
+            self.clear()
+            new_values = new_values[-visible:]
+        for value in new_values:
+            self.add(value)
+
+    def clear(self):
+        self.canvas.delete('segment')
+        self.segments.clear()
+        self.last_point = None
+
+    def add(self, value):
+        self.last_value = value
+        if self.fixed_maximum is None and value > self.maximum:
+            new_maximum = value * 1.25
+            baseline = self.height - 1
+            self.canvas.scale('segment', 0, baseline, 1, self.maximum / new_maximum)
+            if self.last_point is not None:
+                x, y = self.last_point
+                self.last_point = (x, baseline - (baseline - y) * self.maximum / new_maximum)
+            self.maximum = new_maximum
+
+        y = self.height - 1 - min(value, self.maximum) / self.maximum * (self.height - 2)
+        if self.last_point is None:
+            self.last_point = (0, y)
+            return
+        last_x, last_y = self.last_point
+        x = last_x + self.step
+        if x > self.width:
+            self.canvas.move('segment', -self.step, 0)
+            x -= self.step
+            last_x -= self.step
+            while self.segments and self.canvas.coords(self.segments[0])[2] <= 0:
+                self.canvas.delete(self.segments.popleft())
+        self.segments.append(self.canvas.create_line(last_x, last_y, x, y, fill=self.color, tags='segment'))
+        self.last_point = (x, y)
+
+# Records how long each phase of startup takes, up to the first paint of the window.
+class StartupTimer:
+    def __init__(self, started):
+        self.started = started
+        self.last = started
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        lines = ["Startup timing:"]
+        for phase, seconds in self.phases:
+            lines.append(f"  {phase:<24} {seconds * 1000:8.1f} ms")
+        lines.append(f"  {'total':<24} {(self.last - self.started) * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+# Measures how late Tk runs after() callbacks, which is how long the event loop was kept
+# busy by something else.  Each delay is recorded as the "tk.lag" span.
+class LagProbe:
+    def __init__(self, root, timings, interval=LAG_PROBE_INTERVAL):
+        self.root = root
+        self.timings = timings
+        self.interval = interval
+        self.expected = time.perf_counter() + interval / 1000
+        self.after_id = self.root.after(interval, self.fire)
+
+    def fire(self):
+        now = time.perf_counter()
+        self.timings.record('tk.lag', max(0.0, now - self.expected))
+        self.expected = now + self.interval / 1000
+        self.after_id = self.root.after(self.interval, self.fire)
+
+    def stop(self):
+        self.root.after_cancel(self.after_id)
 
 class SystemInfo:
-    def __init__(self):
-        if os.geteuid() != 0:
-            print("This application must be run as root.")
+    def __init__(self, startup_timing=False, bin_dir=None, agent_socket=None):
+        if agent_socket is None and os.geteuid() != 0:
+            print("This application must be run as root, or with --agent to use a running collector agent.")
             exit()
+        self.startup_timing = startup_timing
+        self.startup_timer = StartupTimer(STARTUP_STARTED)
+        self.startup_timer.mark("imports")
+        self.first_paint_done = False
+
         self.root = tk.Tk()
         self.root.title("System View")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.startup_timer.mark("create window")
+
+        self.timings = SpanTimings()
+        self.scheduler = RefreshScheduler(self.root, timings=self.timings)
+        self.lag_probe = LagProbe(self.root, self.timings)
+        self.executor = CommandExecutor(bin_dir=bin_dir)
+        # With an agent the sampling and every privileged action happen there, and this
+        # process can run as an ordinary user.
+        if agent_socket is not None:
+            try:
+                self.collector = AgentCollector(agent_socket)
+            except OSError as e:
+                print(f"Error connecting to the collector agent at {agent_socket}: {e}")
+                exit()
+        else:
+            self.collector = SystemCollector(self.executor)
+        self.process_sampler = self.collector.process_sampler
+        self.hardware_probes = self.collector.hardware_probes
+
+        # Metrics are recorded from startup on, whether or not the charts are on screen.
+        self.metrics_sampler = MetricsSampler()
+        self.metrics_history = MetricsHistory.for_duration(self.metrics_sampler.names, METRICS_HISTORY_SECONDS,
+                                                           METRICS_INTERVAL / 1000)
+        self.sparklines = []
+        self.scheduler.add_job('metrics', self.record_metrics, METRICS_INTERVAL, collect=self.metrics_sampler.sample)
+
+        # Every RECORD_INTERVAL the latest metrics and the busiest processes go to the daily
+        # file.  The busiest processes come from the Processes tab's latest snapshot, so the
+        # process table is only scanned for the recorder while that tab is not refreshing.
+        self.metrics_recorder = MetricsRecorder(self.metrics_sampler.names)
+        self.metrics_recorder.start()
+        self.process_sample_lock = threading.Lock()
+        self.latest_process_sample = None
+        self.scheduler.add_job('recorder', self.record_metrics_row, RECORD_INTERVAL, collect=self.collect_top_processes)
+
+        self.settings_save_id = None
+        self.load_settings()
+        self.command_runner = CommandRunner()
+        self.startup_timer.mark("read settings")
 
-        self.settings_data = self.read_settings_from_json("./resources/settings.json")
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(expand=True, fill='both')
 
+        # Tabs are only filled in the first time they are selected.
+        self.tab_builders = {}
         self.create_tab("System", self.create_system_tab_content)
-        self.create_tab("Processes", self.create_processes_tab_content, self.schedule_update_processes)
+        self.create_tab("Processes", self.create_processes_tab_content)
         self.create_tab("Settings", self.create_settings_tab_content)
         self.create_tab("Applications", self.create_applications_tab_content)
         self.create_tab("ZFS Snapshots", self.create_zfs_snapshots_tab_content)
         self.create_tab("Boot Environments", self.create_boot_environments_tab_content)
         self.create_tab("Logs", self.create_logs_tab_content)
+        # Hidden until Ctrl+D (with or without Shift, Tk reports the two as different keys).
+        self.diagnostics_tab = self.create_tab("Diagnostics", self.create_diagnostics_tab_content)
+        self.notebook.hide(self.diagnostics_tab)
+        self.root.bind("<Control-d>", self.toggle_diagnostics)
+        self.root.bind("<Control-D>", self.toggle_diagnostics)
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
 
         self.app_description_var = tk.StringVar()
+        self.startup_timer.mark("create notebook")
+
+        self.build_tab(self.notebook.select())
+        self.notebook.bind("<Expose>", self.on_first_expose, add='+')
 
     def get_log_file_name(self):
-        current_date = datetime.now()
-        return current_date.strftime('%d%m%Y') + ".csv"
+        return metrics_file_name(datetime.now())
 
-    def create_tab(self, text, content_func, update_func=None, **kwargs):
+    def create_tab(self, text, content_func, **kwargs):
         tab = ttk.Frame(self.notebook)
         self.notebook.add(tab, text=text)
-        content_func(tab, **kwargs)
-        if update_func:
-            tab.bind("<Visibility>", lambda event, update_func=update_func: self.on_tab_visibility(tab, update_func))
+        self.tab_builders[str(tab)] = (text, tab, lambda: content_func(tab, **kwargs))
+        return tab
+
+    def on_tab_changed(self, event):
+        self.build_tab(self.notebook.select())
+
+    def build_tab(self, tab_id):
+        builder = self.tab_builders.pop(str(tab_id), None)
+        if builder is None:
+            return
+        text, tab, build = builder
+        started = time.perf_counter()
+        with self.timings.span(f"tab.{text}.build"):
+            build()
+        if not self.first_paint_done:
+            self.startup_timer.mark(f"build {text} tab")
+        elif self.startup_timing:
+            print(f"Built {text} tab in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    # The first expose of the notebook is when the window is painted, the idle callback
+    # runs once the drawing queued for it is done.
+    def on_first_expose(self, event):
+        if not self.first_paint_done:
+            self.first_paint_done = True
+            self.root.after_idle(self.finish_startup_timing)
+
+    def finish_startup_timing(self):
+        self.startup_timer.mark("first paint")
+        if self.startup_timing:
+            print(self.startup_timer.report())
 
     def create_logs_tab_content(self, parent):
+        self.logs_tab = parent
+        self.log_source = 'syslog'
+        self.log_follower = None
+        self.log_file = None
+        self.log_page_start = 0
+        self.log_matches = []
+        self.log_match_index = -1
+        self.log_search_cancelled = threading.Event()
+
         logs_frame = ttk.Frame(parent)
         logs_frame.pack(expand=True, fill='both')
 
@@ -63,47 +767,426 @@ class SystemInfo:
         dmesg_button = ttk.Button(buttons_frame, text="Show dmesg", command=self.show_dmesg)
         dmesg_button.pack(side=tk.LEFT, padx=5)
 
+        # Follow new lines as they are logged
+        self.log_follow_var = tk.BooleanVar(value=False)
+        follow_check = ttk.Checkbutton(buttons_frame, text="Follow", variable=self.log_follow_var,
+                                       command=self.toggle_log_follow)
+        follow_check.pack(side=tk.LEFT, padx=5)
+
+        # Page navigation
+        page_frame = ttk.Frame(logs_frame)
+        page_frame.pack(pady=5)
+
+        ttk.Button(page_frame, text="<< First", command=lambda: self.show_log_page(0)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(page_frame, text="< Previous",
+                   command=lambda: self.show_log_page(self.log_page_start - LOG_PAGE_SIZE)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(page_frame, text="Next >",
+                   command=lambda: self.show_log_page(self.log_page_start + LOG_PAGE_SIZE)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(page_frame, text="Last >>", command=self.show_last_log_page).pack(side=tk.LEFT, padx=2)
+
+        ttk.Label(page_frame, text="Line:").pack(side=tk.LEFT, padx=(10, 2))
+        goto_line_var = tk.StringVar()
+        goto_line_entry = ttk.Entry(page_frame, textvariable=goto_line_var, width=10)
+        goto_line_entry.pack(side=tk.LEFT, padx=2)
+        goto_line_entry.bind('<Return>', lambda event: self.goto_log_line(goto_line_var.get()))
+        ttk.Button(page_frame, text="Go", command=lambda: self.goto_log_line(goto_line_var.get())).pack(side=tk.LEFT, padx=2)
+
+        self.log_page_var = tk.StringVar()
+        log_page_label = ttk.Label(logs_frame, textvariable=self.log_page_var)
+        log_page_label.pack(pady=2)
+
+        # Search
+        search_frame = ttk.Frame(logs_frame)
+        search_frame.pack(pady=5)
+
+        search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=search_var, width=40)
+        search_entry.pack(side=tk.LEFT, padx=2)
+
+        regex_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search_frame, text="Regex", variable=regex_var).pack(side=tk.LEFT, padx=2)
+        ignore_case_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(search_frame, text="Ignore case", variable=ignore_case_var).pack(side=tk.LEFT, padx=2)
+
+        start_search = lambda *args: self.search_log(search_var.get(), regex_var.get(), ignore_case_var.get())
+        search_entry.bind('<Return>', start_search)
+        ttk.Button(search_frame, text="Search", command=start_search).pack(side=tk.LEFT, padx=2)
+        ttk.Button(search_frame, text="Previous Match", command=lambda: self.goto_log_match(-1)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(search_frame, text="Next Match", command=lambda: self.goto_log_match(1)).pack(side=tk.LEFT, padx=2)
+
+        self.log_search_var = tk.StringVar()
+        log_search_label = ttk.Label(logs_frame, textvariable=self.log_search_var)
+        log_search_label.pack(pady=2)
+
         # Create a scrolled text widget for displaying logs
         self.log_scrolled_text = scrolledtext.ScrolledText(logs_frame, wrap=tk.WORD)
+        self.log_scrolled_text.tag_configure('match', background='yellow')
         self.log_scrolled_text.pack(expand=True, fill='both', padx=10, pady=10)
 
     # Add these methods to handle button clicks
     def show_syslog(self):
-        syslog_output = subprocess.run(['cat', '/var/log/messages'], capture_output=True, text=True)
+        self.log_source = 'syslog'
+        if self.log_follow_var.get():
+            self.start_log_follow()
+            return
+        try:
+            self.open_log(LogFile(SYSLOG_FILE))
+        except OSError as e:
+            print(f"Error opening {SYSLOG_FILE}: {e}")
+
+    def show_dmesg(self):
+        self.log_source = 'dmesg'
+        if self.log_follow_var.get():
+            self.start_log_follow()
+            return
+        collect = lambda: self.executor.run(['dmesg']).stdout.encode('utf-8')
+        self.scheduler.run_in_background('dmesg', collect, self.on_dmesg_output)
+
+    def on_dmesg_output(self, output, error):
+        if error is not None:
+            print(f"Error running 'dmesg' command: {error}")
+            return
+        self.open_log(LogFile.from_bytes(output, 'dmesg'))
+
+    def toggle_log_follow(self):
+        if self.log_follow_var.get():
+            self.start_log_follow()
+        else:
+            self.stop_log_follow()
+            if self.log_source == 'dmesg':
+                self.show_dmesg()
+            else:
+                self.show_syslog()
+
+    def start_log_follow(self):
+        self.stop_log_follow()
+        if self.log_source == 'dmesg':
+            self.log_follower = DmesgFollower(self.executor, LOG_FOLLOW_LINES)
+        else:
+            self.log_follower = LogFollower(SYSLOG_FILE, LOG_FOLLOW_LINES)
         self.log_scrolled_text.config(state=tk.NORMAL)
         self.log_scrolled_text.delete(1.0, tk.END)
-        self.log_scrolled_text.insert(tk.END, syslog_output.stdout)
         self.log_scrolled_text.config(state=tk.DISABLED)
+        self.scheduler.add_job('log_follow', self.append_followed_lines, 1000, widget=self.logs_tab,
+                               collect=self.log_follower.poll)
+
+    def stop_log_follow(self):
+        self.scheduler.remove_job('log_follow')
+        if self.log_follower is not None:
+            self.log_follower.close()
+            self.log_follower = None
+
+    # Append only the new lines and drop the oldest ones, so the widget holds the same
+    # bounded ring as the follower.  The view keeps scrolling only if it was at the bottom.
+    def append_followed_lines(self, new_lines):
+        text = self.log_scrolled_text
+        if new_lines:
+            at_bottom = text.yview()[1] >= 0.999
+            text.config(state=tk.NORMAL)
+            text.insert(tk.END, "\n".join(new_lines) + "\n")
+            excess = int(text.index('end-1c').split('.')[0]) - 1 - LOG_FOLLOW_LINES
+            if excess > 0:
+                text.delete(1.0, f"{excess + 1}.0")
+            text.config(state=tk.DISABLED)
+            if at_bottom:
+                text.see(tk.END)
+        self.log_page_var.set(f"Following {self.log_follower.path}: last {len(self.log_follower.lines)} lines")
+
+    # Index the first page right away so it can be shown, the rest is indexed in the background.
+    def open_log(self, log_file):
+        if self.log_file is not None:
+            self.log_file.close()
+        self.log_search_cancelled.set()
+        self.log_file = log_file
+        self.log_matches = []
+        self.log_match_index = -1
+        self.log_search_var.set("")
+
+        with self.timings.span('log.open'):
+            log_file.build_index(max_lines=LOG_PAGE_SIZE)
+            self.show_log_page(0)
+        if not log_file.indexed.is_set():
+            self.scheduler.run_in_background('log.index', log_file.build_index,
+                                             lambda line_count, error: self.on_log_indexed(log_file, error))
+
+    def on_log_indexed(self, log_file, error):
+        if error is not None:
+            print(f"Error indexing {log_file.path}: {error}")
+        elif log_file is self.log_file:
+            self.show_log_page(self.log_page_start)
+
+    def show_log_page(self, start, highlight_line=None):
+        log_file = self.log_file
+        if log_file is None:
+            return
+        line_count = log_file.line_count()
+        self.log_page_start = max(0, min(start, line_count - LOG_PAGE_SIZE))
 
-    def show_dmesg(self):
-        dmesg_output = subprocess.run(['dmesg'], capture_output=True, text=True)
         self.log_scrolled_text.config(state=tk.NORMAL)
         self.log_scrolled_text.delete(1.0, tk.END)
-        self.log_scrolled_text.insert(tk.END, dmesg_output.stdout)
+        self.log_scrolled_text.insert(tk.END, log_file.read_lines(self.log_page_start, LOG_PAGE_SIZE))
+        if highlight_line is not None:
+            text_line = highlight_line - self.log_page_start + 1
+            self.log_scrolled_text.tag_add('match', f"{text_line}.0", f"{text_line}.end")
+            self.log_scrolled_text.see(f"{text_line}.0")
         self.log_scrolled_text.config(state=tk.DISABLED)
 
+        status = "" if log_file.indexed.is_set() else " (indexing...)"
+        last_line = min(self.log_page_start + LOG_PAGE_SIZE, line_count)
+        self.log_page_var.set(f"{log_file.path}: lines {self.log_page_start + 1}-{last_line} of {line_count}{status}")
+
+    def show_last_log_page(self):
+        if self.log_file is not None:
+            self.show_log_page(self.log_file.line_count() - LOG_PAGE_SIZE)
 
-    #If the tab is visible then update what is displayed.
-    def on_tab_visibility(self, tab, update_func):
-        if tab.winfo_ismapped():
-            update_func()
+    def goto_log_line(self, line_text):
+        try:
+            line = int(line_text) - 1
+        except ValueError:
+            messagebox.showwarning("Error", "Please enter a line number.")
+            return
+        self.show_log_page(line - LOG_PAGE_SIZE // 2, highlight_line=line)
+
+    def search_log(self, pattern, use_regex, ignore_case):
+        if self.log_file is None or not pattern:
+            return
+        # Only the latest search is of interest.
+        self.log_search_cancelled.set()
+        cancelled = threading.Event()
+        self.log_search_cancelled = cancelled
+        log_file = self.log_file
+        self.log_search_var.set("Searching...")
+        collect = lambda: log_file.search(pattern, use_regex, ignore_case, cancelled)
+        self.scheduler.run_in_background('log.search', collect, lambda matches, error: self.on_log_search_done(log_file, matches, error))
+
+    def on_log_search_done(self, log_file, matches, error):
+        if log_file is not self.log_file:
+            return
+        if error is not None:
+            self.log_search_var.set(f"Search failed: {error}")
+            return
+        # None means the search was cancelled by a newer one, which owns the status.
+        if matches is None:
+            return
+        self.log_matches = matches
+        self.log_match_index = -1
+        if matches:
+            self.goto_log_match(1)
+        else:
+            self.log_search_var.set("No matches")
+
+    def goto_log_match(self, step):
+        if not self.log_matches:
+            return
+        self.log_match_index = (self.log_match_index + step) % len(self.log_matches)
+        line = self.log_matches[self.log_match_index]
+        self.log_search_var.set(f"Match {self.log_match_index + 1} of {len(self.log_matches)} (line {line + 1})")
+        self.show_log_page(line - LOG_PAGE_SIZE // 2, highlight_line=line)
 
     def create_system_tab_content(self, parent):
-        system_info = self.compile_system_information_list()
         system_frame = ttk.Frame(parent)
         system_frame.pack(expand=True, fill='both')
 
         image_label = self.get_system_image()
         image_label.pack(pady=10)
 
-        tree = self.create_treeview(system_frame, ('Property', 'Value'))
-        self.populate_treeview(tree, system_info)
-        tree.pack(expand=True, fill='both', padx=10, pady=10)
+        refresh_button = ttk.Button(system_frame, text="Refresh",
+                                    command=lambda: self.scheduler.run_in_background('hardware.refresh',
+                                                                                     self.hardware_probes.refresh_dynamic,
+                                                                                     self.show_system_information))
+        refresh_button.pack(pady=5)
+
+        self.system_treeview = self.create_treeview(system_frame, ('Property', 'Value'))
+        self.populate_treeview(self.system_treeview, [('Loading...', '')])
+        self.system_treeview.pack(expand=True, fill='both', padx=10, pady=10)
+
+        self.scheduler.run_in_background('hardware', self.compile_system_information_list, self.show_system_information)
+
+        self.create_io_rates_frame(system_frame, parent)
+        self.create_trends_frame(system_frame)
+        self.system_tab = parent
+
+    # Per-interface and per-disk rates, sampled on a worker while the System tab is shown.
+    def create_io_rates_frame(self, parent, tab):
+        io_frame = ttk.LabelFrame(parent, text="Network and Disk I/O")
+        io_frame.pack(fill='x', padx=10, pady=(0, 10))
+
+        interfaces_frame = ttk.Frame(io_frame)
+        interfaces_frame.pack(fill='x', padx=5, pady=5)
+        self.interfaces_treeview = self.create_treeview(interfaces_frame, ('Interface', 'Addresses', 'In', 'Out',
+                                                                           'Packets In', 'Packets Out', 'Errors'))
+        self.interfaces_treeview.configure(height=5)
+        self.interfaces_treeview.pack(fill='x')
+
+        disks_frame = ttk.Frame(io_frame)
+        disks_frame.pack(fill='x', padx=5, pady=(0, 5))
+        self.disks_treeview = self.create_treeview(disks_frame, ('Disk', 'Mounted On', 'Reads', 'Writes',
+                                                                 'Read', 'Written', 'Busy'))
+        self.disks_treeview.configure(height=5)
+        self.disks_treeview.pack(fill='x')
+
+        self.arc_var = tk.StringVar(value="ZFS ARC: not available")
+        ttk.Label(io_frame, textvariable=self.arc_var).pack(anchor='w', padx=5, pady=(0, 5))
+
+        self.io_rate_sampler = IoRateSampler()
+        self.scheduler.add_job('io_rates', self.show_io_rates, IO_RATES_INTERVAL, widget=tab,
+                               collect=self.io_rate_sampler.sample)
+
+    def show_io_rates(self, sample):
+        interface_formatters = (format_rate, format_rate, format_count_rate, format_count_rate, format_count_rate)
+        self.sync_treeview_rows(self.interfaces_treeview,
+                                [format_io_row(row, interface_formatters) for row in sample['interfaces']])
+        disk_formatters = (format_count_rate, format_count_rate, format_rate, format_rate, format_percent)
+        self.sync_treeview_rows(self.disks_treeview, [format_io_row(row, disk_formatters) for row in sample['disks']])
+        arc = sample['arc']
+        if arc is None:
+            self.arc_var.set("ZFS ARC: not available")
+        else:
+            hit_percent, hits, misses = arc
+            ratio = "idle" if hit_percent is None else f"{format_percent(hit_percent)} hits"
+            self.arc_var.set(f"ZFS ARC: {ratio}, {format_count_rate(hits)} hits, {format_count_rate(misses)} misses")
+
+    def create_trends_frame(self, parent):
+        trends_frame = ttk.LabelFrame(parent, text="Trends")
+        trends_frame.pack(fill='x', padx=10, pady=10)
+
+        for row, (title, name, maximum, formatter) in enumerate(TREND_CHARTS):
+            column = (row % 2) * 3
+            ttk.Label(trends_frame, text=title).grid(row=row // 2, column=column, sticky='w', padx=5)
+            sparkline = Sparkline(trends_frame, maximum=maximum)
+            sparkline.grid(row=row // 2, column=column + 1, padx=5, pady=2)
+            value_var = tk.StringVar()
+            ttk.Label(trends_frame, textvariable=value_var, width=14).grid(row=row // 2, column=column + 2, sticky='w')
+            self.sparklines.append((name, sparkline, value_var, formatter))
+
+        cores_frame = ttk.LabelFrame(parent, text="CPU per core")
+        cores_frame.pack(fill='x', padx=10, pady=(0, 10))
+        columns = 4
+        for core in range(self.metrics_sampler.core_count):
+            ttk.Label(cores_frame, text=f"{core}").grid(row=core // columns, column=(core % columns) * 3, sticky='e', padx=(5, 2))
+            sparkline = Sparkline(cores_frame, width=120, height=20, maximum=100)
+            sparkline.grid(row=core // columns, column=(core % columns) * 3 + 1, pady=1)
+            value_var = tk.StringVar()
+            ttk.Label(cores_frame, textvariable=value_var, width=7).grid(row=core // columns, column=(core % columns) * 3 + 2, sticky='w')
+            self.sparklines.append((f'cpu{core}', sparkline, value_var, format_percent))
+
+        replay_button = ttk.Button(parent, text="Replay Day...", command=self.open_replay_dialog)
+        replay_button.pack(anchor='e', padx=10, pady=(0, 10))
+
+    # Runs every second whichever tab is shown, the charts only catch up while they are visible.
+    def record_metrics(self, sample):
+        timestamp, values = sample
+        self.metrics_history.append(timestamp, values)
+        if not self.sparklines or not self.system_tab.winfo_ismapped():
+            return
+        for name, sparkline, value_var, formatter in self.sparklines:
+            sparkline.update_from(self.metrics_history.series[name])
+            value_var.set(formatter(sparkline.last_value))
+
+    # The Processes tab and the recorder share one sampler, which is not safe to call from
+    # two workers at once.
+    def sample_processes(self):
+        with self.process_sample_lock:
+            snapshot = self.process_sampler.sample()
+            self.latest_process_sample = (time.monotonic(), snapshot)
+            return snapshot
+
+    def collect_top_processes(self):
+        latest = self.latest_process_sample
+        if latest is not None and time.monotonic() - latest[0] < RECORD_INTERVAL / 1000:
+            snapshot = latest[1]
+        else:
+            snapshot = self.sample_processes()
+        return top_processes(snapshot, self.metrics_recorder.top_count)
+
+    def record_metrics_row(self, processes):
+        history = self.metrics_history
+        if history.total == 0:
+            return
+        values = {name: ring.last(1)[0] for name, ring in history.series.items()}
+        self.metrics_recorder.record(history.timestamps.last(1)[0], values, processes)
+
+    def open_replay_dialog(self):
+        days = recorded_days()
+        if not days:
+            messagebox.showinfo("Replay Day", "No metrics have been recorded yet.")
+            return
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Replay Day")
+        dates = {date.strftime('%d.%m.%Y'): date for file_name, date in days}
+        day_var = tk.StringVar(value=list(dates)[-1])
+        ttk.Label(dialog, text="Day:").pack(side='left', padx=5, pady=10)
+        ttk.Combobox(dialog, textvariable=day_var, values=list(dates), state='readonly', width=12).pack(side='left', pady=10)
+
+        def show():
+            date = dates[day_var.get()]
+            dialog.destroy()
+            self.scheduler.run_in_background('replay.load', lambda: load_metrics_day(date),
+                                             lambda history, error: self.show_replay(date, history, error))
+
+        ttk.Button(dialog, text="Show", command=show).pack(side='left', padx=5, pady=10)
+
+    # Shows a whole recorded day, each chart point is the average of the samples it covers.
+    def show_replay(self, date, history, error):
+        if error is not None:
+            messagebox.showerror("Replay Day", f"Could not load the metrics of {date.strftime('%d.%m.%Y')}: {error}")
+            return
+        window = tk.Toplevel(self.root)
+        window.title(f"Metrics of {date.strftime('%d.%m.%Y')}")
+        count = len(history.timestamps)
+        if count == 0:
+            ttk.Label(window, text="No samples were recorded on this day.").pack(padx=10, pady=10)
+            return
+        timestamps = history.timestamps.last(count)
+        span = f"{datetime.fromtimestamp(timestamps[0]):%H:%M:%S} - {datetime.fromtimestamp(timestamps[-1]):%H:%M:%S}"
+        ttk.Label(window, text=f"{span}, {count} samples").grid(row=0, column=0, columnspan=3, sticky='w', padx=5, pady=5)
+
+        width = 480
+        for row, (title, name, maximum, formatter) in enumerate(TREND_CHARTS, start=1):
+            if name not in history.series:
+                continue
+            values = history.series[name].last(count)
+            ttk.Label(window, text=title).grid(row=row, column=0, sticky='w', padx=5)
+            sparkline = Sparkline(window, width=width, height=50, step=1, maximum=maximum)
+            sparkline.grid(row=row, column=1, padx=5, pady=2)
+            buckets = min(width + 1, len(values))
+            for bucket in range(buckets):
+                chunk = values[bucket * len(values) // buckets:(bucket + 1) * len(values) // buckets]
+                sparkline.add(sum(chunk) / len(chunk))
+            summary = f"avg {formatter(sum(values) / len(values))}, max {formatter(max(values))}"
+            ttk.Label(window, text=summary).grid(row=row, column=2, sticky='w', padx=5)
+
+    def show_system_information(self, system_info, error):
+        if error is not None:
+            print(f"Error compiling system information: {error}")
+            return
+        self.system_treeview.delete(*self.system_treeview.get_children())
+        self.populate_treeview(self.system_treeview, system_info)
 
     def create_settings_tab_content(self, parent):
+        self.setting_boxes = []
+
         settings_frame = ttk.Frame(parent)
         settings_frame.pack(expand=True, fill='both')
 
+        run_frame = ttk.Frame(settings_frame)
+        run_frame.pack(pady=5)
+
+        run_selected_button = ttk.Button(run_frame, text="Run Selected",
+                                         command=lambda: self.run_commands([box for box in self.setting_boxes if box['selected_var'].get()]))
+        run_selected_button.pack(side=tk.LEFT, padx=5)
+
+        run_all_button = ttk.Button(run_frame, text="Run All", command=lambda: self.run_commands(self.setting_boxes))
+        run_all_button.pack(side=tk.LEFT, padx=5)
+
+        limit_label = ttk.Label(run_frame, text="Max parallel:")
+        limit_label.pack(side=tk.LEFT, padx=5)
+
+        limit_var = tk.StringVar(value=str(self.command_runner.limit))
+        trace_spinbox(limit_var, 1, 16, self.command_runner.set_limit)
+        limit_spinbox = ttk.Spinbox(run_frame, from_=1, to=16, width=4, textvariable=limit_var)
+        limit_spinbox.pack(side=tk.LEFT, padx=5)
+
         scroll_view = ttk.Frame(settings_frame)
         scroll_view.pack(expand=True, fill='both', padx=10, pady=10)
 
@@ -118,165 +1201,176 @@ class SystemInfo:
         applications_label = ttk.Label(applications_frame, text="Installed Applications:")
         applications_label.pack(pady=5)
 
-        self.applications_listbox = tk.Listbox(applications_frame, selectmode=tk.SINGLE)
-        self.applications_listbox.pack(expand=True, fill='both', pady=10)
+        filter_frame = ttk.Frame(applications_frame)
+        filter_frame.pack(fill='x', padx=10)
+        ttk.Label(filter_frame, text="Filter:").pack(side=tk.LEFT, padx=5)
+        self.applications_filter_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.applications_filter_var).pack(side=tk.LEFT, expand=True, fill='x', padx=5)
+        self.applications_filter_var.trace_add('write', lambda *args: self.filter_applications())
+
+        tree_frame = ttk.Frame(applications_frame)
+        tree_frame.pack(expand=True, fill='both', padx=10, pady=10)
+        self.applications_treeview = self.create_treeview(tree_frame, ('Name', 'Version', 'Size', 'Description'))
+        self.applications_treeview.configure(selectmode='extended')
+        self.applications_treeview.tag_configure('removing', foreground='gray')
+        for column, width, anchor in (('Name', 220, 'w'), ('Version', 110, 'w'), ('Size', 90, 'e'), ('Description', 420, 'w')):
+            self.applications_treeview.column(column, width=width, anchor=anchor, stretch=(column == 'Description'))
+        self.applications_treeview.pack(expand=True, fill='both')
+        self.package_index = None
+
+        self.applications_status_var = tk.StringVar(value="Loading packages...")
+        ttk.Label(applications_frame, textvariable=self.applications_status_var).pack(pady=5)
 
         app_name_var = tk.StringVar()
-        app_name_entry_label = ttk.Label(applications_frame, text="Selected Application:")
+        app_name_entry_label = ttk.Label(applications_frame, text="Selected Applications:")
         app_name_entry_label.pack(pady=5)
 
         app_name_entry = ttk.Entry(applications_frame, textvariable=app_name_var)
         app_name_entry.pack(pady=5)
 
-        uninstall_button = ttk.Button(applications_frame, text="Uninstall Application", command=lambda: self.handle_uninstall_button(app_name_var))
+        uninstall_button = ttk.Button(applications_frame, text="Uninstall Applications", command=lambda: self.handle_uninstall_button(app_name_var))
         uninstall_button.pack(pady=5)
 
-        self.applications_listbox.bind('<<ListboxSelect>>', lambda event, app_name_var=app_name_var: self.handle_app_selection(app_name_var))
+        removal_frame = ttk.Frame(applications_frame)
+        removal_frame.pack(fill='x', padx=10, pady=5)
+        self.removal_progress = ttk.Progressbar(removal_frame, mode='determinate')
+        self.removal_progress.pack(side=tk.LEFT, expand=True, fill='x', padx=5)
+        self.removal_status_var = tk.StringVar()
+        ttk.Label(removal_frame, textvariable=self.removal_status_var).pack(side=tk.LEFT, padx=5)
+        self.removal_output = scrolledtext.ScrolledText(applications_frame, height=6, wrap=tk.WORD, state=tk.DISABLED)
+        self.removal_output.tag_configure('stderr', foreground='red')
+        self.removal_output.pack(fill='x', padx=10, pady=(0, 10))
+
+        # Removals run one batch at a time; whatever is queued meanwhile becomes the next batch.
+        self.removal_queue = self.collector.package_removal_queue(
+            on_output=lambda stream, text: self.scheduler.post(self.append_removal_output, stream, text),
+            on_progress=lambda done, total, package: self.scheduler.post(self.set_removal_progress, done, total, package),
+            on_finished=lambda names, removed, status, returncode: self.scheduler.post(
+                self.finish_removal, names, removed, status, returncode))
+
+        self.applications_treeview.bind('<<TreeviewSelect>>', lambda event, app_name_var=app_name_var: self.handle_app_selection(app_name_var))
 
-        installed_apps = self.get_installed_applications_with_description()
-        self.update_applications_listbox_data(installed_apps)
+        # Reloading is a stat() of the pkg database unless it changed.
+        self.scheduler.add_job('packages', self.update_applications_data, 10000, widget=parent,
+                               collect=self.collector.package_inventory.load)
 
 
     def handle_uninstall_button(self, app_name_var):
-        app_name = app_name_var.get()
-        if not app_name:
+        app_names = app_name_var.get().split()
+        if not app_names:
             messagebox.showwarning("Error", "Please select an application to uninstall.")
             return
 
         # Confirm uninstallation
-        confirmation = messagebox.askyesno("Confirm Uninstall", f"Are you sure you want to uninstall {app_name}?")
+        if len(app_names) == 1:
+            question = f"Are you sure you want to uninstall {app_names[0]}?"
+        else:
+            question = f"Are you sure you want to uninstall these {len(app_names)} applications?\n\n" + ", ".join(app_names)
+        confirmation = messagebox.askyesno("Confirm Uninstall", question)
         if not confirmation:
             return
 
-        # Call uninstall_application with the actual app_name, not the app_name_var
-        self.uninstall_application(app_name)
+        self.uninstall_applications(app_names)
 
     def handle_app_selection(self, app_name_var):
-        selected_index = self.applications_listbox.curselection()
-        if selected_index:
-            app_info = self.applications_listbox.get(selected_index)
-            app_name, app_description = self.parse_app_info(app_info)
-            app_name_var.set(app_name)
-            self.app_description_var.set(app_description)
+        selection = self.applications_treeview.selection()
+        if selection:
+            packages = [self.package_index.packages[int(iid)] for iid in selection]
+            app_name_var.set(" ".join(package[0] for package in packages))
+            self.app_description_var.set(packages[-1][3])
 
 #Get information about the hardware, if available.  Will put "not available" if it cannot get the info.
     def compile_system_information_list(self):
-        system_info = []
-
-        os_info = [('Operating System', platform.system()), ('OS Version', platform.version())]
-        system_info.extend(os_info)
-
-        cpu_info = [('CPU Name', cpuinfo.get_cpu_info()['brand_raw']),
-                    ('CPU Core Count', psutil.cpu_count(logical=False)),
-                    ('CPU Speed', f"{psutil.cpu_freq().current} MHz")]
-        system_info.extend(cpu_info)
-
-        gpu_name, gpu_driver, vram = self.get_freebsd_gpu_info()
-        if gpu_name is not None:
-            gpu_info = [('GPU Name', gpu_name), ('GPU Driver', gpu_driver), ('VRAM', vram)]
-            system_info.extend(gpu_info)
-        else:
-            system_info.append(('GPU Information', 'Not available'))
-
-        mem = psutil.virtual_memory()
-        memory_info = [('Available RAM', f"{mem.available / (1024 ** 3):.2f} GB")]
-        system_info.extend(memory_info)
-
-        root_partition = psutil.disk_usage('/')
-        storage_info = [('Hard Drive Name', '/'), ('Total Space', f"{root_partition.total / (1024 ** 3):.2f} GB"),
-                        ('Used Space', f"{root_partition.used / (1024 ** 3):.2f} GB"),
-                        ('Free Space', f"{(root_partition.total - root_partition.used) / (1024 ** 3):.2f} GB")]
-        system_info.extend(storage_info)
-
-        # Run ifconfig and extract interface and IP address
-        ifconfig_output = subprocess.run(['ifconfig'], capture_output=True, text=True, check=True)
-        for line in ifconfig_output.stdout.split('\n'):
-            if line and line.split()[0][-1] == ':' and (line.startswith('wlan') or line.startswith('em')):
-                iface = line.split()[0]
-            elif 'inet ' in line:
-                ip_address = line.split()[1]
-                system_info.append((iface, ip_address))
-
-        return system_info
+        return self.hardware_probes.collect()
 
 #Get the image to display at the bottom of the screen.  Modify this to any image you'd like.
     def get_system_image(self):
-        original_image = Image.open("./resources/system_image.jpg")
-        resized_image = original_image.resize((150, 150), Image.BICUBIC)
-        tk_image = ImageTk.PhotoImage(resized_image)
+        tk_image = tk.PhotoImage(file=self.get_cached_system_image())
         image_label = tk.Label(self.root, image=tk_image, anchor='center')
         image_label.image = tk_image
         return image_label
 
-    def get_freebsd_gpu_info(self):
-        try:
-            # Run pciconf to get PCI device information
-            result = subprocess.run(['pciconf', '-lv'], capture_output=True, text=True, check=True)
-
-            # Search for the GPU information in the output
-            gpu_name, gpu_driver, vram = None, None, None
-            for line in result.stdout.split('\n'):
-                if 'vgapci' in line.lower():
-                    # Extract GPU information (you might need to adjust this based on your output format)
-                    match = re.search(r'Device: (.+?),', line)
-                    gpu_name = match.group(1).strip() if match else None
-
-                    match = re.search(r'driver: (.+)', line)
-                    gpu_driver = match.group(1).strip() if match else None
-
-                    match = re.search(r'Memory: (.+)', line)
-                    vram = match.group(1).strip() if match else None
-
-                    break
-
-            return gpu_name, gpu_driver, vram
-
-        except subprocess.CalledProcessError as e:
-            print(f"Error running pciconf command: {e}")
-            return None, None, None
-        except Exception as e:
-            print(f"Error: {e}")
-            return None, None, None
-
-#Use pkg info to get the names of installed applications
-    def get_installed_applications_with_description(self):
+    # Tk reads PNG natively, so PIL is only needed when the resized copy is missing or older
+    # than the source image.
+    def get_cached_system_image(self):
+        width, height = SYSTEM_IMAGE_SIZE
+        cached_path = os.path.join(CACHE_DIR, f"system_image_{width}x{height}.png")
         try:
-            result = subprocess.run(["pkg", "info"], capture_output=True, text=True)
-            installed_apps_info = result.stdout.splitlines()
-            return [self.parse_app_info(app_info) for app_info in installed_apps_info]
-        except Exception as e:
-            print(f"Error getting installed applications: {e}")
-            return []
-
-    def parse_app_info(self, app_info):
-        parts = app_info.split(' ', 1)
-        name_version = parts[0]
-        description = parts[1] if len(parts) > 1 else ""
-        app_name = re.sub(r'[-._](\d+)', '', name_version)
-        return app_name.strip(), description
-
-    def update_applications_treeview_data(self, data):
-        for item in self.applications_treeview.get_children():
-            self.applications_treeview.delete(item)
-        for item in data:
-            self.applications_treeview.insert("", "end", values=item)
-
-
-    def update_applications_listbox_data(self, data):
-        self.applications_listbox.delete(0, tk.END)
-        for name_version, description in data:
-            self.applications_listbox.insert(tk.END, name_version)
-
-    def uninstall_application(self, app_name):
-        try:
-            uninstall_command = f"pkg delete -y {app_name}"
-            subprocess.run(uninstall_command, shell=True, text=True, check=True,)
-            installed_apps = self.get_installed_applications_with_description()
-            self.update_applications_listbox_data(installed_apps)
-        except subprocess.CalledProcessError as e:
-            print(f"Error uninstalling application: {e}")
-        except Exception as e:
-            print(f"Error uninstalling application: {e}")
+            if os.path.getmtime(cached_path) >= os.path.getmtime(SYSTEM_IMAGE):
+                return cached_path
+        except OSError:
+            pass
+
+        from PIL import Image
+
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        original_image = Image.open(SYSTEM_IMAGE)
+        resized_image = original_image.resize(SYSTEM_IMAGE_SIZE, Image.BICUBIC)
+        resized_image.save(cached_path, "PNG")
+        return cached_path
+
+    # Rows are inserted once per inventory, with the package's position in the index as iid,
+    # so filtering only has to swap the list of attached rows.
+    def update_applications_data(self, index):
+        if index is self.package_index:
+            return
+        self.package_index = index
+        tree = self.applications_treeview
+        tree.delete(*tree.get_children())
+        for position, (name, version, size, description) in enumerate(index.packages):
+            tree.insert('', 'end', iid=str(position), values=(name, version, format_size(size), description))
+        self.filter_applications()
+
+    def filter_applications(self):
+        if self.package_index is None:
+            return
+        with self.timings.span('packages.filter'):
+            positions = self.package_index.search(self.applications_filter_var.get())
+            self.applications_treeview.set_children('', *map(str, positions))
+        self.applications_status_var.set(f"{len(positions)} of {len(self.package_index)} packages")
+
+    def show_reloaded_applications(self, index, error):
+        if error is not None:
+            print(f"Error getting installed applications: {error}")
+            return
+        self.update_applications_data(index)
+
+    def uninstall_applications(self, app_names):
+        with self.timings.span('packages.remove'):
+            for app_name in app_names:
+                position = self.package_index.position(app_name) if self.package_index else None
+                if position is not None:
+                    self.applications_treeview.item(str(position), tags=('removing',))
+            self.removal_queue.enqueue(app_names)
+            queued = self.removal_queue.queued()
+        self.removal_status_var.set(f"{len(queued)} queued for removal")
+
+    def append_removal_output(self, stream, text):
+        self.removal_output.config(state=tk.NORMAL)
+        self.removal_output.insert(tk.END, text, (stream,))
+        self.removal_output.see(tk.END)
+        self.removal_output.config(state=tk.DISABLED)
+
+    def set_removal_progress(self, done, total, package):
+        self.removal_progress.configure(maximum=total, value=done)
+        self.removal_status_var.set(f"Removing {package} ({done}/{total})")
+
+    # A clean run only drops the removed rows, after a failure the inventory is read again
+    # since there is no telling what pkg got to.
+    def finish_removal(self, names, removed, status, returncode):
+        if status == 'ok':
+            positions = self.collector.package_inventory.remove(removed)
+            if self.package_index is not None:
+                iids = [str(position) for position in positions if self.applications_treeview.exists(str(position))]
+                self.applications_treeview.delete(*iids)
+                self.filter_applications()
+            self.removal_status_var.set(f"Removed {len(positions)} package(s)")
+        else:
+            print(f"Error uninstalling applications {' '.join(names)}: pkg delete {status}, exit code {returncode}")
+            self.removal_status_var.set(f"Removal failed (exit {returncode})")
+            self.collector.package_inventory.invalidate()
+            self.scheduler.run_in_background('packages.reload', self.collector.package_inventory.load,
+                                             self.show_reloaded_applications)
 
     def create_treeview(self, parent, columns):
         tree = ttk.Treeview(parent, columns=columns, show='headings')
@@ -291,6 +1385,20 @@ class SystemInfo:
         for item in data:
             tree.insert("", "end", values=item)
 
+    # Brings a Treeview in line with rows keyed by their first value, touching only the rows
+    # that changed.
+    def sync_treeview_rows(self, tree, rows):
+        keys = {row[0] for row in rows}
+        stale = [iid for iid in tree.get_children() if iid not in keys]
+        if stale:
+            tree.delete(*stale)
+        for index, row in enumerate(rows):
+            key = row[0]
+            if not tree.exists(key):
+                tree.insert("", index, iid=key, values=row)
+            elif tuple(tree.item(key, 'values')) != row:
+                tree.item(key, values=row)
+
     def create_setting_box(self, setting, parent):
         def update_entry_height():
             entry_lines = int(entry_command.index('end-1c').split('.')[0])
@@ -298,8 +1406,9 @@ class SystemInfo:
 
         box = ttk.Frame(parent)
 
-        label_name = ttk.Label(box, text=setting["name"])
-        label_name.grid(row=0, column=0, sticky='w')
+        selected_var = tk.BooleanVar(value=False)
+        check_name = ttk.Checkbutton(box, text=setting["name"], variable=selected_var)
+        check_name.grid(row=0, column=0, sticky='w')
 
         label_description = ttk.Label(box, text=setting["description"])
         label_description.grid(row=1, column=0, sticky='w')
@@ -309,92 +1418,304 @@ class SystemInfo:
         entry_command.insert(tk.END, command_var.get())
         entry_command.grid(row=2, column=0, sticky='w')
 
-        output_text = scrolledtext.ScrolledText(box, height=4, wrap=tk.WORD)
+        output_text = scrolledtext.ScrolledText(box, height=4, wrap=tk.WORD, state=tk.DISABLED)
+        output_text.tag_configure('stderr', foreground='red')
         output_text.grid(row=3, column=0, sticky='w')
 
-        btn_run = ttk.Button(box, text="Run", command=lambda: self.run_command(setting, entry_command, output_text))
-        btn_run.grid(row=4, column=0, pady=5)
+        controls_frame = ttk.Frame(box)
+        controls_frame.grid(row=4, column=0, pady=5)
 
-        box.after(100, update_entry_height)
+        controls = {
+            'setting': setting,
+            'command_text': entry_command,
+            'output_text': output_text,
+            'selected_var': selected_var,
+            'timeout_var': tk.StringVar(value=setting.get("timeout", "")),
+            'status_var': tk.StringVar(value="Not run"),
+            'run': None,
+        }
+        self.setting_boxes.append(controls)
 
-        return box
+        btn_run = ttk.Button(controls_frame, text="Run", command=lambda: self.run_command(controls))
+        btn_run.pack(side=tk.LEFT, padx=5)
 
-    def run_command(self, setting, command_var, output_text):
-        modified_command = command_var.get()
+        btn_cancel = ttk.Button(controls_frame, text="Cancel", command=lambda: self.cancel_command(controls))
+        btn_cancel.pack(side=tk.LEFT, padx=5)
 
-        requires_sudo = any(keyword in modified_command.lower() for keyword in ['pkg', 'delete', 'install'])
+        timeout_label = ttk.Label(controls_frame, text="Timeout (s):")
+        timeout_label.pack(side=tk.LEFT, padx=5)
 
-        if requires_sudo and not modified_command.strip().lower().startswith('sudo '):
-            modified_command = f'sudo {modified_command}'
+        timeout_entry = ttk.Entry(controls_frame, textvariable=controls['timeout_var'], width=6)
+        timeout_entry.pack(side=tk.LEFT, padx=5)
 
-        try:
-            result = subprocess.run(modified_command, shell=True, capture_output=True, text=True)
-            output = result.stdout
-            if result.returncode != 0:
-                output += "\nError: " + result.stderr
-        except Exception as e:
-            output = f"Error: {e}"
+        controls['status_label'] = ttk.Label(controls_frame, textvariable=controls['status_var'])
+        controls['status_label'].pack(side=tk.LEFT, padx=5)
 
-        setting["command"] = modified_command
+        box.after(100, update_entry_height)
 
-        with open("settings.json", 'w') as file:
-            json.dump(self.settings_data, file, indent=2)
+        return box
 
-        output_text.config(state=tk.NORMAL)
-        output_text.delete(1.0, tk.END)
-        output_text.insert(tk.END, output)
-        output_text.config(state=tk.DISABLED)
+    def run_commands(self, boxes):
+        for controls in boxes:
+            self.run_command(controls)
 
-    def schedule_update_processes(self):
-        self.update_processes_data()
-        self.root.after(2000, self.schedule_update_processes)
+    # The command runs on the CommandRunner, its output and exit status come back through the scheduler.
+    def run_command(self, controls):
+        run = controls['run']
+        if run is not None and run.status in ('queued', 'running'):
+            return
 
-    def update_processes_treeview_data(self, data):
-        for item in self.processes_treeview.get_children():
-            self.processes_treeview.delete(item)
-        for item in data:
-            self.processes_treeview.insert("", "end", values=item)
+        modified_command = controls['command_text'].get('1.0', 'end-1c').strip()
+        if not modified_command:
+            return
 
-    def update_process_treeview_data(self, data):
-        for item in self.processes_treeview.get_children():
-            self.processes_treeview.delete(item)
-        for item in data:
-            self.processes_treeview.insert("", "end", values=item)
+        try:
+            timeout_text = controls['timeout_var'].get().strip()
+            timeout = float(timeout_text) if timeout_text else None
+        except ValueError:
+            messagebox.showwarning("Error", "The timeout must be a number of seconds.")
+            return
+
+        requires_sudo = any(keyword in modified_command.lower() for keyword in ['pkg', 'delete', 'install'])
 
-    def update_processes_data(self):
-        processes = []
+        if requires_sudo and not modified_command.strip().lower().startswith('sudo '):
+            modified_command = f'sudo {modified_command}'
 
-        for process in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 'status']):
-            process_info = (process.info['name'], process.info['pid'],
-                            f"{process.info['cpu_percent']:.2f}", f"{process.info['memory_percent']:.2f}",
-                            process.info['status'])
-            processes.append(process_info)
+        setting = controls['setting']
+        setting["command"] = modified_command
+        if timeout:
+            setting["timeout"] = timeout
+        else:
+            setting.pop("timeout", None)
+        self.schedule_settings_save()
+
+        with self.timings.span('settings.run'):
+            output_text = controls['output_text']
+            output_text.config(state=tk.NORMAL)
+            output_text.delete(1.0, tk.END)
+            output_text.config(state=tk.DISABLED)
+            run = CommandRun(modified_command,
+                             on_output=lambda stream, text: self.scheduler.post(self.append_command_output, controls, stream, text),
+                             on_exit=lambda status, returncode: self.command_exited(controls, run, status, returncode),
+                             timeout=timeout,
+                             on_start=lambda: self.scheduler.post(self.set_command_status, controls, 'running', None))
+            controls['run'] = run
+            self.set_command_status(controls, 'queued', None)
+            self.command_runner.submit(run)
+
+    # Called on the runner's thread.  How long the command itself ran is timed as
+    # "settings.command".
+    def command_exited(self, controls, run, status, returncode):
+        if run.elapsed is not None:
+            self.timings.record('settings.command', run.elapsed)
+        self.scheduler.post(self.set_command_status, controls, status, returncode)
+
+    def cancel_command(self, controls):
+        if controls['run'] is not None:
+            controls['run'].cancel()
+
+    def append_command_output(self, controls, stream, text):
+        output_text = controls['output_text']
+        output_text.config(state=tk.NORMAL)
+        output_text.insert(tk.END, text, (stream,))
+        output_text.see(tk.END)
+        output_text.config(state=tk.DISABLED)
 
-        processes.sort(key=lambda x: int(x[1]))
+    def set_command_status(self, controls, status, returncode):
+        badges = {
+            'queued': ("Queued", 'gray'),
+            'running': ("Running...", 'blue'),
+            'ok': (f"Exit {returncode}", 'dark green'),
+            'failed': (f"Exit {returncode}" if returncode is not None else "Failed", 'red'),
+            'cancelled': ("Cancelled", 'dark orange'),
+            'timed out': ("Timed out", 'dark orange'),
+        }
+        text, color = badges[status]
+        controls['status_var'].set(text)
+        controls['status_label'].config(foreground=color)
+
+    # Several edits in a row end up as a single write of the settings file.
+    def schedule_settings_save(self):
+        if self.settings_save_id is not None:
+            self.root.after_cancel(self.settings_save_id)
+        self.settings_save_id = self.root.after(SETTINGS_SAVE_DELAY, self.save_settings)
+
+    # Settings saved to the old location are moved over once; the old file is kept as a
+    # backup and only renamed after its contents were written to the new one.
+    def load_settings(self):
+        if not os.path.exists(LEGACY_SETTINGS_FILE):
+            self.settings_data = self.read_settings_from_json(SETTINGS_FILE)
+            return
+        self.settings_data = self.read_settings_from_json(LEGACY_SETTINGS_FILE)
+        if self.save_settings():
+            try:
+                os.replace(LEGACY_SETTINGS_FILE, LEGACY_SETTINGS_FILE + '.bak')
+            except OSError as e:
+                print(f"Error moving old settings: {e}")
+
+    def save_settings(self):
+        self.settings_save_id = None
+        try:
+            with open(SETTINGS_FILE, 'w') as file:
+                json.dump(self.settings_data, file, indent=4)
+        except OSError as e:
+            print(f"Error saving settings: {e}")
+            return False
+        return True
+
+    def update_processes_data(self, snapshot):
+        self.processes_model.update(snapshot)
+        self.active_process_view().render()
+
+        stats = self.scheduler.stats('processes')
+        self.processes_status_var.set(f"{len(snapshot)} processes, last refresh took {stats['last_cost'] * 1000:.0f} ms, "
+                                      f"refreshing every {stats['interval'] / 1000:.1f} s")
+
+    def filter_processes(self, column_name, text):
+        column = ProcessTableModel.COLUMNS.index(column_name)
+        self.active_process_view().set_filter(column, text)
+
+    def active_process_view(self):
+        return self.processes_tree_view if self.process_tree_var.get() else self.processes_view
+
+    def toggle_process_tree(self):
+        hidden, shown = self.processes_view, self.processes_tree_view
+        if not self.process_tree_var.get():
+            hidden, shown = shown, hidden
+        hidden.pack_forget()
+        shown.pack(expand=True, fill='both')
+        shown.update_headings()
+        shown.render()
+
+    # Details are read on a worker once the selection settles, a quick run over many rows only
+    # fetches the last one.
+    def request_process_details(self, pid):
+        if self.process_details_after_id is not None:
+            self.root.after_cancel(self.process_details_after_id)
+        self.process_details_pid = pid
+        self.process_details_after_id = self.root.after(150, self.load_process_details, pid)
+
+    def load_process_details(self, pid):
+        self.process_details_after_id = None
+        self.scheduler.run_in_background('process_details', lambda: self.process_details.get(pid),
+                                         lambda details, error: self.show_process_details(pid, details, error))
+
+    def show_process_details(self, pid, details, error):
+        if pid != self.process_details_pid:
+            return
+        tree = self.process_details_tree
+        tree.delete(*tree.get_children())
+        if error is not None:
+            tree.insert('', 'end', text="PID", values=(pid,))
+            tree.insert('', 'end', text="Details", values=("The process has exited." if isinstance(error, psutil.NoSuchProcess)
+                                                           else f"Not available: {error}",))
+            return
 
-        self.update_processes_treeview_data(processes)
+        unavailable = "not available"
+        memory = details['memory']
+        io = details['io']
+        rows = [
+            ("PID", pid),
+            ("Command line", details['command_line'] or unavailable),
+            ("User", details['username'] or unavailable),
+            ("Threads", details['threads'] if details['threads'] is not None else unavailable),
+            ("RSS", format_size(memory[0]) if memory else unavailable),
+            ("VMS", format_size(memory[1]) if memory else unavailable),
+            ("I/O read", f"{format_size(io.read_bytes)} in {io.read_count} calls" if io else unavailable),
+            ("I/O written", f"{format_size(io.write_bytes)} in {io.write_count} calls" if io else unavailable),
+        ]
+        for label, value in rows:
+            tree.insert('', 'end', text=label, values=(value,))
+        for label, entries in (("Open files", details['open_files']), ("Connections", details['connections'])):
+            if entries is None:
+                tree.insert('', 'end', text=label, values=(unavailable,))
+                continue
+            node = tree.insert('', 'end', text=label, values=(len(entries),))
+            for entry in entries:
+                tree.insert(node, 'end', text='', values=(entry,))
 
     def kill_process(self):
-        try:
-            pid_str = self.pid_entry.get()
-            if pid_str:
-                pid = int(pid_str)
-                process = psutil.Process(pid)
-                process.terminate()
-                process.wait(timeout=5)
-                print(f"Process with PID {pid} terminated.")
-            else:
-                print("Error killing process: PID is empty.")
-        except (ValueError, psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess) as e:
-            print(f"Error killing process: {e}")
+        pids = self.entered_pids()
+        if pids:
+            self.terminate_pids(pids, force=True)
 
     def terminate_process(self):
+        pids = self.entered_pids()
+        if pids:
+            self.terminate_pids(pids, force=False)
+
+    # PIDs typed into the entry, separated by spaces or commas.
+    def entered_pids(self):
+        fields = self.pid_entry.get().replace(',', ' ').split()
+        if not fields:
+            messagebox.showwarning("Error", "Please enter or select the processes to terminate.")
+            return []
+        invalid = [field for field in fields if not field.isdigit()]
+        if invalid:
+            messagebox.showwarning("Error", f"Invalid PID: {' '.join(invalid)}")
+            return []
+        pids = [int(field) for field in fields]
+        protected = [str(pid) for pid in pids if pid in (1, os.getpid())]
+        if protected:
+            messagebox.showwarning("Error", f"Refusing to terminate PID {' '.join(protected)} "
+                                            "(init or System View itself).")
+            return []
+        return pids
+
+    # Signals, waiting and escalation all happen in the collector (or agent) in the
+    # background; the summary comes back when the last process is dealt with.
+    def terminate_pids(self, pids, force):
+        # init and the viewer itself are never signalled, however the PIDs were picked.
+        pids = [pid for pid in pids if pid not in (1, os.getpid())]
+        if not pids:
+            return
         try:
-            pid = int(self.pid_entry.get())
-            os.system(f"kill -TERM {pid}")
-            print(f"Process with PID {pid} terminated.")
-        except (ValueError, OSError) as e:
-            print(f"Error killing process: {e}")
+            grace = max(0, int(self.termination_grace_var.get()))
+        except (ValueError, tk.TclError):
+            grace = TERMINATION_GRACE
+        action = "Killing" if force else f"Terminating (SIGKILL after {grace} s)"
+        self.termination_status_var.set(f"{action} {len(pids)} process(es)...")
+        self.scheduler.run_in_background('processes.terminate', lambda: self.collector.terminate_processes(pids, grace, force),
+                                         self.show_termination_results)
+
+    def terminate_matching_processes(self):
+        field, value = self.process_match_field_var.get().lower(), self.process_match_var.get().strip()
+        if not value:
+            messagebox.showwarning("Error", "Please enter a name, pattern or user to match.")
+            return
+        self.termination_status_var.set(f"Looking for processes matching {value}...")
+        self.scheduler.run_in_background('processes.match', lambda: self.collector.match_processes(field, value),
+                                         lambda matches, error: self.confirm_termination(value, matches, error))
+
+    def confirm_termination(self, value, matches, error):
+        if error is not None:
+            self.termination_status_var.set(f"Could not match processes: {error}")
+            return
+        if not matches:
+            self.termination_status_var.set(f"No processes match {value}.")
+            return
+        listed = "\n".join(f"{pid}  {name}  ({user})" for pid, name, user in matches[:15])
+        if len(matches) > 15:
+            listed += f"\n... and {len(matches) - 15} more"
+        self.termination_status_var.set("")
+        if messagebox.askyesno("Confirmation", f"Terminate {len(matches)} process(es) matching {value}?\n\n{listed}"):
+            self.terminate_pids([pid for pid, name, user in matches], force=False)
+
+    def show_termination_results(self, results, error):
+        if error is not None:
+            print(f"Error terminating processes: {error}")
+            self.termination_status_var.set(f"Termination failed: {error}")
+            return
+        counts = {}
+        for pid, name, outcome in results:
+            counts[outcome] = counts.get(outcome, 0) + 1
+        self.termination_status_var.set(", ".join(f"{count} {outcome}" for outcome, count in sorted(counts.items())))
+
+        window = tk.Toplevel(self.root)
+        window.title("Terminated Processes")
+        tree = self.create_treeview(window, ('PID', 'Name', 'Result'))
+        tree.pack(expand=True, fill='both', padx=10, pady=10)
+        self.populate_treeview(tree, results)
 
     def read_settings_from_json(self, filename):
         try:
@@ -414,156 +1735,423 @@ class SystemInfo:
         processes_label = ttk.Label(processes_frame, text="Processes Information:")
         processes_label.pack(pady=5)
 
-        self.processes_treeview = self.create_treeview(processes_frame, ('Name', 'PID', 'CPU %', 'Memory %', 'Status'))
-        self.update_processes_data()
-        self.processes_treeview.pack(expand=True, fill='both', padx=10, pady=10)
+        filter_frame = ttk.Frame(processes_frame)
+        filter_frame.pack(fill='x', padx=10)
+
+        filter_label = ttk.Label(filter_frame, text="Filter:")
+        filter_label.pack(side=tk.LEFT, padx=5)
+
+        filter_column_var = tk.StringVar(value=ProcessTableModel.COLUMNS[0])
+        filter_column_dropdown = ttk.Combobox(filter_frame, textvariable=filter_column_var,
+                                              values=ProcessTableModel.COLUMNS, state='readonly', width=10)
+        filter_column_dropdown.pack(side=tk.LEFT, padx=5)
+
+        filter_text_var = tk.StringVar()
+        filter_entry = ttk.Entry(filter_frame, textvariable=filter_text_var)
+        filter_entry.pack(side=tk.LEFT, expand=True, fill='x', padx=5)
+
+        apply_filter = lambda *args: self.filter_processes(filter_column_var.get(), filter_text_var.get())
+        filter_text_var.trace_add('write', apply_filter)
+        filter_column_dropdown.bind("<<ComboboxSelected>>", apply_filter)
+
+        self.process_tree_var = tk.BooleanVar(value=False)
+        tree_check = ttk.Checkbutton(filter_frame, text="Tree", variable=self.process_tree_var, command=self.toggle_process_tree)
+        tree_check.pack(side=tk.LEFT, padx=5)
+
+        panes = ttk.PanedWindow(processes_frame, orient=tk.HORIZONTAL)
+        panes.pack(expand=True, fill='both', padx=10, pady=10)
+        views_frame = ttk.Frame(panes)
+        panes.add(views_frame, weight=3)
+
+        self.processes_model = ProcessTableModel()
+        self.processes_view = VirtualTableView(views_frame, self.processes_model, 'processes.table', self.timings)
+        self.processes_view.pack(expand=True, fill='both')
+        self.processes_tree_view = ProcessTreeView(views_frame, self.processes_model, 'processes.tree', self.timings)
+
+        # Details of the selected process, fetched on demand.
+        details_frame = ttk.Frame(panes)
+        panes.add(details_frame, weight=2)
+        self.process_details_tree = ttk.Treeview(details_frame, columns=('Value',), selectmode='browse')
+        self.process_details_tree.heading('#0', text='Property')
+        self.process_details_tree.heading('Value', text='Value')
+        self.process_details_tree.column('#0', width=120, stretch=False)
+        self.process_details_tree.pack(expand=True, fill='both')
+        self.process_details = ProcessDetails()
+        self.process_details_pid = None
+        self.process_details_after_id = None
+
+        self.processes_status_var = tk.StringVar()
+        processes_status_label = ttk.Label(processes_frame, textvariable=self.processes_status_var)
+        processes_status_label.pack(pady=5)
+
+        self.scheduler.add_job('processes', self.update_processes_data, 2000, widget=parent,
+                               collect=self.sample_processes)
 
         kill_frame = ttk.Frame(processes_frame)
-        kill_frame.pack(expand=True, fill='both', pady=10)
+        kill_frame.pack(fill='x', padx=10, pady=10)
+
+        kill_label = ttk.Label(kill_frame, text="Enter PIDs to terminate, or select processes in the list:")
+        kill_label.pack(anchor='w', pady=5)
+
+        pids_frame = ttk.Frame(kill_frame)
+        pids_frame.pack(fill='x', pady=2)
+        self.pid_entry = ttk.Entry(pids_frame)
+        self.pid_entry.pack(side=tk.LEFT, expand=True, fill='x', padx=5)
+
+        terminate_button = ttk.Button(pids_frame, text="Terminate Process (graceful)", command=self.terminate_process)
+        terminate_button.pack(side=tk.LEFT, padx=5)
 
-        kill_label = ttk.Label(kill_frame, text="Enter PID to terminate a process:")
-        kill_label.pack(pady=5)
+        kill_button = ttk.Button(pids_frame, text="Kill Process (forceful)", command=self.kill_process)
+        kill_button.pack(side=tk.LEFT, padx=5)
 
-        self.pid_entry = ttk.Entry(kill_frame)
-        self.pid_entry.pack(pady=5)
+        ttk.Label(pids_frame, text="SIGKILL after (s):").pack(side=tk.LEFT, padx=(10, 2))
+        self.termination_grace_var = tk.StringVar(value=str(TERMINATION_GRACE))
+        trace_spinbox(self.termination_grace_var, 0, 300)
+        ttk.Spinbox(pids_frame, from_=0, to=300, width=4, textvariable=self.termination_grace_var).pack(side=tk.LEFT)
 
-        kill_button = ttk.Button(kill_frame, text="Kill Process (forceful)", command=self.kill_process)
-        kill_button.pack(pady=5)
+        match_frame = ttk.Frame(kill_frame)
+        match_frame.pack(fill='x', pady=2)
+        ttk.Label(match_frame, text="Match:").pack(side=tk.LEFT, padx=5)
+        self.process_match_field_var = tk.StringVar(value='Name')
+        ttk.Combobox(match_frame, textvariable=self.process_match_field_var, values=('Name', 'Pattern', 'User'),
+                     state='readonly', width=8).pack(side=tk.LEFT, padx=5)
+        self.process_match_var = tk.StringVar()
+        ttk.Entry(match_frame, textvariable=self.process_match_var).pack(side=tk.LEFT, expand=True, fill='x', padx=5)
+        ttk.Button(match_frame, text="Terminate Matching...", command=self.terminate_matching_processes).pack(side=tk.LEFT, padx=5)
 
-        terminate_button = ttk.Button(kill_frame, text="Terminate Process (graceful)", command=self.terminate_process)
-        terminate_button.pack(pady=5)
+        self.termination_status_var = tk.StringVar()
+        ttk.Label(kill_frame, textvariable=self.termination_status_var).pack(anchor='w', padx=5, pady=5)
 
         # Bind the click event to the update_pid_entry function
-        self.processes_treeview.bind('<ButtonRelease-1>', self.update_pid_entry)
+        self.processes_view.bind('<ButtonRelease-1>', self.update_pid_entry)
+        self.processes_view.bind('<<SelectionMoved>>', self.update_pid_entry)
+        self.processes_tree_view.bind('<<TreeviewSelect>>', self.update_pid_entry)
+        self.processes_tree_view.bind('<<TreeviewOpen>>', self.on_process_tree_open)
+
+    # The tree can be opened from the keyboard with nothing focused yet.
+    def on_process_tree_open(self, event):
+        focus = self.processes_tree_view.tree.focus()
+        if focus:
+            self.request_process_details(int(focus))
 
     def update_pid_entry(self, event):
-        selected_item = self.processes_treeview.selection()
-        if selected_item:
-            pid = self.processes_treeview.item(selected_item, 'values')[1]
+        selected_rows = self.active_process_view().selected_rows()
+        if selected_rows:
             self.pid_entry.delete(0, tk.END)
-            self.pid_entry.insert(0, pid)
+            self.pid_entry.insert(0, ' '.join(str(row[1]) for row in selected_rows))
+            self.request_process_details(selected_rows[0][1])
 
     def create_zfs_snapshots_tab_content(self, parent):
         zfs_snapshots_frame = ttk.Frame(parent)
         zfs_snapshots_frame.pack(expand=True, fill='both')
 
-        zfs_snapshots_label = ttk.Label(zfs_snapshots_frame, text="ZFS Snapshots:")
-        zfs_snapshots_label.pack(pady=5)
+        controls_frame = ttk.Frame(zfs_snapshots_frame)
+        controls_frame.pack(fill='x', padx=10, pady=5)
 
-        # Dropdown menu to select ZFS pool
-        zfs_pool_label = ttk.Label(zfs_snapshots_frame, text="Select ZFS Pool:")
-        zfs_pool_label.pack(pady=5)
+        # Dropdown menu to select ZFS pool, filled in once zpool answered
+        zfs_pool_label = ttk.Label(controls_frame, text="ZFS Pool:")
+        zfs_pool_label.pack(side=tk.LEFT, padx=5)
+        self.zfs_pool_var = tk.StringVar()
+        self.zfs_pool_dropdown = ttk.Combobox(controls_frame, textvariable=self.zfs_pool_var, state='readonly', width=16)
+        self.zfs_pool_dropdown.pack(side=tk.LEFT, padx=5)
+        self.zfs_pool_dropdown.bind("<<ComboboxSelected>>", lambda event: self.show_zfs_datasets(self.zfs_pool_var.get()))
 
-        # Get the list of ZFS pools
-        zfs_pools = self.get_zfs_pools()
-        zfs_pool_var = tk.StringVar(value=zfs_pools[0] if zfs_pools else '')
-        zfs_pool_dropdown = ttk.Combobox(zfs_snapshots_frame, textvariable=zfs_pool_var, values=zfs_pools)
-        zfs_pool_dropdown.pack(pady=5)
+        refresh_button = ttk.Button(controls_frame, text="Refresh", command=lambda: self.show_zfs_datasets(self.zfs_pool_var.get()))
+        refresh_button.pack(side=tk.LEFT, padx=5)
 
         # Entry widget for the user to input the ZFS snapshot name
-        snapshot_name_label = ttk.Label(zfs_snapshots_frame, text="Snapshot Name:")
-        snapshot_name_label.pack(pady=5)
-
+        snapshot_name_label = ttk.Label(controls_frame, text="Snapshot Name:")
+        snapshot_name_label.pack(side=tk.LEFT, padx=5)
         snapshot_name_var = tk.StringVar()
-        snapshot_name_entry = ttk.Entry(zfs_snapshots_frame, textvariable=snapshot_name_var)
-        snapshot_name_entry.pack(pady=5)
+        snapshot_name_entry = ttk.Entry(controls_frame, textvariable=snapshot_name_var)
+        snapshot_name_entry.pack(side=tk.LEFT, padx=5)
 
-        # Button to display ZFS snapshots
-        show_snapshots_button = ttk.Button(zfs_snapshots_frame, text="Show ZFS Snapshots", command=lambda: self.show_zfs_snapshots(self.zfs_snapshots_treeview, zfs_pool_var.get()))
-        show_snapshots_button.pack(side=tk.LEFT, padx=5)
+        recursive_var = tk.BooleanVar(value=False)
+        recursive_check = ttk.Checkbutton(controls_frame, text="Recursive", variable=recursive_var)
+        recursive_check.pack(side=tk.LEFT, padx=5)
 
-        # Button to create ZFS snapshot
-        create_snapshot_button = ttk.Button(zfs_snapshots_frame, text="Create ZFS Snapshot", command=lambda: self.create_zfs_snapshot(zfs_pool_var.get(), snapshot_name_var.get()))
+        # Button to create ZFS snapshots of the selected datasets
+        create_snapshot_button = ttk.Button(controls_frame, text="Create ZFS Snapshot", command=lambda: self.create_zfs_snapshot(self.zfs_pool_var.get(), snapshot_name_var.get(), recursive_var.get()))
         create_snapshot_button.pack(side=tk.LEFT, padx=5)
 
-        # Treeview to display ZFS snapshots
-        columns = ('Snapshot Name', 'Creation Time')
-        self.zfs_snapshots_treeview = self.create_treeview(zfs_snapshots_frame, columns)
-        self.zfs_snapshots_treeview.pack(expand=True, fill='both', padx=10, pady=10)
-
-        # Bind the selection event to update the selected ZFS pool
-        zfs_pool_dropdown.bind("<<ComboboxSelected>>", lambda event, tree=self.zfs_snapshots_treeview, zfs_pool_var=zfs_pool_var: self.show_zfs_snapshots(tree, zfs_pool_var.get()))
-
-
-    def show_zfs_snapshots(self, tree, zfs_pool):
-        try:
-            # Run the zfs list command to display ZFS snapshots for the selected pool
-            result = subprocess.run(['zfs', 'list', '-t', 'snapshot', '-o', 'name,creation', '-r', zfs_pool], capture_output=True, text=True, check=True)
-            snapshots = [line.split('\t') for line in result.stdout.splitlines()]
-            # Remove header
-            snapshots = snapshots[1:]
-
-            # Clear existing items in the Treeview
-            for item in tree.get_children():
-                tree.delete(item)
-
-            # Populate Treeview with ZFS snapshots
-            for snapshot in snapshots:
-                tree.insert("", "end", values=snapshot)
-
-        except subprocess.CalledProcessError as e:
-            print(f"Error running 'zfs list' command: {e}")
-        except Exception as e:
-            print(f"Error: {e}")
-
-    def create_zfs_snapshot(self, zfs_pool, snapshot_name):
-        try:
-            # Use the provided snapshot name or generate one based on the current date and time
-            snapshot_name = snapshot_name or f'{zfs_pool}@{datetime.now().strftime("%Y%m%d_%H%M%S")}'
-
-            # Run the zfs snapshot command to create a ZFS snapshot for the selected pool
-            subprocess.run(['zfs', 'snapshot', snapshot_name], check=True)
-            print(f"ZFS snapshot '{snapshot_name}' created successfully.")
+        panes = ttk.PanedWindow(zfs_snapshots_frame, orient=tk.HORIZONTAL)
+        panes.pack(expand=True, fill='both', padx=10, pady=5)
+
+        # Dataset hierarchy on the left, the snapshots of the selected dataset on the right.
+        datasets_frame = ttk.Frame(panes)
+        self.zfs_datasets_treeview = ttk.Treeview(datasets_frame, columns=('Used', 'Referenced'), selectmode='extended')
+        datasets_scrollbar = ttk.Scrollbar(datasets_frame, orient="vertical", command=self.zfs_datasets_treeview.yview)
+        datasets_scrollbar.pack(side="right", fill="y")
+        self.zfs_datasets_treeview.configure(yscrollcommand=datasets_scrollbar.set)
+        self.zfs_datasets_treeview.heading('#0', text='Dataset')
+        for column in ('Used', 'Referenced'):
+            self.zfs_datasets_treeview.heading(column, text=column)
+            self.zfs_datasets_treeview.column(column, width=90, anchor='e', stretch=False)
+        self.zfs_datasets_treeview.pack(side="left", expand=True, fill='both')
+        self.zfs_datasets_treeview.bind('<<TreeviewSelect>>', lambda event: self.show_selected_dataset_snapshots())
+        self.zfs_datasets_treeview.bind('<<TreeviewOpen>>', lambda event: self.zfs_datasets_treeview.selection_set(
+            self.zfs_datasets_treeview.focus()))
+        panes.add(datasets_frame, weight=1)
+
+        snapshots_frame = ttk.Frame(panes)
+        filter_frame = ttk.Frame(snapshots_frame)
+        filter_frame.pack(fill='x')
+        ttk.Label(filter_frame, text="Filter:").pack(side=tk.LEFT, padx=5)
+        snapshot_filter_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=snapshot_filter_var).pack(side=tk.LEFT, expand=True, fill='x', padx=5)
+        snapshot_filter_var.trace_add('write', lambda *args: self.zfs_snapshots_view.set_filter(0, snapshot_filter_var.get()))
+
+        self.zfs_snapshots_model = ZfsSnapshotModel()
+        self.zfs_snapshots_view = VirtualTableView(snapshots_frame, self.zfs_snapshots_model, 'zfs.snapshots_table',
+                                                   self.timings)
+        self.zfs_snapshots_view.pack(expand=True, fill='both', pady=5)
+        destroy_frame = ttk.Frame(snapshots_frame)
+        destroy_frame.pack(fill='x')
+        ttk.Button(destroy_frame, text="Destroy Selected...", command=lambda: self.destroy_zfs_snapshots(False)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(destroy_frame, text="Destroy Range...", command=lambda: self.destroy_zfs_snapshots(True)).pack(side=tk.LEFT, padx=5)
+        panes.add(snapshots_frame, weight=2)
+
+        status_frame = ttk.Frame(zfs_snapshots_frame)
+        status_frame.pack(fill='x', padx=10, pady=5)
+        self.zfs_status_var = tk.StringVar(value="Loading pools...")
+        ttk.Label(status_frame, textvariable=self.zfs_status_var).pack(side=tk.LEFT, padx=5)
+        self.zfs_progress = ttk.Progressbar(status_frame, length=200)
+        self.zfs_progress.pack(side=tk.RIGHT, padx=5)
+        self.zfs_busy = False
+        self.zfs_shown_dataset = None
+
+        # Snapshot lists are only fetched when a dataset is first selected.
+        self.zfs_snapshot_cache = {}
+        self.zfs_snapshots_loading = set()
+        self.scheduler.run_in_background('zfs.pools', self.get_zfs_pools, self.show_zfs_pools)
+
+    def show_zfs_pools(self, zfs_pools, error):
+        if error is not None or not zfs_pools:
+            self.zfs_status_var.set("No ZFS pools found.")
+            return
+        self.zfs_pool_dropdown.configure(values=zfs_pools)
+        self.zfs_pool_var.set(zfs_pools[0])
+        self.show_zfs_datasets(zfs_pools[0])
 
-            # Refresh ZFS snapshots in the Treeview
-            self.show_zfs_snapshots(self.zfs_snapshots_treeview, zfs_pool)
+    def show_zfs_datasets(self, zfs_pool):
+        if not zfs_pool:
+            return
+        self.zfs_status_var.set(f"Loading datasets of {zfs_pool}...")
+        self.scheduler.run_in_background('zfs.datasets', lambda: self.collector.get_zfs_datasets(zfs_pool),
+                                         lambda datasets, error: self.populate_zfs_datasets(zfs_pool, datasets, error))
+
+    # zfs lists parents before their children, so each dataset's parent is already in the tree.
+    def populate_zfs_datasets(self, zfs_pool, datasets, error):
+        if error is not None:
+            print(f"Error running 'zfs list' command: {error}")
+            self.zfs_status_var.set(f"Could not list the datasets of {zfs_pool}.")
+            return
+        if zfs_pool != self.zfs_pool_var.get():
+            return
+        tree = self.zfs_datasets_treeview
+        tree.delete(*tree.get_children())
+        self.zfs_snapshot_cache.clear()
+        self.zfs_snapshots_model.update([])
+        self.zfs_snapshots_view.render()
+        for name, used, referenced, creation in datasets:
+            parent = name.rpartition('/')[0]
+            tree.insert(parent if tree.exists(parent) else '', 'end', iid=name, text=name.rpartition('/')[2],
+                        values=(format_size(used), format_size(referenced)), open=(parent == ''))
+        self.zfs_status_var.set(f"{len(datasets)} datasets in {zfs_pool}, select one to list its snapshots.")
+
+    def show_selected_dataset_snapshots(self):
+        selection = self.zfs_datasets_treeview.selection()
+        if not selection:
+            return
+        focus = self.zfs_datasets_treeview.focus()
+        dataset = focus if focus in selection else selection[0]
+        rows = self.zfs_snapshot_cache.get(dataset)
+        if rows is not None:
+            self.show_zfs_snapshots(dataset, rows)
+            return
+        self.zfs_status_var.set(f"Loading snapshots of {dataset}...")
+        if dataset in self.zfs_snapshots_loading:
+            return
+        self.zfs_snapshots_loading.add(dataset)
+        self.scheduler.run_in_background('zfs.snapshots', lambda: self.collector.get_zfs_snapshots(dataset, depth=1),
+                                         lambda rows, error: self.snapshots_loaded(dataset, rows, error))
+
+    def snapshots_loaded(self, dataset, rows, error):
+        self.zfs_snapshots_loading.discard(dataset)
+        if error is not None:
+            print(f"Error running 'zfs list' command: {error}")
+            self.zfs_status_var.set(f"Could not list the snapshots of {dataset}.")
+            return
+        self.zfs_snapshot_cache[dataset] = rows
+        if dataset in self.zfs_datasets_treeview.selection():
+            self.show_zfs_snapshots(dataset, rows)
+
+    def show_zfs_snapshots(self, dataset, rows):
+        self.zfs_shown_dataset = dataset
+        self.zfs_snapshots_model.update(rows)
+        self.zfs_snapshots_view.offset = 0
+        self.zfs_snapshots_view.render()
+        self.zfs_status_var.set(f"{len(rows)} snapshots of {dataset}")
+
+    # Snapshots all selected datasets (the pool when none is) in a single `zfs snapshot`, then
+    # lists just the new snapshots and adds them to the lists already loaded.
+    def create_zfs_snapshot(self, zfs_pool, snapshot_name, recursive=False):
+        if self.zfs_busy or not zfs_pool:
+            return
+        tree = self.zfs_datasets_treeview
+        datasets = list(tree.selection()) or [zfs_pool]
+        if '@' in snapshot_name:
+            dataset, _, snapshot_name = snapshot_name.partition('@')
+            datasets = [dataset]
+        # Use the provided snapshot name or generate one based on the current date and time
+        snapshot_name = snapshot_name or datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        targets = list(datasets)
+        if recursive:
+            pending = list(datasets)
+            while pending:
+                dataset = pending.pop()
+                children = tree.get_children(dataset) if tree.exists(dataset) else ()
+                targets += children
+                pending += children
+        names = [f"{dataset}@{snapshot_name}" for dataset in dict.fromkeys(targets)]
+
+        def create():
+            self.collector.create_zfs_snapshots(datasets, snapshot_name, recursive)
+            return self.collector.get_zfs_snapshot_rows(names)
+
+        self.set_zfs_busy(f"Creating {len(names)} snapshot(s)...", None)
+        self.scheduler.run_in_background('zfs.create', create, self.zfs_snapshots_created)
+
+    def zfs_snapshots_created(self, rows, error):
+        self.set_zfs_busy(None)
+        if error is not None:
+            print(f"Error running 'zfs snapshot' command: {error}")
+            self.zfs_status_var.set("Creating the snapshots failed.")
+            return
+        shown = []
+        for row in rows:
+            dataset = row[0].partition('@')[0]
+            if dataset in self.zfs_snapshot_cache:
+                self.zfs_snapshot_cache[dataset].append(row)
+            if dataset == self.zfs_shown_dataset:
+                shown.append(row)
+        if shown:
+            self.zfs_snapshots_model.add_rows(shown)
+            self.zfs_snapshots_view.render()
+        self.zfs_status_var.set(f"Created {len(rows)} snapshot(s).")
+
+    # Destroys the selected snapshots of the shown dataset, or with as_range everything from
+    # the oldest to the newest one selected.  Adjacent snapshots are passed to zfs as ranges
+    # (fs@a%b), a dry run reports what would be reclaimed before anything is destroyed.
+    def destroy_zfs_snapshots(self, as_range):
+        dataset = self.zfs_shown_dataset
+        selected = {row[0] for row in self.zfs_snapshots_view.selected_rows()}
+        if self.zfs_busy:
+            return
+        if dataset is None or not selected:
+            messagebox.showwarning("Error", "Please select the snapshots to destroy.")
+            return
+        names = [row[0] for row in self.zfs_snapshot_cache.get(dataset, [])]
+        if as_range:
+            positions = [position for position, name in enumerate(names) if name in selected]
+            selected = set(names[positions[0]:positions[-1] + 1])
+        ranges = snapshot_ranges(names, selected)
+        # Keeps each command line well below ARG_MAX.
+        batches = [ranges[start:start + 200] for start in range(0, len(ranges), 200)]
+
+        def estimate():
+            count, reclaim = 0, 0
+            for batch in batches:
+                destroyed, batch_reclaim = self.collector.destroy_zfs_snapshots(
+                    dataset, [spec for spec, covered in batch], dry_run=True)
+                count += len(destroyed) or sum(len(covered) for spec, covered in batch)
+                reclaim += batch_reclaim
+            return count, reclaim
+
+        self.set_zfs_busy(f"Estimating the space {len(selected)} snapshot(s) would free...", None)
+        self.scheduler.run_in_background('zfs.estimate', estimate, lambda estimate, error: self.confirm_zfs_destroy(
+            dataset, batches, len(selected), estimate, error))
+
+    def confirm_zfs_destroy(self, dataset, batches, total, estimate, error):
+        self.set_zfs_busy(None)
+        if error is not None:
+            print(f"Error running 'zfs destroy' command: {error}")
+            self.zfs_status_var.set("The dry run of zfs destroy failed.")
+            return
+        count, reclaim = estimate
+        if not messagebox.askyesno("Confirm Destroy", f"Destroy {count} snapshot(s) of {dataset}?\n\n"
+                                                     f"This will free about {format_size(reclaim)}."):
+            self.zfs_status_var.set("Nothing was destroyed.")
+            return
 
-        except subprocess.CalledProcessError as e:
-            print(f"Error running 'zfs snapshot' command: {e}")
-        except Exception as e:
-            print(f"Error: {e}")
+        def destroy():
+            done = 0
+            for batch in batches:
+                self.collector.destroy_zfs_snapshots(dataset, [spec for spec, covered in batch])
+                names = [name for spec, covered in batch for name in covered]
+                done += len(names)
+                self.scheduler.post(self.zfs_snapshots_destroyed, dataset, names, done, total)
+            return done
+
+        self.set_zfs_busy(f"Destroying {total} snapshot(s) of {dataset}...", total)
+        self.scheduler.run_in_background('zfs.destroy', destroy, self.zfs_destroy_finished)
+
+    # Called after each batch: only the destroyed rows are dropped.
+    def zfs_snapshots_destroyed(self, dataset, names, done, total):
+        destroyed = set(names)
+        if dataset in self.zfs_snapshot_cache:
+            self.zfs_snapshot_cache[dataset] = [row for row in self.zfs_snapshot_cache[dataset] if row[0] not in destroyed]
+        if dataset == self.zfs_shown_dataset:
+            self.zfs_snapshots_model.remove_rows(destroyed)
+            self.zfs_snapshots_view.selected_keys -= destroyed
+            self.zfs_snapshots_view.render()
+        self.zfs_progress.configure(value=done)
+        self.zfs_status_var.set(f"Destroyed {done} of {total} snapshot(s) of {dataset}...")
+
+    def zfs_destroy_finished(self, done, error):
+        self.set_zfs_busy(None)
+        if error is not None:
+            print(f"Error running 'zfs destroy' command: {error}")
+            self.zfs_status_var.set("Destroying the snapshots failed, the list may be out of date.")
+            return
+        self.zfs_status_var.set(f"Destroyed {done} snapshot(s).")
+
+    # maximum None shows an indeterminate bar, a number counts up to it, status None ends it.
+    def set_zfs_busy(self, status, maximum=None):
+        self.zfs_busy = status is not None
+        self.zfs_progress.stop()
+        if status is None:
+            self.zfs_progress.configure(mode='determinate', value=0)
+            return
+        self.zfs_status_var.set(status)
+        if maximum is None:
+            self.zfs_progress.configure(mode='indeterminate')
+            self.zfs_progress.start(20)
+        else:
+            self.zfs_progress.configure(mode='determinate', maximum=maximum, value=0)
 
 
     def get_zfs_pools(self):
-        try:
-            result = subprocess.run(['zpool', 'list', '-H', '-o', 'name'], capture_output=True, text=True, check=True)
-            return result.stdout.splitlines()
-        except subprocess.CalledProcessError as e:
-            print(f"Error getting ZFS pools: {e}")
-            return []
-
-    def show_boot_environments(self):
-        try:
-            # Run the beadm list command to display boot environments
-            result = subprocess.run(['beadm', 'list'], capture_output=True, text=True, check=True)
-            boot_env_output = result.stdout
-
-            # Display the boot environments in the Treeview
-            self.update_boot_environments_treeview(boot_env_output)
-        except subprocess.CalledProcessError as e:
-            print(f"Error running 'beadm list' command: {e}")
-        except Exception as e:
-            print(f"Error: {e}")
-
-    def update_boot_environments_treeview(self, boot_env_output):
-        try:
-            # Clear existing items in the Treeview
-            for item in self.boot_environments_treeview.get_children():
-                self.boot_environments_treeview.delete(item)
-
-            # Populate Treeview with boot environments
-            boot_environments = [line.strip() for line in boot_env_output.splitlines()]
-            for boot_env in boot_environments:
-                self.boot_environments_treeview.insert("", "end", values=(boot_env,))
-        except Exception as e:
-            print(f"Error updating boot environments Treeview: {e}")
-
-    def update_boot_env_entry(self, event):
-        selected_item = self.boot_environments_treeview.selection()
-        if selected_item:
-            boot_env = self.boot_environments_treeview.item(selected_item, 'values')[0]
-            # Update your entry or do anything you want with the selected boot environment
-            print(f"Selected Boot Environment: {boot_env}")
+        return self.collector.get_zfs_pools()
+
+    def load_boot_environments(self, refresh=False):
+        def load():
+            if refresh:
+                self.collector.invalidate('beadm')
+            return self.collector.get_boot_environments()
+
+        self.boot_environments_status_var.set("Loading boot environments...")
+        self.scheduler.run_in_background('boot_environments', load, self.show_boot_environments)
+
+    # Brings the Treeview in line with the list, touching only the rows that changed.
+    def show_boot_environments(self, environments, error):
+        if error is not None:
+            print(f"Error running 'beadm list' command: {error}")
+            self.boot_environments_status_var.set("Could not list the boot environments.")
+            return
+        self.sync_treeview_rows(self.boot_environments_treeview, environments)
+        self.boot_environments_status_var.set(f"{len(environments)} boot environments")
 
     def create_boot_environments_tab_content(self, parent):
         boot_environments_frame = ttk.Frame(parent)
@@ -572,52 +2160,211 @@ class SystemInfo:
         boot_environments_label = ttk.Label(boot_environments_frame, text="Boot Environments:")
         boot_environments_label.pack(pady=5)
 
+        controls_frame = ttk.Frame(boot_environments_frame)
+        controls_frame.pack(fill='x', padx=10)
+
         # Entry widget for the user to input the boot environment name
-        be_name_label = ttk.Label(boot_environments_frame, text="Boot Environment Name:")
-        be_name_label.pack(pady=5)
+        be_name_label = ttk.Label(controls_frame, text="Boot Environment Name:")
+        be_name_label.pack(side=tk.LEFT, padx=5)
 
         be_name_var = tk.StringVar()
-        be_name_entry = ttk.Entry(boot_environments_frame, textvariable=be_name_var)
-        be_name_entry.pack(pady=5)
-
-        # Button to show boot environments
-        show_boot_env_button = ttk.Button(boot_environments_frame, text="Show Boot Environments", command=self.show_boot_environments)
-        show_boot_env_button.pack(side=tk.LEFT, padx=5)
+        be_name_entry = ttk.Entry(controls_frame, textvariable=be_name_var)
+        be_name_entry.pack(side=tk.LEFT, padx=5)
 
         # Button to create boot environment
-        create_boot_env_button = ttk.Button(boot_environments_frame, text="Create Boot Environment", command=lambda: self.create_boot_environment(be_name_var.get()))
+        create_boot_env_button = ttk.Button(controls_frame, text="Create Boot Environment", command=lambda: self.create_boot_environment(be_name_var.get()))
         create_boot_env_button.pack(side=tk.LEFT, padx=5)
 
-        # Treeview to display boot environments
-        columns = ('Boot Environment',)
-        self.boot_environments_treeview = self.create_treeview(boot_environments_frame, columns)
-        self.boot_environments_treeview.pack(expand=True, fill='both', padx=10, pady=10)
-
-        # Bind the selection event to update the selected boot environment
-        self.boot_environments_treeview.bind('<ButtonRelease-1>', self.update_boot_env_entry)
+        # Button to list the boot environments again, bypassing the cache
+        refresh_button = ttk.Button(controls_frame, text="Refresh", command=lambda: self.load_boot_environments(refresh=True))
+        refresh_button.pack(side=tk.LEFT, padx=5)
 
-        # Store the Boot Environments Treeview as an instance variable
-        self.boot_environments_treeview_instance = self.boot_environments_treeview
+        # Treeview to display boot environments
+        tree_frame = ttk.Frame(boot_environments_frame)
+        tree_frame.pack(expand=True, fill='both', padx=10, pady=10)
+        columns = ('Name', 'Active', 'Mountpoint', 'Space', 'Created')
+        self.boot_environments_treeview = self.create_treeview(tree_frame, columns)
+        self.boot_environments_treeview.configure(selectmode='browse')
+        for column, width, anchor in (('Name', 200, 'w'), ('Active', 60, 'center'), ('Mountpoint', 160, 'w'),
+                                      ('Space', 80, 'e'), ('Created', 140, 'w')):
+            self.boot_environments_treeview.column(column, width=width, anchor=anchor)
+        self.boot_environments_treeview.pack(expand=True, fill='both')
+
+        actions_frame = ttk.Frame(boot_environments_frame)
+        actions_frame.pack(pady=5)
+        ttk.Button(actions_frame, text="Activate", command=self.activate_boot_environment).pack(side=tk.LEFT, padx=5)
+        ttk.Button(actions_frame, text="Rename...", command=self.rename_boot_environment).pack(side=tk.LEFT, padx=5)
+        ttk.Button(actions_frame, text="Destroy...", command=self.destroy_boot_environment).pack(side=tk.LEFT, padx=5)
+
+        self.boot_environments_status_var = tk.StringVar()
+        ttk.Label(boot_environments_frame, textvariable=self.boot_environments_status_var).pack(pady=5)
+
+        self.load_boot_environments()
+
+    def selected_boot_environment(self):
+        selection = self.boot_environments_treeview.selection()
+        if not selection:
+            messagebox.showwarning("Error", "Please select a boot environment.")
+            return None
+        return selection[0]
+
+    # Runs a beadm action in the background and calls on_success on the Tk thread when it worked.
+    def run_boot_environment_action(self, name, status, action, on_success):
+        self.boot_environments_status_var.set(status)
+
+        def finished(result, error):
+            if error is not None:
+                print(f"Error running 'beadm' command: {error}")
+                self.boot_environments_status_var.set(f"{status[:-3]} failed.")
+                return
+            on_success()
+
+        self.scheduler.run_in_background(f'boot_environments.{name}', action, finished)
 
     def create_boot_environment(self, be_name):
-        try:
-            # Use the provided boot environment name or generate one based on the current date and time
-            new_be_name = be_name or 'be_' + datetime.now().strftime('%Y%m%d_%H%M%S')
+        # Use the provided boot environment name or generate one based on the current date and time
+        new_be_name = be_name or 'be_' + datetime.now().strftime('%Y%m%d_%H%M%S')
+        # The new environment's space and creation time come from beadm, so list again; only the new row is inserted.
+        self.run_boot_environment_action('create', f"Creating {new_be_name}...",
+                                         lambda: self.collector.create_boot_environment(new_be_name),
+                                         self.load_boot_environments)
+
+    # Only the R (active on reboot) flags move.
+    def activate_boot_environment(self):
+        name = self.selected_boot_environment()
+        if name is None:
+            return
+        tree = self.boot_environments_treeview
+
+        def activated():
+            for iid in tree.get_children():
+                active = tree.set(iid, 'Active')
+                flags = active.replace('-', '').replace('R', '') + ('R' if iid == name else '')
+                if (flags or '-') != active:
+                    tree.set(iid, 'Active', flags or '-')
+            self.boot_environments_status_var.set(f"{name} will be used on the next boot.")
+
+        self.run_boot_environment_action('activate', f"Activating {name}...",
+                                         lambda: self.collector.activate_boot_environment(name), activated)
+
+    def rename_boot_environment(self):
+        name = self.selected_boot_environment()
+        if name is None:
+            return
+        new_name = simpledialog.askstring("Rename Boot Environment", f"New name for {name}:", initialvalue=name,
+                                          parent=self.root)
+        if not new_name or new_name == name:
+            return
+        tree = self.boot_environments_treeview
+
+        # Treeview items cannot be renamed, so the row is replaced at the same position.
+        def renamed():
+            index = tree.index(name)
+            values = list(tree.item(name, 'values'))
+            values[0] = new_name
+            tree.delete(name)
+            tree.insert("", index, iid=new_name, values=values)
+            tree.selection_set(new_name)
+            self.boot_environments_status_var.set(f"Renamed {name} to {new_name}.")
+
+        self.run_boot_environment_action('rename', f"Renaming {name}...",
+                                         lambda: self.collector.rename_boot_environment(name, new_name), renamed)
+
+    def destroy_boot_environment(self):
+        name = self.selected_boot_environment()
+        if name is None:
+            return
+        if not messagebox.askyesno("Confirm Destroy", f"Are you sure you want to destroy the boot environment {name}?"):
+            return
+        tree = self.boot_environments_treeview
 
-            # Run the beadm create command to create a new boot environment
-            subprocess.run(['beadm', 'create', new_be_name], check=True)
-            print(f"Boot environment '{new_be_name}' created successfully.")
+        def destroyed():
+            if tree.exists(name):
+                tree.delete(name)
+            self.boot_environments_status_var.set(f"Destroyed {name}.")
 
-            # Refresh the Boot Environments Treeview after creating a new boot environment
-            self.show_boot_environments()
-        except subprocess.CalledProcessError as e:
-            print(f"Error running 'beadm create' command: {e}")
-        except Exception as e:
-            print(f"Error: {e}")
+        self.run_boot_environment_action('destroy', f"Destroying {name}...",
+                                         lambda: self.collector.destroy_boot_environment(name), destroyed)
+
+    def toggle_diagnostics(self, event=None):
+        if self.notebook.tab(self.diagnostics_tab, 'state') == 'hidden':
+            self.notebook.add(self.diagnostics_tab)
+            self.notebook.select(self.diagnostics_tab)
+        else:
+            self.notebook.hide(self.diagnostics_tab)
+
+    def create_diagnostics_tab_content(self, parent):
+        diagnostics_frame = ttk.Frame(parent)
+        diagnostics_frame.pack(expand=True, fill='both')
+        ttk.Label(diagnostics_frame, text="Timings over the last 500 runs of each span, tool runs since startup, "
+                                          "tk.lag is how late the event loop ran timers.").pack(anchor='w', padx=10, pady=5)
+
+        spans_frame = ttk.Frame(diagnostics_frame)
+        spans_frame.pack(expand=True, fill='both', padx=10, pady=5)
+        self.spans_treeview = self.create_treeview(spans_frame, ('Span', 'Count', 'p50', 'p95', 'Max'))
+        self.spans_treeview.pack(expand=True, fill='both')
+
+        jobs_frame = ttk.Frame(diagnostics_frame)
+        jobs_frame.pack(fill='x', padx=10, pady=(0, 10))
+        self.jobs_treeview = self.create_treeview(jobs_frame, ('Job', 'Interval', 'Average Cost', 'Runs', 'Skipped', 'Paused'))
+        self.jobs_treeview.configure(height=8)
+        self.jobs_treeview.pack(fill='x')
+
+        self.scheduler.add_job('diagnostics', self.show_diagnostics, DIAGNOSTICS_INTERVAL, widget=parent)
+
+    def show_diagnostics(self):
+        summaries = list(self.timings.summary().items())
+        summaries += [(f"command.{tool}", summary) for tool, summary in self.executor.stats().items()]
+        self.sync_treeview_rows(self.spans_treeview, [
+            (name, str(summary['count']), f"{summary['p50_ms']:.1f} ms", f"{summary['p95_ms']:.1f} ms",
+             f"{summary['max_ms']:.1f} ms") for name, summary in sorted(summaries)])
+        jobs = []
+        for name in sorted(self.scheduler.jobs):
+            stats = self.scheduler.stats(name)
+            jobs.append((name, f"{stats['interval']} ms", f"{stats['average_cost'] * 1000:.1f} ms", str(stats['runs']),
+                         str(stats['skipped']), 'yes' if stats['paused'] else 'no'))
+        self.sync_treeview_rows(self.jobs_treeview, jobs)
+
+    def on_close(self):
+        self.lag_probe.stop()
+        self.scheduler.stop()
+        self.collector.close()
+        self.metrics_recorder.close()
+        if self.settings_save_id is not None:
+            self.root.after_cancel(self.settings_save_id)
+            self.save_settings()
+        for controls in getattr(self, 'setting_boxes', []):
+            self.cancel_command(controls)
+        if hasattr(self, 'removal_queue'):
+            self.removal_queue.drop_pending()
+        if getattr(self, 'log_file', None) is not None:
+            self.log_file.close()
+        self.root.destroy()
 
     def mainloop(self):
         self.root.mainloop()
 
 if __name__ == "__main__":
-    app = SystemInfo()
-    app.mainloop()
+    parser = argparse.ArgumentParser(description="System View")
+    parser.add_argument("--startup-timing", action="store_true",
+                        help="print how long each startup phase took until the window was first painted")
+    parser.add_argument("--bin-dir", help="directory of stand-in pkg/zfs/zpool/beadm/pciconf/dmesg binaries to run instead of the system ones")
+    parser.add_argument("--agent", nargs='?', const=AGENT_SOCKET, metavar="SOCKET",
+                        help=f"get the data from a running system_agent.py and run as an ordinary user (default socket {AGENT_SOCKET})")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="profile the Tk thread with cProfile, write the stats to FILE on exit and print the top functions")
+    args = parser.parse_args()
+
+    profiler = None
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        app = SystemInfo(startup_timing=args.startup_timing, bin_dir=args.bin_dir, agent_socket=args.agent)
+        app.mainloop()
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(30)
+            print(f"Profile written to {args.profile}, open it with: python -m pstats {args.profile}")
@@ -0,0 +1,15 @@
+# The core is tested against the real psutil where it is installed, and otherwise against
+# the synthetic one the benchmarks use.  Tests that need a predictable process table patch
+# fake_psutil in explicitly.
+import os
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'benchmarks'))
+
+try:
+    import psutil  # noqa: F401
+except ImportError:
+    import fake_psutil
+    fake_psutil.install()
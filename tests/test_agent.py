@@ -0,0 +1,164 @@
+import json
+import os
+import socket
+
+import pytest
+
+from system_agent import AgentClient, AgentError, CollectorAgent, PublishedSection
+
+class Recorder:
+    def __init__(self):
+        self.messages = []
+
+    def send(self, message):
+        self.messages.append(message)
+
+# Stands in for SystemCollector: every method records its call and returns its name and
+# arguments.  The get_boot_environments result cannot be sent as JSON and destroying a boot
+# environment fails.
+class StubCollector:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def method(*args):
+            self.calls.append((name,) + args)
+            if name == 'get_boot_environments':
+                return {'bad'}
+            if name == 'destroy_boot_environment':
+                raise RuntimeError("beadm failed")
+            return [name] + list(args)
+        return method
+
+def test_section_versions_only_change_with_the_rows():
+    section = PublishedSection('processes', 2, key=1)
+    first = section.publish([('init', 1), ('sh', 2)])
+    assert (first['base'], first['version'], first['upsert'], first['remove']) == (0, 1, [('init', 1), ('sh', 2)], [])
+    assert section.publish([('init', 1), ('sh', 2)]) is None
+    second = section.publish([('init', 1), ('zsh', 3)])
+    assert (second['base'], second['version'], second['upsert'], second['remove']) == (1, 2, [('zsh', 3)], [2])
+
+def test_empty_first_publish_still_gets_a_version():
+    section = PublishedSection('packages', 10, key=0)
+    assert section.publish([])['version'] == 1
+
+def test_subscriber_catches_up_from_its_version():
+    section = PublishedSection('processes', 2, key=1)
+    for rows in ([('a', 1)], [('a', 1), ('b', 2)], [('b', 2)]):
+        section.publish(rows)
+    behind, current, fresh = Recorder(), Recorder(), Recorder()
+    section.subscribe(behind, since=1)
+    section.subscribe(current, since=3)
+    section.subscribe(fresh)
+    assert [(delta['base'], delta['version']) for delta in behind.messages] == [(1, 2), (2, 3)]
+    assert current.messages == []
+    assert fresh.messages == [{'type': 'snapshot', 'section': 'processes', 'version': 3, 'rows': [('b', 2)]}]
+    section.publish([('c', 3)])
+    assert fresh.messages[-1]['version'] == 4 == behind.messages[-1]['version']
+
+# Deltas older than the kept history cannot be replayed, so a full snapshot is sent instead.
+def test_subscriber_too_far_behind_gets_a_snapshot():
+    section = PublishedSection('processes', 2, key=1, history=2)
+    for pid in range(1, 6):
+        section.publish([('p', pid)])
+    connection = Recorder()
+    section.subscribe(connection, since=1)
+    assert [message['type'] for message in connection.messages] == ['snapshot']
+    section.unsubscribe(connection)
+    section.publish([])
+    assert len(connection.messages) == 1
+
+@pytest.fixture
+def agent(tmp_path):
+    agent = CollectorAgent(StubCollector(), path=str(tmp_path / 'agent.sock'), group=None)
+    agent.start()
+    yield agent
+    agent.close()
+
+@pytest.fixture
+def raw(agent):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(agent.path)
+    sock.settimeout(5)
+    stream = sock.makefile('rwb')
+
+    def request(line):
+        stream.write(line + b"\n")
+        stream.flush()
+        return json.loads(stream.readline())
+
+    yield request
+    stream.close()
+    sock.close()
+
+def test_reads_are_open_to_everyone(agent):
+    agent.authorized = lambda uid: False
+    client = AgentClient(agent.path)
+    try:
+        assert client.call('get_zfs_datasets', 'zroot', timeout=5) == ['get_zfs_datasets', 'zroot']
+    finally:
+        client.close()
+
+@pytest.mark.parametrize('method, args', [
+    ('terminate_processes', [[7], 5, False]),
+    ('match_processes', ['pattern', '(a+)+$']),
+    ('destroy_zfs_snapshots', ['zroot/home', ['auto-1']]),
+])
+def test_actions_need_authorization(agent, method, args):
+    agent.authorized = lambda uid: False
+    client = AgentClient(agent.path)
+    try:
+        with pytest.raises(AgentError, match="not authorized"):
+            client.call(method, *args, timeout=5)
+    finally:
+        client.close()
+
+def test_authorized_peer_runs_actions(agent):
+    assert agent.authorized(os.geteuid())
+    client = AgentClient(agent.path)
+    try:
+        assert client.call('match_processes', 'name', 'sshd', timeout=5) == ['match_processes', 'name', 'sshd']
+    finally:
+        client.close()
+
+@pytest.mark.parametrize('args', [['-o', 'name'], [['auto-1', '-r']], 'zroot'])
+def test_option_like_arguments_are_rejected(raw, args):
+    reply = raw(json.dumps({'op': 'call', 'id': 3, 'method': 'get_zfs_datasets', 'args': args}).encode())
+    assert reply == {'type': 'reply', 'id': 3, 'error': "invalid arguments"}
+
+def test_malformed_requests_get_replies_and_keep_the_connection(raw):
+    for line in (b"not json", b"[]", b"1", b'"call"', b"null"):
+        assert raw(line) == {'type': 'reply', 'id': None, 'error': "malformed request"}
+    assert raw(b'{"op": "call", "id": 1}')['error'] == "malformed request"
+    assert raw(b'{"op": "call", "id": 2, "method": ["get_zfs_pools"]}')['error'] == "malformed request"
+    assert raw(b'{"op": "subscribe", "id": 3, "sections": "processes"}')['error'] == "malformed request"
+    assert raw(b'{"op": "subscribe", "id": 4, "sections": [], "since": []}')['error'] == "malformed request"
+    assert raw(b'{"op": "launch", "id": 5}')['error'] == "unknown request 'launch'"
+    assert raw(b'{"op": "call", "id": 6, "method": "format_disk"}')['error'] == "unknown method 'format_disk'"
+    assert raw(b'{"op": "call", "id": 7, "method": "get_zfs_pools"}') == {'type': 'reply', 'id': 7,
+                                                                          'result': ['get_zfs_pools']}
+
+@pytest.mark.parametrize('args', [
+    ["123"], [[1, "2"]], [[True]], [[7], "5"], [[7], -1], [[7], 5, 1], [[7], 5, False, 1], [],
+])
+def test_termination_arguments_are_checked_before_signalling(agent, raw, args):
+    reply = raw(json.dumps({'op': 'call', 'id': 8, 'method': 'terminate_processes', 'args': args}).encode())
+    assert reply == {'type': 'reply', 'id': 8, 'error': "invalid arguments"}
+    assert agent.collector.calls == []
+
+def test_valid_termination_arguments(agent, raw):
+    reply = raw(b'{"op": "call", "id": 9, "method": "terminate_processes", "args": [[7, 8], 2.5, true]}')
+    assert reply['result'] == ['terminate_processes', [7, 8], 2.5, True]
+
+def test_unencodable_result_gets_an_error_reply(raw):
+    reply = raw(b'{"op": "call", "id": 10, "method": "get_boot_environments"}')
+    assert reply['id'] == 10 and reply['error'].startswith("unencodable result")
+    assert raw(b'{"op": "call", "id": 11, "method": "get_zfs_pools"}')['result'] == ['get_zfs_pools']
+
+def test_only_successful_actions_wake_subscribers(agent, raw):
+    changed = []
+    agent.changed = changed.append
+    assert raw(b'{"op": "call", "id": 12, "method": "destroy_boot_environment", "args": ["be"]}')['error'] == \
+        "beadm failed"
+    assert raw(b'{"op": "call", "id": 13, "method": "terminate_processes", "args": [[7]]}')['result']
+    assert changed == ['terminate_processes']
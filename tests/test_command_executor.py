@@ -0,0 +1,122 @@
+import os
+import stat
+import subprocess
+import sys
+import time
+
+import pytest
+
+from system_core import CommandExecutor, LatencyHistogram
+
+# A "probe" tool that records each run in a log file and waits for a release file before
+# printing its arguments, so tests can hold runs in flight.
+PROBE = """#!{python}
+import os, sys, time
+directory = os.path.dirname(os.path.abspath(__file__))
+with open(os.path.join(directory, 'runs'), 'a') as runs:
+    runs.write(' '.join(sys.argv[1:]) + '\\n')
+while sys.argv[1:2] == ['wait'] and not os.path.exists(os.path.join(directory, 'release')):
+    time.sleep(0.01)
+print(' '.join(sys.argv[1:]))
+sys.exit(3 if sys.argv[1:2] == ['fail'] else 0)
+"""
+
+@pytest.fixture
+def executor(tmp_path):
+    probe = tmp_path / 'probe'
+    probe.write_text(PROBE.format(python=sys.executable))
+    probe.chmod(probe.stat().st_mode | stat.S_IXUSR)
+    executor = CommandExecutor(bin_dir=str(tmp_path))
+    executor.runs = lambda: (tmp_path / 'runs').read_text().splitlines() if (tmp_path / 'runs').exists() else []
+    executor.release = lambda: (tmp_path / 'release').touch()
+    yield executor
+    executor.release()
+    executor.shutdown()
+
+def test_overlapping_identical_runs_share_one_process(executor):
+    first = executor.submit(['probe', 'wait'])
+    second = executor.submit(['probe', 'wait'])
+    assert second is first
+    executor.release()
+    assert first.result(10).stdout == "wait\n"
+    assert executor.runs() == ["wait"]
+
+def test_different_arguments_are_not_coalesced(executor):
+    assert executor.run(['probe', 'a']).stdout == "a\n"
+    assert executor.run(['probe', 'b']).stdout == "b\n"
+    assert executor.runs() == ["a", "b"]
+
+def test_results_are_cached_for_the_ttl(executor):
+    executor.run(['probe', 'list'], ttl=0.5)
+    executor.run(['probe', 'list'], ttl=0.5)
+    assert executor.runs() == ["list"]
+    time.sleep(0.6)
+    executor.run(['probe', 'list'], ttl=0.5)
+    assert executor.runs() == ["list", "list"]
+
+def test_uncached_runs_always_execute(executor):
+    executor.run(['probe', 'list'])
+    executor.run(['probe', 'list'])
+    assert executor.runs() == ["list", "list"]
+
+def test_mutating_command_invalidates_cache(executor):
+    executor.run(['probe', 'list'], ttl=60)
+    executor.run(['probe', 'destroy'], invalidates=('probe',))
+    executor.run(['probe', 'list'], ttl=60)
+    assert executor.runs() == ["list", "destroy", "list"]
+
+# A listing that started before a mutation finished may show the old state, so it is not cached.
+def test_result_from_before_invalidation_is_not_cached(executor):
+    stale = executor.submit(['probe', 'wait'], ttl=60)
+    executor.invalidate('probe')
+    executor.release()
+    stale.result(10)
+    executor.run(['probe', 'wait'], ttl=60)
+    assert executor.runs() == ["wait", "wait"]
+
+def test_failures_raise_and_are_not_cached(executor):
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        executor.run(['probe', 'fail'], ttl=60)
+    assert error.value.returncode == 3
+    assert executor.run(['probe', 'fail'], check=False, ttl=60).returncode == 3
+    assert len(executor.runs()) == 2
+
+def test_stream_yields_lines_and_records_latency(executor):
+    assert list(executor.stream(['probe', 'one', 'two'])) == ["one two"]
+    assert executor.stats()['probe one']['count'] == 1
+
+def test_stats_are_keyed_by_subcommand(executor):
+    executor.run(['probe', 'list'])
+    executor.run(['probe', '-v'])
+    assert set(executor.stats()) == {'probe', 'probe list'}
+
+def test_histogram_percentiles_use_bucket_bounds():
+    histogram = LatencyHistogram()
+    for milliseconds in [0.5] * 90 + [15] * 9 + [40]:
+        histogram.record(milliseconds / 1000)
+    summary = histogram.summary()
+    assert summary['count'] == 100
+    assert summary['p50_ms'] == 1
+    assert summary['p95_ms'] == 20
+    assert summary['max_ms'] == pytest.approx(40)
+    assert summary['mean_ms'] == pytest.approx((45 + 135 + 40) / 100)
+    assert summary['buckets']['<=1'] == 90
+    assert summary['buckets']['<=20'] == 9
+
+def test_histogram_caps_percentiles_at_the_maximum():
+    histogram = LatencyHistogram()
+    histogram.record(0.003)
+    assert histogram.percentile(0.5) == pytest.approx(3)
+    histogram.record(60)
+    assert histogram.percentile(1.0) == pytest.approx(60000)
+    assert sum(histogram.summary()['buckets'].values()) == 1
+
+def test_empty_histogram():
+    summary = LatencyHistogram().summary()
+    assert summary['count'] == 0
+    assert summary['mean_ms'] == 0.0
+    assert summary['p95_ms'] == 0.0
+
+def test_missing_tool_in_bin_dir_falls_back_to_path(executor):
+    assert executor.resolve(['true']) == ['true']
+    assert executor.resolve(['probe', 'x'])[0] == os.path.join(executor.bin_dir, 'probe')
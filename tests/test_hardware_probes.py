@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+import system_core
+
+@pytest.fixture
+def probes(tmp_path, monkeypatch):
+    monkeypatch.setattr(system_core.HardwareProbes, 'CACHE_FILE', str(tmp_path / 'hardware.json'))
+    monkeypatch.setattr(system_core, 'CACHE_DIR', str(tmp_path))
+    return lambda: system_core.HardwareProbes(executor=None)
+
+def write_cache(tmp_path, data):
+    (tmp_path / 'hardware.json').write_text(json.dumps(data))
+
+def test_cache_round_trip(probes, tmp_path):
+    first = probes()
+    first.static_facts = {'os': [('Operating System', 'FreeBSD')]}
+    first.save_cache()
+    assert probes().static_facts == {'os': [('Operating System', 'FreeBSD')]}
+
+def test_cache_from_another_boot_is_stale(probes, tmp_path):
+    write_cache(tmp_path, {'boot_time': 0, 'facts': {'os': [['Operating System', 'FreeBSD']]}})
+    assert probes().static_facts == {}
+
+@pytest.mark.parametrize('data', [[], 1, "facts", {'facts': []}, {'boot_time': 'soon', 'facts': {}}])
+def test_malformed_cache_is_stale(probes, tmp_path, data):
+    write_cache(tmp_path, data)
+    assert probes().static_facts == {}
+
+def test_truncated_cache_is_stale(probes, tmp_path):
+    (tmp_path / 'hardware.json').write_text('{"boot_time": 1')
+    assert probes().static_facts == {}
@@ -0,0 +1,25 @@
+from collections import namedtuple
+
+import pytest
+
+from system_core import IoRateSampler
+
+Partition = namedtuple('Partition', 'device mountpoint')
+
+@pytest.mark.parametrize('disks, device, disk', [
+    (['ada0', 'ada1'], '/dev/ada0p2', 'ada0'),
+    (['da0'], '/dev/da0s1a', 'da0'),
+    (['sda', 'sdb'], '/dev/sdb1', 'sdb'),
+    (['nvme0n1'], '/dev/nvme0n1p1', 'nvme0n1'),
+    (['mmcblk0'], '/dev/mmcblk0p2', 'mmcblk0'),
+    (['md0'], '/dev/md0', 'md0'),
+])
+def test_partitions_map_to_their_disk(disks, device, disk):
+    mounts = IoRateSampler(arc_stats=object()).disk_mount_points(disks, [Partition(device, '/data')])
+    assert mounts == {disk: ['/data']}
+
+def test_longest_disk_name_wins_and_pools_stay_unmapped():
+    sampler = IoRateSampler(arc_stats=object())
+    partitions = [Partition('/dev/sdaa1', '/a'), Partition('/dev/sda2', '/b'), Partition('zroot/home', '/home'),
+                  Partition('/dev/sdab', '/c')]
+    assert sampler.disk_mount_points(['sda', 'sdaa'], partitions) == {'sdaa': ['/a'], 'sda': ['/b']}
@@ -0,0 +1,110 @@
+import threading
+
+import system_core
+from system_core import LogFile
+
+def write_log(tmp_path, line_count):
+    path = tmp_path / 'messages'
+    path.write_bytes(b''.join(b"line %d\n" % index for index in range(line_count)))
+    return str(path)
+
+def test_index_covers_every_line(tmp_path):
+    log_file = LogFile(write_log(tmp_path, 1000))
+    assert log_file.build_index() == 1000
+    assert log_file.indexed.is_set()
+    assert log_file.read_lines(998, 5) == "line 998\nline 999\n"
+    log_file.close()
+
+def test_last_line_without_newline(tmp_path):
+    path = tmp_path / 'messages'
+    path.write_bytes(b"first\nsecond")
+    log_file = LogFile(str(path))
+    assert log_file.build_index() == 2
+    assert log_file.read_lines(1, 1) == "second"
+
+def test_empty_file(tmp_path):
+    path = tmp_path / 'messages'
+    path.write_bytes(b"")
+    log_file = LogFile(str(path))
+    assert log_file.build_index() == 0
+    assert log_file.read_lines(0, 10) == ""
+    log_file.close()
+
+# Opening a log indexes one page on the Tk thread, which must not scan a whole batch.
+def test_max_lines_stops_within_a_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(LogFile, 'INDEX_BATCH', 1000)
+    log_file = LogFile(write_log(tmp_path, 5000))
+    assert log_file.build_index(max_lines=10) == 10
+    assert not log_file.indexed.is_set()
+    assert log_file.build_index(max_lines=1500) == 1500
+    assert log_file.build_index() == 5000
+    log_file.close()
+
+def test_search_returns_line_numbers(tmp_path):
+    log_file = LogFile(write_log(tmp_path, 100))
+    log_file.build_index()
+    assert log_file.search("LINE 4") == [4] + list(range(40, 50))
+    assert log_file.search(r"line \d5$", use_regex=True) == [15, 25, 35, 45, 55, 65, 75, 85, 95]
+    assert log_file.search("line 4", ignore_case=False, max_matches=3) == [4, 40, 41]
+
+def test_close_unmaps(tmp_path):
+    log_file = LogFile(write_log(tmp_path, 10))
+    log_file.build_index()
+    log_file.close()
+    assert log_file.data.closed
+    assert log_file.search("line") is None
+    log_file.close()
+
+# A search still running when the log is closed keeps the mapping until it returns.
+def test_close_waits_for_running_search(tmp_path):
+    log_file = LogFile(write_log(tmp_path, 10))
+    started, finish = threading.Event(), threading.Event()
+    real_search_lines = log_file.search_lines
+
+    def slow_search_lines(*args):
+        started.set()
+        finish.wait(5)
+        return real_search_lines(*args)
+
+    log_file.search_lines = slow_search_lines
+    log_file.build_index()
+    results = []
+    thread = threading.Thread(target=lambda: results.append(log_file.search("line 3", cancelled=threading.Event())))
+    thread.start()
+    started.wait(5)
+    log_file.close()
+    assert not log_file.data.closed
+    finish.set()
+    thread.join(5)
+    assert log_file.data.closed
+    assert results == [[3]]
+
+def test_from_bytes_needs_no_file():
+    log_file = system_core.LogFile.from_bytes(b"a\nb\n", "dmesg")
+    assert log_file.build_index() == 2
+    log_file.close()
+    assert log_file.read_lines(0, 2) == "a\nb\n"
+
+class StatusVar:
+    def __init__(self):
+        self.value = "Searching..."
+
+    def set(self, value):
+        self.value = value
+
+# A search that raises comes back from the worker with no matches, and must still be reported.
+def test_failed_search_is_reported(tmp_path):
+    import queue
+    import types
+    import system_view
+    log_file = LogFile(write_log(tmp_path, 10))
+    log_file.build_index()
+    scheduler = types.SimpleNamespace(timings=system_core.SpanTimings(), results=queue.Queue())
+    view = types.SimpleNamespace(log_file=log_file, log_search_var=StatusVar())
+    system_view.RefreshScheduler.run_collect(
+        scheduler, lambda: log_file.search("[", use_regex=True),
+        lambda matches, error: system_view.SystemInfo.on_log_search_done(view, log_file, matches, error), 'log.search')
+    callback, data, error, name = scheduler.results.get_nowait()
+    callback(data, error)
+    assert view.log_search_var.value.startswith("Search failed: ")
+    log_file.close()
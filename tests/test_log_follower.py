@@ -0,0 +1,87 @@
+import os
+
+from system_core import LogFollower
+
+def append(path, data):
+    with open(path, 'ab') as log:
+        log.write(data)
+
+def test_seed_keeps_only_the_tail(tmp_path, monkeypatch):
+    monkeypatch.setattr(LogFollower, 'SEED_BYTES', 20)
+    path = tmp_path / 'messages'
+    path.write_bytes(b''.join(b"line %d\n" % index for index in range(10)))
+    follower = LogFollower(str(path))
+    # The seek lands inside "line 7", which is dropped rather than shown cut short.
+    assert follower.poll() == ["line 8", "line 9"]
+    follower.close()
+
+def test_appended_and_partial_lines(tmp_path):
+    path = tmp_path / 'messages'
+    path.write_bytes(b"one\n")
+    follower = LogFollower(str(path))
+    assert follower.poll() == ["one"]
+    assert follower.poll() == []
+    append(path, b"two\nthr")
+    assert follower.poll() == ["two"]
+    append(path, b"ee\n")
+    assert follower.poll() == ["three"]
+    assert list(follower.lines) == ["one", "two", "three"]
+    follower.close()
+
+def test_ring_keeps_max_lines(tmp_path):
+    path = tmp_path / 'messages'
+    path.write_bytes(b"a\nb\nc\nd\n")
+    follower = LogFollower(str(path), max_lines=2)
+    assert follower.poll() == ["c", "d"]
+    assert list(follower.lines) == ["c", "d"]
+    follower.close()
+
+def test_rotation_reads_old_tail_then_new_file(tmp_path):
+    path = tmp_path / 'messages'
+    path.write_bytes(b"old 1\n")
+    follower = LogFollower(str(path))
+    follower.poll()
+    append(path, b"old 2\nold part")
+    os.rename(path, tmp_path / 'messages.0')
+    path.write_bytes(b"new 1\n")
+    assert follower.poll() == ["old 2", "old part", f"--- {path} rotated ---", "new 1"]
+    append(path, b"new 2\n")
+    assert follower.poll() == ["new 2"]
+    follower.close()
+
+def test_missing_file_waits_for_the_new_one(tmp_path):
+    path = tmp_path / 'messages'
+    path.write_bytes(b"old 1\n")
+    follower = LogFollower(str(path))
+    follower.poll()
+    append(path, b"old 2\n")
+    os.rename(path, tmp_path / 'messages.0')
+    assert follower.poll() == ["old 2"]
+    assert follower.poll() == []
+    path.write_bytes(b"new 1\n")
+    assert follower.poll() == [f"--- {path} rotated ---", "new 1"]
+    follower.close()
+
+def test_truncation_starts_over(tmp_path):
+    path = tmp_path / 'messages'
+    path.write_bytes(b"first\nsecond\n")
+    follower = LogFollower(str(path))
+    follower.poll()
+    path.write_bytes(b"x\n")
+    assert follower.poll() == [f"--- {path} truncated ---", "x"]
+    follower.close()
+
+# The rest of a rotated file is read in READ_LIMIT pieces before moving on to the new one.
+def test_rest_of_rotated_file_is_read_up_to_the_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(LogFollower, 'READ_LIMIT', 12)
+    path = tmp_path / 'messages'
+    path.write_bytes(b"")
+    follower = LogFollower(str(path))
+    follower.poll()
+    append(path, b"old 1\nold 2\nold 3\nold 4\n")
+    os.rename(path, tmp_path / 'messages.0')
+    path.write_bytes(b"new 1\n")
+    assert follower.poll() == ["old 1", "old 2"]
+    assert follower.poll() == ["old 3", "old 4"]
+    assert follower.poll() == [f"--- {path} rotated ---", "new 1"]
+    follower.close()
@@ -0,0 +1,49 @@
+import os
+from datetime import datetime, timedelta
+
+from system_core import MetricsRecorder, load_metrics_day, recorded_days
+
+def record_day(recorder, day, values):
+    for minute, value in enumerate(values):
+        recorder.record((day + timedelta(minutes=minute)).timestamp(), {'cpu': value}, [('init', 1, 0.5, 0.1)])
+    recorder.flush()
+
+def test_finished_days_are_compressed(tmp_path):
+    recorder = MetricsRecorder(['cpu'], directory=str(tmp_path), top_count=1)
+    yesterday = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    record_day(recorder, yesterday, [1.0, 2.0])
+    record_day(recorder, datetime.now(), [3.0])
+    recorder.compress_finished_days()
+    assert [name.endswith('.gz') for name, date in recorded_days(str(tmp_path))] == [True, False]
+    assert list(load_metrics_day(yesterday, str(tmp_path)).series['cpu'].last(2)) == [1.0, 2.0]
+
+# Rows written for a day that was already archived are added to the archive, not swapped in for it.
+def test_recompressing_a_day_keeps_the_archive(tmp_path):
+    recorder = MetricsRecorder(['cpu'], directory=str(tmp_path), top_count=1)
+    yesterday = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    record_day(recorder, yesterday, [1.0, 2.0])
+    recorder.compress_finished_days()
+    record_day(recorder, yesterday + timedelta(hours=1), [3.0])
+    recorder.compress_finished_days()
+    assert sorted(os.listdir(tmp_path)) == [yesterday.strftime('%d%m%Y') + '.csv.gz']
+    history = load_metrics_day(yesterday, str(tmp_path))
+    assert history.total == 3
+    assert list(history.series['cpu'].last(3)) == [1.0, 2.0, 3.0]
+
+def test_expired_days_are_removed(tmp_path):
+    recorder = MetricsRecorder(['cpu'], directory=str(tmp_path), retention_days=2)
+    old = datetime.now() - timedelta(days=5)
+    record_day(recorder, old, [1.0])
+    record_day(recorder, datetime.now(), [2.0])
+    recorder.remove_expired_days()
+    assert [date.date() for name, date in recorded_days(str(tmp_path))] == [datetime.now().date()]
+
+# Rows recorded after a day was archived sit in a plain file until the next compression.
+def test_archive_and_plain_file_are_both_read(tmp_path):
+    recorder = MetricsRecorder(['cpu'], directory=str(tmp_path), top_count=1)
+    yesterday = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    record_day(recorder, yesterday, [1.0, 2.0])
+    recorder.compress_finished_days()
+    record_day(recorder, yesterday + timedelta(hours=1), [3.0])
+    assert len(os.listdir(tmp_path)) == 2
+    assert list(load_metrics_day(yesterday, str(tmp_path)).series['cpu'].last(3)) == [1.0, 2.0, 3.0]
@@ -0,0 +1,52 @@
+from system_core import PackageIndex
+
+PACKAGES = [
+    ('python311', '3.11.9', 100, 'Interpreted object-oriented programming language'),
+    ('py311-pip', '23.3.2', 10, 'Tool for installing and managing Python packages'),
+    ('bash', '5.2.26', 20, 'GNU Project\'s Bourne Again SHell'),
+    ('Zsh', '5.9', 30, 'The Z shell'),
+    ('pkg', '1.21.3', 40, 'Package manager'),
+    ('vim', '9.1', 50, 'Improved version of the vi editor (python bindings)'),
+]
+
+def names(index, positions):
+    return [index.packages[position][0] for position in positions]
+
+def test_packages_are_sorted_case_insensitively():
+    index = PackageIndex(PACKAGES)
+    assert names(index, index.search('')) == ['bash', 'pkg', 'py311-pip', 'python311', 'vim', 'Zsh']
+    assert len(index) == 6
+
+def test_name_prefix_matches_come_first():
+    index = PackageIndex(PACKAGES)
+    assert names(index, index.search('python')) == ['python311', 'py311-pip', 'vim']
+    assert names(index, index.search('  PY ')) == ['py311-pip', 'python311', 'vim']
+
+def test_matches_description_text():
+    index = PackageIndex(PACKAGES)
+    assert names(index, index.search('shell')) == ['bash', 'Zsh']
+    assert index.search('no such package') == []
+
+# Typing more letters narrows the previous matches; starting over goes back to the trigrams.
+def test_narrowing_and_widening_queries():
+    index = PackageIndex(PACKAGES)
+    assert names(index, index.search('sh')) == ['bash', 'Zsh']
+    assert names(index, index.search('she')) == ['bash', 'Zsh']
+    assert names(index, index.search('shel')) == ['bash', 'Zsh']
+    assert names(index, index.search('pa')) == ['pkg', 'py311-pip']
+    assert names(index, index.search('editor')) == ['vim']
+
+def test_position_by_name_or_name_version():
+    index = PackageIndex(PACKAGES)
+    assert index.position('vim') == index.position('vim-9.1') == 4
+    assert index.position('vim-9.0') is None
+
+def test_removed_packages_disappear_but_positions_stay():
+    index = PackageIndex(PACKAGES)
+    pkg_position = index.position('pkg')
+    assert index.remove(['bash-5.2.26', 'missing']) == [0]
+    assert index.position('bash') is None
+    assert index.position('pkg') == pkg_position
+    assert len(index) == 5
+    assert names(index, index.search('shell')) == ['Zsh']
+    assert 'bash' not in names(index, index.search(''))
@@ -0,0 +1,60 @@
+import pytest
+
+from system_core import ProcessSnapshot, ProcessTableModel, StringTable
+
+ROWS = [
+    ('init', 1, 0.0, 0.01, 'sleeping', 0),
+    ('sshd', 10, 0.004, 0.5, 'sleeping', 1),
+    ('python', 11, 12.5, 3.25, 'running', 10),
+    ('idle', 100, 0.5, 0.0, 'running', 1),
+    ('make', 110, 1.0, 1.004, 'running', 10),
+]
+
+@pytest.fixture
+def model():
+    snapshot = ProcessSnapshot(StringTable())
+    for row in ROWS:
+        snapshot.append(*row)
+    model = ProcessTableModel()
+    model.update(snapshot)
+    return model
+
+def filtered(model, column, text):
+    model.set_filter(column, text)
+    return [model.snapshot.row(position)[1] for position in model.order]
+
+def test_name_filter_is_a_substring(model):
+    assert filtered(model, 0, 'SSH') == [10]
+    assert filtered(model, 0, 'i') == [1, 100]
+
+# A bare number and "=" are the same comparison, made at the two decimals the table shows.
+@pytest.mark.parametrize('text', ['0', '=0', '0.00', '= 0'])
+def test_bare_number_equals_the_displayed_value(model, text):
+    assert filtered(model, 2, text) == [1, 10]
+
+def test_memory_compares_displayed_values(model):
+    assert filtered(model, 3, '1') == [110]
+    assert filtered(model, 3, '0.5') == [10]
+    assert filtered(model, 3, '>=1') == [11, 110]
+    assert filtered(model, 3, '>1') == [11]
+
+def test_cpu_comparisons(model):
+    assert filtered(model, 2, '>0') == [11, 100, 110]
+    assert filtered(model, 2, '<1') == [1, 10, 100]
+    assert filtered(model, 2, '12.5') == [11]
+
+def test_pid_filter_uses_the_same_rule(model):
+    assert filtered(model, 1, '1') == [1]
+    assert filtered(model, 1, '=10') == [10]
+    assert filtered(model, 1, '>=100') == [100, 110]
+    assert filtered(model, 1, '1.5') == []
+    assert filtered(model, 1, '7') == []
+
+def test_other_text_matches_the_displayed_value(model):
+    assert filtered(model, 2, '.50') == [11, 100]
+    assert filtered(model, 1, '1 ') == [1]
+    assert filtered(model, 1, '1-') == []
+
+def test_filter_keeps_the_sort_order(model):
+    model.set_sort(2)
+    assert filtered(model, 2, '>0') == [11, 110, 100]
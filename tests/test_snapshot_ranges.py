@@ -0,0 +1,26 @@
+from system_core import snapshot_ranges
+
+NAMES = [f"tank/home@auto-{day}" for day in range(1, 8)]
+
+def test_adjacent_snapshots_become_one_range():
+    selected = set(NAMES[1:4])
+    assert snapshot_ranges(NAMES, selected) == [("auto-2%auto-4", NAMES[1:4])]
+
+def test_single_snapshot_is_named_alone():
+    assert snapshot_ranges(NAMES, {NAMES[0]}) == [("auto-1", [NAMES[0]])]
+
+def test_gaps_split_the_ranges():
+    selected = {NAMES[0], NAMES[1], NAMES[3], NAMES[5], NAMES[6]}
+    assert snapshot_ranges(NAMES, selected) == [
+        ("auto-1%auto-2", NAMES[0:2]),
+        ("auto-4", [NAMES[3]]),
+        ("auto-6%auto-7", NAMES[5:7]),
+    ]
+
+def test_whole_dataset():
+    assert snapshot_ranges(NAMES, set(NAMES)) == [("auto-1%auto-7", NAMES)]
+
+# Names that are not snapshots of the dataset (already destroyed, say) are simply not covered.
+def test_selected_names_not_listed_are_ignored():
+    assert snapshot_ranges(NAMES, {"tank/home@gone"}) == []
+    assert snapshot_ranges([], set(NAMES)) == []
@@ -0,0 +1,76 @@
+import os
+
+import fake_psutil
+import pytest
+
+import system_core
+from system_agent import AgentClient, CollectorAgent
+from system_core import terminate_processes
+
+@pytest.fixture
+def table(monkeypatch):
+    monkeypatch.setattr(system_core, 'psutil', fake_psutil)
+    fake_psutil.configure(10, churn=0)
+    for info in fake_psutil.table.processes.values():
+        info['status'] = 'sleeping'
+    return fake_psutil.table.processes
+
+def test_string_and_int_pids_are_the_same_process(table):
+    names = {pid: table[pid]['name'] for pid in (7, 8)}
+    results = terminate_processes(['7', 7, ' 8 '], grace=0)
+    assert results == [(7, names[7], 'terminated'), (8, names[8], 'terminated')]
+    assert 7 not in table and 8 not in table
+
+def test_invalid_entries_are_reported_as_given(table):
+    results = terminate_processes(['x', 0, -3, '9', None, 9], grace=0)
+    assert [(pid, outcome) for pid, name, outcome in results] == [
+        ('x', 'invalid'), (0, 'invalid'), (-3, 'invalid'), (9, 'terminated'), ('None', 'invalid')]
+
+def test_missing_processes_are_gone(table):
+    assert terminate_processes([4242], grace=0) == [(4242, '', 'gone')]
+
+# A stopped process ignores SIGTERM, so it is still there after the grace period and gets SIGKILL.
+def test_survivors_of_sigterm_are_killed(table):
+    table[3]['status'] = 'stopped'
+    results = terminate_processes([3, 4], grace=0.01)
+    assert [(pid, outcome) for pid, name, outcome in results] == [(3, 'killed'), (4, 'terminated')]
+    assert 3 not in table
+
+def test_force_kills_straight_away(table):
+    table[5]['status'] = 'stopped'
+    assert [outcome for pid, name, outcome in terminate_processes(['5'], force=True)] == ['killed']
+    assert 5 not in table
+
+def test_denied_processes(table, monkeypatch):
+    def terminate(process):
+        raise fake_psutil.AccessDenied(process.pid)
+    monkeypatch.setattr(fake_psutil.Process, 'terminate', terminate)
+    assert [outcome for pid, name, outcome in terminate_processes([6], grace=0)] == ['denied']
+    assert 6 in table
+
+def test_init_and_self_are_refused(table):
+    results = terminate_processes([1, '1', os.getpid(), 2], grace=0)
+    assert [(pid, outcome) for pid, name, outcome in results] == [
+        (1, 'refused'), (os.getpid(), 'refused'), (2, 'terminated')]
+    assert 1 in table
+
+# Only terminate_processes is real; the agent needs the rest of the collector to exist.
+class TerminatingCollector:
+    terminate_processes = staticmethod(terminate_processes)
+
+    def __getattr__(self, name):
+        return lambda *args: None
+
+# The agent runs as root, so the refusal has to hold for its clients too.
+def test_agent_clients_cannot_signal_init_or_the_agent(table, tmp_path):
+    agent = CollectorAgent(TerminatingCollector(), path=str(tmp_path / 'agent.sock'), group=None)
+    agent.start()
+    client = AgentClient(agent.path)
+    try:
+        results = client.call('terminate_processes', [1, os.getpid(), 3], 0, True, timeout=5)
+    finally:
+        client.close()
+        agent.close()
+    assert [(pid, outcome) for pid, name, outcome in results] == [
+        (1, 'refused'), (os.getpid(), 'refused'), (3, 'killed')]
+    assert 1 in table
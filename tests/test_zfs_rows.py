@@ -0,0 +1,9 @@
+from system_core import parse_zfs_row, parse_zfs_rows
+
+def test_row_values():
+    assert parse_zfs_row("zroot/home@auto-1\t4096\t-\t1700000000") == ("zroot/home@auto-1", 4096, 0, 1700000000)
+
+def test_malformed_lines_are_skipped(capsys):
+    lines = ["zroot@a\t1\t2\t3", "garbage", "zroot@b\t1\t2", "zroot@c\t4\t5\t6"]
+    assert parse_zfs_rows(lines) == [("zroot@a", 1, 2, 3), ("zroot@c", 4, 5, 6)]
+    assert capsys.readouterr().err.count("Skipping malformed zfs list line") == 2